@@ -0,0 +1,344 @@
+import asyncio
+from functools import wraps
+import math
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.contrib.auth.models import AnonymousUser
+from django.core.cache import cache
+from django.db import connections
+from django.http import JsonResponse
+from django.http.response import HttpResponseBase
+from django.utils import timezone
+from rest_framework import exceptions
+from rest_framework.request import Request
+from rest_framework.settings import api_settings
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+from api.cache import (
+    add_validators,
+    get_cache_entry,
+    get_recipes_modified,
+    get_response_cache_key,
+)
+from api.filters import RecipeFilter, search_ingredients
+from api.pagination import RecipePagination
+from api.serializers.recipes import (
+    IngredientSerializer,
+    ReadRecipeSerializer,
+    TagSerializer,
+)
+from api.views import RecipeViewSet
+from recipes.cache import RECIPES_VERSION_KEY
+from recipes.catalog import CATALOG_VERSION_KEY, get_catalog
+from recipes.models import (
+    Favorite,
+    Ingredient,
+    Recipe,
+    RecipesInShoppingList,
+)
+from users.models import Subscription
+
+
+def db_task(func):
+    """
+    Декоратор выполнения функции с запросами к базе данных в пуле
+    потоков. Независимые запросы одного HTTP-запроса выполняются
+    одновременно в разных соединениях. Соединения потока закрываются
+    после каждого вызова: потоков пула много, и при CONN_MAX_AGE
+    каждый держал бы свое соединение открытым.
+    """
+    @wraps(func)
+    def wrapper(*args, **kwargs):
+        try:
+            return func(*args, **kwargs)
+        finally:
+            connections.close_all()
+    return sync_to_async(wrapper, thread_sensitive=False)
+
+
+@db_task
+def check_request(request):
+    """
+    Функция аутентификации и проверки ограничений частоты запросов
+    теми же классами, что и в синхронном API.
+    """
+    request = Request(request, authenticators=[
+        authenticator()
+        for authenticator in api_settings.DEFAULT_AUTHENTICATION_CLASSES
+    ])
+    request.user
+    for throttle in (
+        throttle_class()
+        for throttle_class in api_settings.DEFAULT_THROTTLE_CLASSES
+    ):
+        if not throttle.allow_request(request, None):
+            raise exceptions.Throttled(throttle.wait())
+    return request
+
+
+def json_response(data, status=200):
+    return JsonResponse(
+        data, status=status, safe=False,
+        json_dumps_params={'ensure_ascii': False},
+    )
+
+
+def to_response(result):
+    """Функция получения ответа из данных, которые вернуло представление."""
+    if isinstance(result, HttpResponseBase):
+        return result
+    return json_response(result)
+
+
+def async_api_view(view):
+    """
+    Декоратор асинхронного представления API только для чтения:
+    аутентификация, ограничения частоты запросов и ответы об ошибках
+    в формате DRF. Представление возвращает данные ответа.
+    """
+    @wraps(view)
+    async def wrapper(request, *args, **kwargs):
+        if request.method != 'GET':
+            return json_response(
+                {'detail': f'Метод "{request.method}" не разрешен.'},
+                status=405,
+            )
+        try:
+            request = await check_request(request)
+            return to_response(await view(request, *args, **kwargs))
+        except exceptions.APIException as error:
+            detail = error.detail
+            response = json_response(
+                detail if isinstance(detail, (dict, list))
+                else {'detail': detail},
+                status=error.status_code,
+            )
+            if getattr(error, 'wait', None):
+                response['Retry-After'] = str(math.ceil(error.wait))
+            return response
+    return wrapper
+
+
+@db_task
+def get_cached_entry(request, version_keys):
+    key = get_response_cache_key(request, version_keys)
+    return key, cache.get(key)
+
+
+@db_task
+def set_cached_entry(key, entry):
+    cache.set(key, entry, settings.RESPONSE_CACHE_TIMEOUT)
+
+
+def cached_response(*version_keys, last_modified=None):
+    """
+    Декоратор кеширования ответов асинхронного представления для
+    анонимных пользователей, как в CachedResponseMixin: ключ по адресу
+    и версиям данных version_keys, ETag и Last-Modified, ответ 304 на
+    условные запросы. Время изменения данных ответа возвращает функция
+    last_modified, по умолчанию — текущее время. Ответы синхронного
+    представления (запросы с курсором) передаются без изменений.
+    """
+    def decorator(view):
+        @wraps(view)
+        async def wrapper(request, *args, **kwargs):
+            if request.user.is_authenticated:
+                return await view(request, *args, **kwargs)
+            key, entry = await get_cached_entry(request, version_keys)
+            if entry is None:
+                data = await view(request, *args, **kwargs)
+                if isinstance(data, HttpResponseBase):
+                    return data
+                entry = get_cache_entry(data, (
+                    await db_task(last_modified)(data)
+                    if last_modified else timezone.now()
+                ))
+                await set_cached_entry(key, entry)
+            return add_validators(
+                request, json_response(entry['data']), entry
+            )
+        return wrapper
+    return decorator
+
+
+@db_task
+def filter_recipes(request):
+    """Функция получения отфильтрованных рецептов без их загрузки."""
+    filterset = RecipeFilter(
+        request.query_params, queryset=Recipe.objects.all(), request=request
+    )
+    if not filterset.is_valid():
+        raise exceptions.ValidationError(filterset.errors)
+    return filterset.qs
+
+
+@db_task
+def count_recipes(queryset):
+    return queryset.count()
+
+
+@db_task
+def get_page_keys(queryset, start, stop):
+    return list(queryset.values_list('id', 'author_id')[start:stop])
+
+
+@db_task
+def load_recipes(recipe_ids):
+    """Функция загрузки рецептов с авторами, тегами и ингредиентами."""
+    recipes = Recipe.objects.filter(id__in=recipe_ids).for_read(
+        AnonymousUser()
+    ).order_by()
+    return {recipe.pk: recipe for recipe in recipes}
+
+
+@db_task
+def get_ids(queryset, field):
+    return set(queryset.values_list(field, flat=True))
+
+
+async def no_ids():
+    return set()
+
+
+def get_flag_tasks(user, recipe_ids, author_ids):
+    """
+    Функция получения задач флагов избранного, списка покупок
+    и подписки для рецептов; задачи не зависят друг от друга.
+    """
+    if not user.is_authenticated:
+        return no_ids(), no_ids(), no_ids()
+    return (
+        get_ids(Favorite.objects.filter(
+            user=user, recipe_id__in=recipe_ids
+        ), 'recipe_id'),
+        get_ids(RecipesInShoppingList.objects.filter(
+            user=user, recipe_id__in=recipe_ids
+        ), 'recipe_id'),
+        get_ids(Subscription.objects.filter(
+            user=user, following_id__in=author_ids
+        ), 'following_id'),
+    )
+
+
+def set_flags(recipes, favorited, in_cart, subscribed):
+    """Функция установки флагов, которые читает ReadRecipeSerializer."""
+    for recipe in recipes:
+        recipe.is_favorited = recipe.pk in favorited
+        recipe.is_in_shopping_cart = recipe.pk in in_cart
+        recipe.author.is_subscribed = recipe.author_id in subscribed
+
+
+def get_page_link(request, page):
+    url = request.build_absolute_uri()
+    if page == 1:
+        return remove_query_param(url, 'page')
+    return replace_query_param(url, 'page', page)
+
+
+sync_recipe_list = sync_to_async(RecipeViewSet.as_view({'get': 'list'}))
+
+
+@async_api_view
+@cached_response(
+    RECIPES_VERSION_KEY, CATALOG_VERSION_KEY,
+    last_modified=get_recipes_modified,
+)
+async def recipe_list(request):
+    """
+    Асинхронная лента рецептов с пагинацией по номеру страницы.
+    Количество рецептов и ключи страницы, затем сами рецепты и флаги
+    пользователя запрашиваются одновременно. Запросы с курсором
+    передаются синхронному представлению.
+    """
+    if 'cursor' in request.query_params:
+        return await sync_recipe_list(request._request)
+    page_size = RecipePagination().get_page_size(request)
+    try:
+        page = int(request.query_params.get('page', 1))
+    except ValueError:
+        page = 0
+    if page < 1:
+        raise exceptions.NotFound(RecipePagination.invalid_page_message)
+    queryset = await filter_recipes(request)
+    count, keys = await asyncio.gather(
+        count_recipes(queryset),
+        get_page_keys(queryset, (page - 1) * page_size, page * page_size),
+    )
+    if not keys and page != 1:
+        raise exceptions.NotFound(RecipePagination.invalid_page_message)
+    recipe_ids = [recipe_id for recipe_id, _ in keys]
+    recipes, *flags = await asyncio.gather(
+        load_recipes(recipe_ids),
+        *get_flag_tasks(
+            request.user, recipe_ids, {author_id for _, author_id in keys}
+        ),
+    )
+    recipes = [recipes[recipe_id] for recipe_id in recipe_ids]
+    set_flags(recipes, *flags)
+    results = ReadRecipeSerializer(recipes, many=True, context={
+        'request': request, 'thumbnail_size': 'medium',
+    }).data
+    return {
+        'count': count,
+        'next': (
+            get_page_link(request, page + 1)
+            if page * page_size < count else None
+        ),
+        'previous': get_page_link(request, page - 1) if page > 1 else None,
+        'results': results,
+    }
+
+
+@async_api_view
+@cached_response(
+    RECIPES_VERSION_KEY, CATALOG_VERSION_KEY,
+    last_modified=get_recipes_modified,
+)
+async def recipe_detail(request, pk):
+    """
+    Асинхронное получение рецепта; рецепт и флаги пользователя
+    запрашиваются одновременно.
+    """
+    recipes, *flags = await asyncio.gather(
+        load_recipes((pk,)),
+        *get_flag_tasks(
+            request.user, (pk,), Recipe.objects.filter(pk=pk).values('author')
+        ),
+    )
+    if pk not in recipes:
+        raise exceptions.NotFound()
+    set_flags(recipes.values(), *flags)
+    return ReadRecipeSerializer(
+        recipes[pk], context={'request': request}
+    ).data
+
+
+@async_api_view
+@cached_response(CATALOG_VERSION_KEY)
+async def tag_list(request):
+    """Асинхронный список тегов из справочника процесса."""
+    catalog = await sync_to_async(get_catalog)()
+    return TagSerializer(catalog.tags, many=True).data
+
+
+@db_task
+def find_ingredients(name):
+    return list(search_ingredients(Ingredient.objects.all(), name)[
+        :settings.INGREDIENT_SEARCH_LIMIT
+    ])
+
+
+@async_api_view
+@cached_response(CATALOG_VERSION_KEY)
+async def ingredient_list(request):
+    """
+    Асинхронный список ингредиентов из справочника процесса;
+    поиск по названию — функцией синхронного API search_ingredients.
+    """
+    name = request.query_params.get('name')
+    if name:
+        ingredients = await find_ingredients(name)
+    else:
+        ingredients = (await sync_to_async(get_catalog)()).ingredients
+    return IngredientSerializer(ingredients, many=True).data
@@ -0,0 +1,158 @@
+import copy
+import hashlib
+
+from django.conf import settings
+from django.core.cache import cache
+from rest_framework import exceptions
+from rest_framework.authentication import TokenAuthentication
+from rest_framework.authtoken.models import Token
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import InvalidToken
+from rest_framework_simplejwt.settings import api_settings as jwt_settings
+
+from recipes.cache import (
+    LocalCache,
+    get_cache_version,
+    invalidate_cache_version,
+)
+from users.models import User
+
+
+TOKEN_KEY = 'auth:token:{}'
+USER_KEY = 'auth:user:{}'
+AUTH_VERSION_KEY = 'auth:version'
+LOCAL_SIZE = 1000
+COUNTER_FIELDS = ('recipes_count', 'followers_count')
+
+_tokens = LocalCache(LOCAL_SIZE, settings.AUTH_LOCAL_CACHE_TIMEOUT)
+_users = LocalCache(LOCAL_SIZE, settings.AUTH_LOCAL_CACHE_TIMEOUT)
+
+
+def get_token_digest(key):
+    """Функция получения ключа кеша токена; сам токен в кеш не попадает."""
+    return hashlib.sha256(key.encode()).hexdigest()
+
+
+def get_local(local, key, version):
+    """
+    Функция получения записи из памяти процесса. Запись действительна,
+    пока не изменилась общая версия кеша аутентификации: она меняется
+    при любом сбросе, поэтому выход и смена пароля сразу видны всем
+    процессам.
+    """
+    entry = local.get(key)
+    if entry is not None and entry[0] == version:
+        return entry[1]
+    return None
+
+
+def remember_user(user, version):
+    cache.set(USER_KEY.format(user.pk), user, settings.AUTH_CACHE_TIMEOUT)
+    _users.set(user.pk, (version, user))
+
+
+def get_user(user_id, version=None):
+    """
+    Функция получения пользователя по id из памяти процесса, общего кеша
+    или базы данных. Счетчики не загружаются: они меняются без сигналов,
+    а отложенные поля не перезаписываются при сохранении пользователя.
+    Без общего кеша (AUTH_CACHE) пользователь всегда читается из базы.
+    """
+    users = User.objects.defer(*COUNTER_FIELDS)
+    if not settings.AUTH_CACHE:
+        return users.filter(pk=user_id).first()
+    if version is None:
+        version = get_cache_version(AUTH_VERSION_KEY)
+    user = get_local(_users, user_id, version)
+    if user is None:
+        user = cache.get(USER_KEY.format(user_id))
+        if user is None:
+            user = users.filter(pk=user_id).first()
+            if user is None:
+                return None
+            remember_user(user, version)
+        else:
+            _users.set(user_id, (version, user))
+    return copy.copy(user)
+
+
+def get_token_user(key):
+    """
+    Функция получения пользователя по ключу токена. При промахе кешей
+    токен и пользователь читаются из базы данных одним запросом.
+    """
+    tokens = Token.objects.select_related('user').defer(
+        *(f'user__{field}' for field in COUNTER_FIELDS)
+    )
+    if not settings.AUTH_CACHE:
+        token = tokens.filter(key=key).first()
+        return None if token is None else token.user
+    version = get_cache_version(AUTH_VERSION_KEY)
+    digest = get_token_digest(key)
+    user_id = get_local(_tokens, digest, version)
+    if user_id is None:
+        user_id = cache.get(TOKEN_KEY.format(digest))
+    if user_id is None:
+        token = tokens.filter(key=key).first()
+        if token is None:
+            return None
+        user_id = token.user_id
+        cache.set(
+            TOKEN_KEY.format(digest), user_id, settings.AUTH_CACHE_TIMEOUT
+        )
+        remember_user(token.user, version)
+    _tokens.set(digest, (version, user_id))
+    return get_user(user_id, version)
+
+
+def invalidate_user(user_id):
+    """Функция сброса кеша пользователя во всех процессах."""
+    cache.delete(USER_KEY.format(user_id))
+    _users.delete(user_id)
+    invalidate_cache_version(AUTH_VERSION_KEY)
+
+
+def invalidate_token(key):
+    """Функция сброса кеша токена во всех процессах."""
+    digest = get_token_digest(key)
+    cache.delete(TOKEN_KEY.format(digest))
+    _tokens.delete(digest)
+    invalidate_cache_version(AUTH_VERSION_KEY)
+
+
+class CachedTokenAuthentication(TokenAuthentication):
+    """
+    Аутентификация по токену с кешированием пользователя в памяти
+    процесса и общем кеше. Кеш сбрасывается во всех процессах при
+    удалении токена и изменении пользователя.
+    """
+
+    def authenticate_credentials(self, key):
+        user = get_token_user(key)
+        if user is None:
+            raise exceptions.AuthenticationFailed('Недействительный токен.')
+        if not user.is_active:
+            raise exceptions.AuthenticationFailed(
+                'Пользователь неактивен или удален.'
+            )
+        return (user, key)
+
+
+class CachedJWTAuthentication(JWTAuthentication):
+    """
+    Аутентификация по JWT без обращения к таблице токенов;
+    пользователь берется из того же кеша, что и при входе по токену.
+    """
+
+    def get_user(self, validated_token):
+        try:
+            user_id = validated_token[jwt_settings.USER_ID_CLAIM]
+        except KeyError:
+            raise InvalidToken('Токен не содержит id пользователя.')
+        user = get_user(user_id)
+        if user is None or not user.is_active:
+            raise exceptions.AuthenticationFailed(
+                'Пользователь неактивен или удален.',
+                code='user_not_found',
+            )
+        return user
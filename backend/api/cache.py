@@ -0,0 +1,116 @@
+import hashlib
+import json
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Max
+from django.utils import timezone
+from django.utils.cache import get_conditional_response, patch_vary_headers
+from django.utils.http import http_date, urlencode
+from rest_framework import status
+from rest_framework.response import Response
+
+from recipes.cache import get_cache_version
+from recipes.models import Recipe
+
+
+RESPONSE_CACHE_KEY = 'response:{}'
+
+
+def get_response_cache_key(request, version_keys):
+    """Функция получения ключа кеша по адресу запроса и версиям данных."""
+    query = urlencode(sorted(
+        (name, sorted(values))
+        for name, values in request.query_params.lists()
+    ), doseq=True)
+    versions = ':'.join(get_cache_version(key) for key in version_keys)
+    address = f'{request.build_absolute_uri(request.path)}?{query}'
+    return RESPONSE_CACHE_KEY.format(hashlib.md5(
+        f'{address}:{versions}'.encode()
+    ).hexdigest())
+
+
+def get_cache_entry(data, last_modified):
+    """Функция получения записи кеша: данные ответа, ETag и время."""
+    return {
+        'data': data,
+        'etag': '"{}"'.format(hashlib.md5(json.dumps(
+            data, ensure_ascii=False, default=str
+        ).encode()).hexdigest()),
+        'last_modified': int(last_modified.timestamp()),
+    }
+
+
+def get_recipes_modified(data):
+    """
+    Функция получения времени изменения рецептов ответа: рецепта или
+    страницы списка. Для пустой страницы возвращается текущее время.
+    """
+    recipes = data.get('results', (data,))
+    return Recipe.objects.filter(
+        pk__in=[recipe['id'] for recipe in recipes]
+    ).aggregate(last_modified=Max('updated_at'))[
+        'last_modified'
+    ] or timezone.now()
+
+
+def add_validators(request, response, entry):
+    """
+    Функция добавления ETag и Last-Modified к ответу из записи кеша;
+    на повторный условный запрос возвращается ответ 304.
+    """
+    conditional_response = get_conditional_response(
+        request,
+        etag=entry['etag'],
+        last_modified=entry['last_modified'],
+    )
+    if conditional_response is not None:
+        response = conditional_response
+    response['ETag'] = entry['etag']
+    response['Last-Modified'] = http_date(entry['last_modified'])
+    patch_vary_headers(response, ('Authorization',))
+    return response
+
+
+class CachedResponseMixin:
+    """
+    Миксин кеширования ответов list и retrieve для анонимных пользователей.
+
+    Ключ строится по адресу запроса с упорядоченными параметрами и
+    версиям данных из cache_version_keys; ответы авторизованных
+    пользователей не кешируются. Ответ содержит ETag и Last-Modified,
+    на повторные условные запросы возвращается 304.
+    """
+    cache_version_keys = ()
+
+    def list(self, request, *args, **kwargs):
+        return self.get_cached_response(
+            super().list, request, *args, **kwargs
+        )
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.get_cached_response(
+            super().retrieve, request, *args, **kwargs
+        )
+
+    def get_last_modified(self, data):
+        """Функция получения времени изменения данных ответа."""
+        return timezone.now()
+
+    def get_cached_response(self, handler, request, *args, **kwargs):
+        """Функция получения ответа из кеша или его сохранения в кеш."""
+        if request.user.is_authenticated:
+            return handler(request, *args, **kwargs)
+        key = get_response_cache_key(request, self.cache_version_keys)
+        entry = cache.get(key)
+        if entry is None:
+            response = handler(request, *args, **kwargs)
+            if response.status_code != status.HTTP_200_OK:
+                return response
+            entry = get_cache_entry(
+                response.data, self.get_last_modified(response.data)
+            )
+            cache.set(key, entry, settings.RESPONSE_CACHE_TIMEOUT)
+        else:
+            response = Response(entry['data'])
+        return add_validators(request, response, entry)
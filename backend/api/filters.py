@@ -1,26 +1,87 @@
-from django.db.models import Q
+from django.conf import settings
+from django.db import connections
+from django.db.models import Case, IntegerField, Value, When
 import django_filters
 from django_filters import rest_framework as filters
+from django_filters.fields import MultipleChoiceField
 
-from recipes.models import Ingredient, Tag
+from recipes.catalog import get_catalog
+from recipes.models import Ingredient, Recipe
+from recipes.search import search_recipes
+
+
+def search_ingredients(queryset, value):
+    """
+    Функция поиска ингредиентов по названию для синхронного
+    и асинхронного API: сначала совпадения по началу названия, затем
+    по вхождению подстроки. Без индекса (SQLite) названия сравниваются
+    по справочнику процесса без учета регистра для любых алфавитов.
+    """
+    if connections[queryset.db].vendor == 'postgresql':
+        return queryset.filter(name__icontains=value).annotate(
+            search_rank=Case(
+                When(name__istartswith=value, then=Value(0)),
+                default=Value(1),
+                output_field=IntegerField(),
+            )
+        ).order_by('search_rank', 'name')
+    ids = [
+        ingredient.pk
+        for ingredient in get_catalog().search_ingredients(
+            value, settings.INGREDIENT_SEARCH_LIMIT
+        )
+    ]
+    if not ids:
+        return queryset.none()
+    return queryset.filter(pk__in=ids).order_by(Case(
+        *(When(pk=pk, then=Value(position))
+          for position, pk in enumerate(ids)),
+        output_field=IntegerField(),
+    ))
 
 
 class IngredientFilter(filters.FilterSet):
-    """Класс для фильтрации ингредиентов по названию."""
-    name = django_filters.CharFilter(lookup_expr='icontains')
+    """Класс для поиска ингредиентов по названию."""
+    name = django_filters.CharFilter(method='filter_name')
 
     class Meta:
         model = Ingredient
         fields = ('name',)
 
+    def filter_name(self, queryset, name, value):
+        """Поиск ингредиентов функцией search_ingredients."""
+        if not value:
+            return queryset
+        return search_ingredients(queryset, value)
+
+
+def tag_choices():
+    """Функция получения вариантов тегов из справочника."""
+    return [(slug, slug) for slug in get_catalog().tags_by_slug]
+
+
+class TagSlugField(MultipleChoiceField):
+    """Поле выбора тегов, проверяемое по слагам справочника."""
+
+    def valid_value(self, value):
+        return value in get_catalog().tags_by_slug
+
+
+class TagSlugFilter(filters.MultipleChoiceFilter):
+    """Фильтр по слагам тегов без загрузки вариантов при импорте."""
+    field_class = TagSlugField
+
 
 class RecipeFilter(filters.FilterSet):
-    """Класс для фильтрации рецептов по тегам, автору и избранному."""
-    tags = filters.MultipleChoiceFilter(
+    """
+    Класс для фильтрации рецептов по тегам, автору и избранному
+    и полнотекстового поиска.
+    """
+    tags = TagSlugFilter(
         field_name='tags__slug',
         conjoined=False,
         method='filter_tags',
-        choices=Tag.objects.values_list('slug', 'slug')
+        choices=tag_choices,
     )
     author = filters.NumberFilter(
         field_name='author__id',
@@ -32,6 +93,7 @@ class RecipeFilter(filters.FilterSet):
     is_in_shopping_cart = filters.BooleanFilter(
         method='filter_is_in_shopping_cart'
     )
+    search = filters.CharFilter(method='filter_search')
 
     def filter_tags(self, queryset, name, value):
         """Фильтрация рецептов по нескольким тегам."""
@@ -39,10 +101,10 @@ class RecipeFilter(filters.FilterSet):
             return queryset
         if isinstance(value, str):
             value = value.split(',')
-        tag_query = Q()
-        for slug in value:
-            tag_query |= Q(tags__slug=slug)
-        return queryset.filter(tag_query).distinct()
+        tags = get_catalog().tags_by_slug
+        return queryset.filter(id__in=Recipe.tags.through.objects.filter(
+            tag_id__in=[tags[slug].pk for slug in value if slug in tags]
+        ).values('recipe_id'))
 
     def filter_author(self, queryset, name, value):
         """Фильтрация рецептов по автору."""
@@ -54,10 +116,19 @@ class RecipeFilter(filters.FilterSet):
         """Фильтрация рецептов добавленных в избранное."""
         if not value or not self.request.user.is_authenticated:
             return queryset
-        return queryset.filter(favorite__user=self.request.user)
+        return queryset.filter(favorites__user=self.request.user)
 
     def filter_is_in_shopping_cart(self, queryset, name, value):
         """Фильтрация рецептов добавленных в список покупок."""
         if not value or not self.request.user.is_authenticated:
             return queryset
         return queryset.filter(in_shopping_lists__user=self.request.user)
+
+    def filter_search(self, queryset, name, value):
+        """
+        Полнотекстовый поиск рецептов по названию, ингредиентам
+        и описанию с сортировкой по релевантности.
+        """
+        if not value.strip():
+            return queryset
+        return search_recipes(queryset, value)
@@ -0,0 +1,312 @@
+import base64
+from datetime import datetime, timezone
+import io
+import json
+import math
+from pathlib import Path
+import statistics
+import time
+from urllib.parse import urlencode, urlparse
+
+from PIL import Image
+import django
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.db.models import Count
+from django.test.utils import CaptureQueriesContext, override_settings
+from rest_framework.test import APIClient
+
+from recipes.models import (
+    Favorite,
+    Ingredient,
+    Recipe,
+    RecipesInShoppingList,
+    Tag,
+)
+from users.models import Subscription, User
+
+
+def percentile(values, percent):
+    """Функция получения перцентиля выборки методом ближайшего ранга."""
+    values = sorted(values)
+    return values[max(math.ceil(len(values) * percent / 100) - 1, 0)]
+
+
+class Command(BaseCommand):
+    """
+    Класс для измерения времени ответа и количества запросов к базе
+    данных основных эндпоинтов API. Запросы выполняются тестовым
+    клиентом Django в текущем процессе, без сети; созданные во время
+    измерений рецепты откатываются.
+    """
+    help = (
+        'Измеряет p50/p95 времени ответа и количество запросов к базе '
+        'данных эндпоинтов API и сохраняет отчет в JSON'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--requests', type=int, default=50,
+            help='Количество измеряемых запросов каждого сценария',
+        )
+        parser.add_argument(
+            '--warmup', type=int, default=5,
+            help='Количество предварительных запросов без измерения',
+        )
+        parser.add_argument(
+            '--user',
+            help='Email пользователя, от имени которого выполняются '
+                 'запросы (по умолчанию — с самым большим списком покупок)',
+        )
+        parser.add_argument(
+            '--only', nargs='+', metavar='SCENARIO',
+            help='Выполнить только указанные сценарии',
+        )
+        parser.add_argument(
+            '--output', type=Path,
+            help='Файл для сохранения отчета в JSON',
+        )
+        parser.add_argument(
+            '--compare', type=Path,
+            help='Отчет предыдущего запуска для сравнения',
+        )
+
+    def handle(self, *args, **options):
+        if options['requests'] < 1 or options['warmup'] < 0:
+            raise CommandError('Неверное количество запросов')
+        self.user = self.get_user(options['user'])
+        scenarios = self.get_scenarios()
+        if options['only']:
+            unknown = set(options['only']) - scenarios.keys()
+            if unknown:
+                raise CommandError(
+                    f'Неизвестные сценарии: {", ".join(sorted(unknown))}'
+                )
+            scenarios = {
+                name: scenario for name, scenario in scenarios.items()
+                if name in options['only']
+            }
+        with override_settings(REST_FRAMEWORK=self.get_rest_settings()):
+            report = {
+                'meta': self.get_meta(options),
+                'scenarios': {
+                    name: self.measure(
+                        name, *scenario,
+                        options['requests'], options['warmup'],
+                    )
+                    for name, scenario in scenarios.items()
+                },
+            }
+        self.write_report(report)
+        if options['compare']:
+            self.compare(report, json.loads(options['compare'].read_text()))
+        if options['output']:
+            options['output'].write_text(
+                json.dumps(report, ensure_ascii=False, indent=2)
+            )
+            self.stdout.write(self.style.SUCCESS(
+                f'Отчет сохранен в {options["output"]}'
+            ))
+
+    def get_rest_settings(self):
+        """
+        Функция получения настроек DRF для замера: ограничения частоты
+        запросов остаются включенными, но не срабатывают.
+        """
+        rest_settings = settings.REST_FRAMEWORK
+        return {
+            **rest_settings,
+            'DEFAULT_THROTTLE_RATES': dict.fromkeys(
+                rest_settings.get('DEFAULT_THROTTLE_RATES', ()),
+                f'{10 ** 9}/minute',
+            ),
+        }
+
+    def get_user(self, email):
+        """Функция выбора пользователя для авторизованных запросов."""
+        users = User.objects.all()
+        if email:
+            users = users.filter(email=email)
+        user = users.annotate(
+            cart=Count('shopping_lists')
+        ).order_by('-cart', 'id').first()
+        if user is None:
+            raise CommandError(
+                'Пользователь не найден, создайте данные командой '
+                'generate_fixtures'
+            )
+        return user
+
+    def get_scenarios(self):
+        """
+        Функция получения сценариев:
+        {название: (метод, адрес, авторизован ли клиент, данные запроса)}.
+        """
+        author_id = User.objects.order_by('-recipes_count').values_list(
+            'id', flat=True
+        ).first()
+        search = Ingredient.objects.filter(
+            recipe_ingredients__isnull=False
+        ).values_list('name', flat=True).first() or ''
+        pantry = ','.join(map(str, Ingredient.objects.filter(
+            recipe_ingredients__isnull=False
+        ).values_list('id', flat=True).distinct()[:10]))
+        tags = '&'.join(
+            f'tags={slug}'
+            for slug in Tag.objects.values_list('slug', flat=True)[:2]
+        )
+        return {
+            'recipes_anonymous': ('get', '/api/recipes/', False, None),
+            'recipes': ('get', '/api/recipes/', True, None),
+            'recipes_cursor': ('get', '/api/recipes/?cursor=', True, None),
+            'recipes_filter_tags': (
+                'get', f'/api/recipes/?{tags}', True, None
+            ),
+            'recipes_filter_author': (
+                'get', f'/api/recipes/?author={author_id}', True, None
+            ),
+            'recipes_filter_favorited': (
+                'get', '/api/recipes/?is_favorited=1', True, None
+            ),
+            'recipes_filter_shopping_cart': (
+                'get', '/api/recipes/?is_in_shopping_cart=1', True, None
+            ),
+            'recipes_search': (
+                'get', f'/api/recipes/?{urlencode({"search": search})}',
+                True, None,
+            ),
+            'recipes_match': (
+                'get',
+                f'/api/recipes/match/?ingredients={pantry}&max_missing=3',
+                True, None,
+            ),
+            'subscriptions': (
+                'get', '/api/users/subscriptions/?recipes_limit=3',
+                True, None,
+            ),
+            'download_shopping_cart': (
+                'get', '/api/recipes/download_shopping_cart/', True, None
+            ),
+            'recipe_create': (
+                'post', '/api/recipes/', True, self.get_recipe_data()
+            ),
+        }
+
+    def get_recipe_data(self):
+        """Функция получения данных для создания рецепта."""
+        buffer = io.BytesIO()
+        Image.new('RGB', (640, 480), (60, 120, 200)).save(buffer, 'PNG')
+        image = base64.b64encode(buffer.getvalue()).decode()
+        ingredient_ids = Ingredient.objects.values_list('id', flat=True)
+        return {
+            'name': 'Рецепт для замера',
+            'text': 'Описание рецепта для замера',
+            'cooking_time': 30,
+            'image': f'data:image/png;base64,{image}',
+            'tags': list(Tag.objects.values_list('id', flat=True)[:2]),
+            'ingredients': [
+                {'id': ingredient_id, 'amount': 100}
+                for ingredient_id in ingredient_ids[:8]
+            ],
+        }
+
+    def get_meta(self, options):
+        """Функция получения сведений о запуске и объеме данных."""
+        return {
+            'created': datetime.now(timezone.utc).isoformat(),
+            'django': django.get_version(),
+            'database': connection.vendor,
+            'cache': settings.CACHES['default']['BACKEND'],
+            'requests': options['requests'],
+            'warmup': options['warmup'],
+            'user': self.user.pk,
+            'data': {
+                model._meta.label: model.objects.count()
+                for model in (
+                    User, Recipe, Ingredient, Tag, Favorite,
+                    RecipesInShoppingList, Subscription,
+                )
+            },
+        }
+
+    def request(self, client, method, url, data):
+        """
+        Функция выполнения запроса с чтением всего ответа.
+        Изменения базы данных при создании рецепта откатываются,
+        а сохраненное изображение удаляется.
+        """
+        if method == 'get':
+            response = client.get(url)
+            if response.streaming:
+                b''.join(response.streaming_content)
+            return response
+        with transaction.atomic():
+            response = getattr(client, method)(url, data, format='json')
+            transaction.set_rollback(True)
+        if response.status_code < 400:
+            path = urlparse(response.json()['image']).path
+            Recipe._meta.get_field('image').storage.delete(
+                path[len(settings.MEDIA_URL):]
+            )
+        return response
+
+    def measure(self, name, method, url, authenticated, data, count, warmup):
+        """Функция замера времени ответа и количества запросов сценария."""
+        client = APIClient()
+        if authenticated:
+            client.force_authenticate(self.user)
+        for _ in range(warmup):
+            self.request(client, method, url, data)
+        timings = []
+        queries = []
+        for _ in range(count):
+            with CaptureQueriesContext(connection) as context:
+                started = time.perf_counter()
+                response = self.request(client, method, url, data)
+                timings.append((time.perf_counter() - started) * 1000)
+            if response.status_code >= 400:
+                raise CommandError(
+                    f'{name}: {method.upper()} {url} вернул '
+                    f'{response.status_code}'
+                )
+            queries.append(len(context.captured_queries))
+        return {
+            'method': method.upper(),
+            'url': url,
+            'authenticated': authenticated,
+            'status': response.status_code,
+            'p50_ms': round(percentile(timings, 50), 2),
+            'p95_ms': round(percentile(timings, 95), 2),
+            'mean_ms': round(statistics.mean(timings), 2),
+            'max_ms': round(max(timings), 2),
+            'queries': max(queries),
+        }
+
+    def write_report(self, report):
+        self.stdout.write(
+            f'{"сценарий":<30}{"p50, мс":>10}{"p95, мс":>10}{"запросов":>10}'
+        )
+        for name, result in report['scenarios'].items():
+            self.stdout.write(
+                f'{name:<30}{result["p50_ms"]:>10.2f}'
+                f'{result["p95_ms"]:>10.2f}{result["queries"]:>10}'
+            )
+
+    def compare(self, report, previous):
+        """Функция вывода изменений относительно предыдущего отчета."""
+        self.stdout.write('\nИзменения относительно предыдущего отчета:')
+        for name, result in report['scenarios'].items():
+            old = previous.get('scenarios', {}).get(name)
+            if old is None:
+                self.stdout.write(f'{name:<30}новый сценарий')
+                continue
+            change = (
+                (result['p95_ms'] - old['p95_ms']) / old['p95_ms'] * 100
+                if old['p95_ms'] else 0
+            )
+            self.stdout.write(
+                f'{name:<30}p95 {old["p95_ms"]:.2f} -> '
+                f'{result["p95_ms"]:.2f} мс ({change:+.0f}%), '
+                f'запросов {old["queries"]} -> {result["queries"]}'
+            )
@@ -0,0 +1,192 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+import json
+from pathlib import Path
+import time
+from urllib.parse import urlencode
+
+import django
+from django.conf import settings
+from django.core.management.base import CommandError
+from django.db import connection
+from django.test import AsyncClient, Client
+from django.test.utils import override_settings
+from rest_framework.authtoken.models import Token
+
+from api.management.commands.benchmark_api import (
+    Command as BenchmarkCommand,
+    percentile,
+)
+from recipes.models import Ingredient, Recipe
+
+
+class Command(BenchmarkCommand):
+    """
+    Класс для сравнения пропускной способности синхронных представлений
+    и асинхронного пути чтения при большом числе одновременных запросов.
+    Синхронные запросы выполняются в пуле из concurrency потоков, как
+    в WSGI-сервере с потоками; асинхронные — в одном цикле событий,
+    как в воркере uvicorn.
+    """
+    help = (
+        'Сравнивает запросы в секунду и p50/p95 времени ответа ленты '
+        'рецептов, рецепта и справочников в синхронном и асинхронном API'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--requests', type=int, default=500,
+            help='Количество запросов каждого сценария',
+        )
+        parser.add_argument(
+            '--concurrency', type=int, default=50,
+            help='Количество одновременных запросов',
+        )
+        parser.add_argument(
+            '--user',
+            help='Email пользователя, от имени которого выполняются '
+                 'запросы (по умолчанию — с самым большим списком покупок)',
+        )
+        parser.add_argument(
+            '--output', type=Path,
+            help='Файл для сохранения отчета в JSON',
+        )
+
+    def handle(self, *args, **options):
+        if options['requests'] < 1 or options['concurrency'] < 1:
+            raise CommandError('Неверное количество запросов')
+        self.user = self.get_user(options['user'])
+        token, created = Token.objects.get_or_create(user=self.user)
+        self.token = token.key
+        try:
+            with override_settings(REST_FRAMEWORK=self.get_rest_settings()):
+                report = {
+                    'meta': {
+                        'created': datetime.now(timezone.utc).isoformat(),
+                        'django': django.get_version(),
+                        'database': connection.vendor,
+                        'cache': settings.CACHES['default']['BACKEND'],
+                        'requests': options['requests'],
+                        'concurrency': options['concurrency'],
+                        'user': self.user.pk,
+                    },
+                    'scenarios': {
+                        name: self.measure(
+                            name, url, options['requests'],
+                            options['concurrency'],
+                        )
+                        for name, url in self.get_scenarios().items()
+                    },
+                }
+        finally:
+            if created:
+                token.delete()
+        self.write_report(report)
+        if options['output']:
+            options['output'].write_text(
+                json.dumps(report, ensure_ascii=False, indent=2)
+            )
+            self.stdout.write(self.style.SUCCESS(
+                f'Отчет сохранен в {options["output"]}'
+            ))
+
+    def get_scenarios(self):
+        """
+        Функция получения сценариев: {название: адрес синхронного API}.
+        Адрес асинхронного API получается заменой /api/ на /api/async/.
+        """
+        recipe_id = Recipe.objects.values_list('id', flat=True).first()
+        search = Ingredient.objects.values_list('name', flat=True).first()
+        if recipe_id is None or search is None:
+            raise CommandError(
+                'Нет рецептов или ингредиентов, создайте данные командой '
+                'generate_fixtures'
+            )
+        return {
+            'recipes': '/api/recipes/',
+            'recipe': f'/api/recipes/{recipe_id}/',
+            'tags': '/api/tags/',
+            'ingredients': (
+                f'/api/ingredients/?{urlencode({"name": search[:3]})}'
+            ),
+        }
+
+    def measure(self, name, url, count, concurrency):
+        async_url = url.replace('/api/', '/api/async/', 1)
+        return {
+            'url': url,
+            'sync': self.summarize(name, url, self.measure_sync(
+                url, count, concurrency
+            )),
+            'async': self.summarize(name, async_url, asyncio.run(
+                self.measure_async(async_url, count, concurrency)
+            )),
+        }
+
+    def measure_sync(self, url, count, concurrency):
+        """
+        Функция замера синхронного API; у каждого потока свое
+        соединение с базой данных.
+        """
+        client = Client(HTTP_AUTHORIZATION=f'Token {self.token}')
+
+        def request(_):
+            started = time.perf_counter()
+            response = client.get(url)
+            return response.status_code, time.perf_counter() - started
+
+        with ThreadPoolExecutor(concurrency) as executor:
+            started = time.perf_counter()
+            results = list(executor.map(request, range(count)))
+            elapsed = time.perf_counter() - started
+        return results, elapsed
+
+    async def measure_async(self, url, count, concurrency):
+        """
+        Функция замера асинхронного API: не больше concurrency
+        запросов одновременно в одном цикле событий.
+        """
+        client = AsyncClient()
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async def request():
+            async with semaphore:
+                started = time.perf_counter()
+                response = await client.get(
+                    url, authorization=f'Token {self.token}'
+                )
+                return response.status_code, time.perf_counter() - started
+
+        started = time.perf_counter()
+        results = await asyncio.gather(*(request() for _ in range(count)))
+        return results, time.perf_counter() - started
+
+    def summarize(self, name, url, measurement):
+        """Функция проверки ответов и подсчета показателей замера."""
+        results, elapsed = measurement
+        errors = [status for status, _ in results if status >= 400]
+        if errors:
+            raise CommandError(
+                f'{name}: GET {url} вернул {errors[0]} '
+                f'({len(errors)} из {len(results)} запросов)'
+            )
+        timings = [duration * 1000 for _, duration in results]
+        return {
+            'rps': round(len(results) / elapsed, 1),
+            'p50_ms': round(percentile(timings, 50), 2),
+            'p95_ms': round(percentile(timings, 95), 2),
+        }
+
+    def write_report(self, report):
+        self.stdout.write(
+            f'{"сценарий":<15}{"режим":<8}{"запросов/с":>12}'
+            f'{"p50, мс":>10}{"p95, мс":>10}'
+        )
+        for name, result in report['scenarios'].items():
+            for mode in ('sync', 'async'):
+                self.stdout.write(
+                    f'{name:<15}{mode:<8}{result[mode]["rps"]:>12.1f}'
+                    f'{result[mode]["p50_ms"]:>10.2f}'
+                    f'{result[mode]["p95_ms"]:>10.2f}'
+                )
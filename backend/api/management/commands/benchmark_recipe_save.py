@@ -0,0 +1,182 @@
+import base64
+import io
+import json
+from pathlib import Path
+import statistics
+import time
+
+from PIL import Image
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIRequestFactory
+
+from api.serializers.recipes import RecipeSerializer
+from recipes.models import Ingredient, Recipe, Tag
+from users.models import User
+
+
+WRITE_STATEMENTS = ('INSERT', 'UPDATE', 'DELETE')
+
+
+class Command(BaseCommand):
+    """
+    Класс для подсчета SQL-запросов при сохранении рецепта через
+    RecipeSerializer: создание и изменение рецепта с большим числом
+    ингредиентов. Все изменения откатываются, сохраненные изображения
+    удаляются.
+    """
+    help = (
+        'Считает запросы INSERT/UPDATE/DELETE и время создания '
+        'и изменения рецепта с большим числом ингредиентов'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--ingredients', type=int, default=40,
+            help='Количество ингредиентов в рецепте',
+        )
+        parser.add_argument(
+            '--repeat', type=int, default=5,
+            help='Количество повторов каждого сценария',
+        )
+        parser.add_argument(
+            '--output', type=Path,
+            help='Файл для сохранения отчета в JSON',
+        )
+
+    def handle(self, *args, **options):
+        count = options['ingredients']
+        if count < 10 or options['repeat'] < 1:
+            raise CommandError(
+                'Нужно не меньше 10 ингредиентов и одного повтора'
+            )
+        self.user = User.objects.order_by('id').first()
+        self.ingredient_ids = list(
+            Ingredient.objects.order_by('id').values_list('id', flat=True)
+            [:count + 1]
+        )
+        self.tag_ids = list(
+            Tag.objects.order_by('id').values_list('id', flat=True)[:3]
+        )
+        if (
+            self.user is None or len(self.ingredient_ids) <= count
+            or len(self.tag_ids) < 3
+        ):
+            raise CommandError(
+                'Нужны пользователь, теги и ингредиенты: загрузите их '
+                'командой import_csv и создайте пользователя'
+            )
+        self.image = self.get_image()
+        report = {
+            name: self.measure(scenario, count, options['repeat'])
+            for name, scenario in (
+                ('create', self.create),
+                ('update_changed', self.update_changed),
+                ('update_unchanged', self.update_unchanged),
+            )
+        }
+        self.stdout.write(
+            f'{"сценарий":<20}{"изменений":>10}{"запросов":>10}'
+            f'{"мс":>10}'
+        )
+        for name, result in report.items():
+            self.stdout.write(
+                f'{name:<20}{result["writes"]:>10}{result["queries"]:>10}'
+                f'{result["median_ms"]:>10.2f}'
+            )
+        if options['output']:
+            options['output'].write_text(
+                json.dumps(report, ensure_ascii=False, indent=2)
+            )
+            self.stdout.write(self.style.SUCCESS(
+                f'Отчет сохранен в {options["output"]}'
+            ))
+
+    def get_image(self):
+        buffer = io.BytesIO()
+        Image.new('RGB', (64, 64), (60, 120, 200)).save(buffer, 'PNG')
+        image = base64.b64encode(buffer.getvalue()).decode()
+        return f'data:image/png;base64,{image}'
+
+    def get_data(self, ingredient_ids, amounts, tag_ids):
+        return {
+            'name': 'Рецепт для замера',
+            'text': 'Описание рецепта для замера',
+            'cooking_time': 30,
+            'tags': tag_ids,
+            'ingredients': [
+                {'id': ingredient_id, 'amount': amount}
+                for ingredient_id, amount in zip(ingredient_ids, amounts)
+            ],
+        }
+
+    def save(self, data, instance=None):
+        """Функция сохранения рецепта; проверка данных не замеряется."""
+        request = APIRequestFactory().post('/api/recipes/')
+        request.user = self.user
+        serializer = RecipeSerializer(
+            instance, data=data, partial=instance is not None,
+            context={'request': request},
+        )
+        serializer.is_valid(raise_exception=True)
+        with CaptureQueriesContext(connection) as context:
+            started = time.perf_counter()
+            recipe = serializer.save(author=self.user)
+            duration = time.perf_counter() - started
+        request.close()
+        return recipe, context.captured_queries, duration
+
+    def create(self, count):
+        data = self.get_data(
+            self.ingredient_ids[:count], [100] * count, self.tag_ids[:2]
+        )
+        data['image'] = self.image
+        return self.save(data)
+
+    def update_changed(self, count):
+        """
+        Изменение рецепта: 5 ингредиентов удалены, у 8 изменено
+        количество, 1 добавлен, изменены теги.
+        """
+        recipe, _, _ = self.create(count)
+        recipe = Recipe.objects.get(pk=recipe.pk)
+        ingredient_ids = self.ingredient_ids[5:count + 1]
+        amounts = [200] * 8 + [100] * (len(ingredient_ids) - 8)
+        return self.save(
+            self.get_data(ingredient_ids, amounts, self.tag_ids[1:]), recipe
+        )
+
+    def update_unchanged(self, count):
+        recipe, _, _ = self.create(count)
+        recipe = Recipe.objects.get(pk=recipe.pk)
+        return self.save(self.get_data(
+            self.ingredient_ids[:count], [100] * count, self.tag_ids[:2]
+        ), recipe)
+
+    def measure(self, scenario, count, repeat):
+        """
+        Функция замера сценария: количество изменяющих запросов, всех
+        запросов и медианное время сохранения.
+        """
+        writes = queries = 0
+        timings = []
+        storage = Recipe._meta.get_field('image').storage
+        for _ in range(repeat):
+            with transaction.atomic():
+                recipe, captured, duration = scenario(count)
+                image = recipe.image.name
+                transaction.set_rollback(True)
+            storage.delete(image)
+            writes = sum(
+                query['sql'].lstrip().upper().startswith(WRITE_STATEMENTS)
+                for query in captured
+            )
+            queries = len(captured)
+            timings.append(duration * 1000)
+        return {
+            'ingredients': count,
+            'writes': writes,
+            'queries': queries,
+            'median_ms': round(statistics.median(timings), 2),
+        }
@@ -0,0 +1,118 @@
+import json
+from pathlib import Path
+import statistics
+import time
+
+from django.contrib.auth.models import AnonymousUser
+from django.core.management.base import BaseCommand, CommandError
+from rest_framework import serializers
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+
+from api.serializers.recipes import ReadRecipeSerializer
+from recipes.models import Recipe
+from users.models import User
+
+
+PAGE_SIZES = (4, 50, 200)
+
+
+class Command(BaseCommand):
+    """
+    Класс для сравнения времени сериализации страницы рецептов полями
+    DRF (ListSerializer с ReadRecipeSerializer) и списковым
+    сериализатором ленты (ReadRecipeListSerializer). Рецепты
+    загружаются заранее, замеряется только сериализация; ответы
+    обоих способов сравниваются.
+    """
+    help = (
+        'Сравнивает время сериализации страниц ленты рецептов полями DRF '
+        'и списковым сериализатором'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--sizes', type=int, nargs='+', default=PAGE_SIZES,
+            help='Размеры страниц',
+        )
+        parser.add_argument(
+            '--repeat', type=int, default=50,
+            help='Количество повторов каждого замера',
+        )
+        parser.add_argument(
+            '--output', type=Path,
+            help='Файл для сохранения отчета в JSON',
+        )
+
+    def handle(self, *args, **options):
+        if options['repeat'] < 1 or min(options['sizes']) < 1:
+            raise CommandError('Неверное количество повторов или рецептов')
+        user = User.objects.order_by('id').first()
+        if user is None or not Recipe.objects.exists():
+            raise CommandError(
+                'Нет рецептов, создайте данные командой generate_fixtures'
+            )
+        report = {}
+        for mode, reader in (('anonymous', AnonymousUser()), ('user', user)):
+            for size in options['sizes']:
+                recipes = list(Recipe.objects.for_read(reader)[:size])
+                fields, fast = (
+                    self.measure(
+                        serializer, recipes, reader, options['repeat']
+                    )
+                    for serializer in (self.serialize_fields, self.serialize)
+                )
+                if fields['data'] != fast['data']:
+                    raise CommandError(
+                        f'{mode}, {size} рецептов: ответы сериализаторов '
+                        f'различаются'
+                    )
+                report[f'{mode}_{size}'] = {
+                    'recipes': len(recipes),
+                    'fields_ms': fields['median_ms'],
+                    'list_ms': fast['median_ms'],
+                }
+        self.stdout.write(
+            f'{"замер":<20}{"рецептов":>10}{"поля DRF, мс":>15}'
+            f'{"список, мс":>15}'
+        )
+        for name, result in report.items():
+            self.stdout.write(
+                f'{name:<20}{result["recipes"]:>10}'
+                f'{result["fields_ms"]:>15.2f}{result["list_ms"]:>15.2f}'
+            )
+        if options['output']:
+            options['output'].write_text(
+                json.dumps(report, ensure_ascii=False, indent=2)
+            )
+            self.stdout.write(self.style.SUCCESS(
+                f'Отчет сохранен в {options["output"]}'
+            ))
+
+    def get_context(self, reader):
+        """Функция получения контекста ленты для нового запроса."""
+        request = Request(APIRequestFactory().get('/api/recipes/'))
+        request.user = reader
+        return {'request': request, 'thumbnail_size': 'medium'}
+
+    def serialize_fields(self, recipes, reader):
+        return serializers.ListSerializer(
+            recipes, child=ReadRecipeSerializer(),
+            context=self.get_context(reader),
+        ).data
+
+    def serialize(self, recipes, reader):
+        return ReadRecipeSerializer(
+            recipes, many=True, context=self.get_context(reader)
+        ).data
+
+    def measure(self, serialize, recipes, reader, repeat):
+        timings = []
+        for _ in range(repeat):
+            started = time.perf_counter()
+            data = serialize(recipes, reader)
+            timings.append((time.perf_counter() - started) * 1000)
+        return {
+            'data': json.loads(json.dumps(data)),
+            'median_ms': round(statistics.median(timings), 2),
+        }
@@ -0,0 +1,241 @@
+from collections import Counter, defaultdict
+from contextlib import contextmanager
+from contextvars import ContextVar
+import threading
+import time
+
+
+DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+
+_current = ContextVar('request_metrics', default=None)
+
+
+class RequestMetrics:
+    """
+    Замеры одного запроса: количество и время SQL-запросов,
+    время сериализации и работы представления.
+    """
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.view_started = None
+        self.finished = None
+        self.statements = Counter()
+        self.durations = defaultdict(float)
+        self._depth = Counter()
+        self._lock = threading.Lock()
+
+    @property
+    def queries(self):
+        return sum(self.statements.values())
+
+    @property
+    def duration(self):
+        return (self.finished or time.perf_counter()) - self.started
+
+    @property
+    def view_duration(self):
+        if self.view_started is None:
+            return 0
+        return (self.finished or time.perf_counter()) - self.view_started
+
+    def record_query(self, execute, sql, params, many, context):
+        """
+        Обертка выполнения SQL-запроса (connection.execute_wrapper).
+        Запросы одного HTTP-запроса могут выполняться в нескольких
+        потоках одновременно, поэтому учет идет под блокировкой.
+        """
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            duration = time.perf_counter() - started
+            with self._lock:
+                self.durations['db'] += duration
+                self.statements[sql] += 1
+
+    @contextmanager
+    def timer(self, name):
+        """Замер времени этапа; вложенные замеры не суммируются."""
+        self._depth[name] += 1
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self._depth[name] -= 1
+            if not self._depth[name]:
+                self.durations[name] += time.perf_counter() - started
+
+    def finish(self):
+        self.finished = time.perf_counter()
+
+    def repeated_statements(self, limit):
+        """Функция получения самых частых повторяющихся SQL-запросов."""
+        return [
+            (sql, count)
+            for sql, count in self.statements.most_common(limit)
+            if count > 1
+        ]
+
+    def server_timing(self):
+        """Функция получения значения заголовка Server-Timing."""
+        return ', '.join((
+            f'db;desc="{self.queries} queries";'
+            f'dur={self.durations["db"] * 1000:.1f}',
+            f'serializer;dur={self.durations["serializer"] * 1000:.1f}',
+            f'view;dur={self.view_duration * 1000:.1f}',
+            f'total;dur={self.duration * 1000:.1f}',
+        ))
+
+
+def start_request():
+    """Функция начала замеров запроса в текущем контексте."""
+    metrics = RequestMetrics()
+    return metrics, _current.set(metrics)
+
+
+def finish_request(token):
+    """Функция окончания замеров запроса в текущем контексте."""
+    _current.reset(token)
+
+
+def get_current():
+    """Функция получения замеров текущего запроса."""
+    return _current.get()
+
+
+def record_current_query(execute, sql, params, many, context):
+    """
+    Обертка выполнения SQL-запроса, подключаемая к каждому соединению:
+    запрос учитывается в замерах текущего запроса, в том числе
+    из потоков sync_to_async, которым передается контекст.
+    """
+    metrics = _current.get()
+    if metrics is None:
+        return execute(sql, params, many, context)
+    return metrics.record_query(execute, sql, params, many, context)
+
+
+@contextmanager
+def timer(name):
+    """Замер этапа текущего запроса; вне запроса ничего не делает."""
+    metrics = _current.get()
+    if metrics is None:
+        yield
+        return
+    with metrics.timer(name):
+        yield
+
+
+class TimedRepresentationMixin:
+    """
+    Миксин сериализатора, учитывающий время сериализации запроса.
+    Замеряются и data, и to_representation: свой to_representation
+    сериализатора перекрывает миксин, а элементы стандартного
+    ListSerializer сериализуются без обращения к data.
+    """
+
+    @property
+    def data(self):
+        with timer('serializer'):
+            return super().data
+
+    def to_representation(self, instance):
+        with timer('serializer'):
+            return super().to_representation(instance)
+
+
+class MetricsRegistry:
+    """
+    Накопленные метрики запросов процесса в формате Prometheus.
+    Каждый процесс gunicorn ведет свои значения.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._requests = Counter()
+        self._series = defaultdict(lambda: {
+            'buckets': [0] * len(DURATION_BUCKETS),
+            'count': 0,
+            'duration': 0.0,
+            'queries': 0,
+            'db': 0.0,
+            'serializer': 0.0,
+            'view': 0.0,
+        })
+
+    def observe(self, method, view, status, metrics):
+        """Функция учета завершенного запроса."""
+        duration = metrics.duration
+        with self._lock:
+            self._requests[method, view, status] += 1
+            series = self._series[method, view]
+            for position, bound in enumerate(DURATION_BUCKETS):
+                if duration <= bound:
+                    series['buckets'][position] += 1
+            series['count'] += 1
+            series['duration'] += duration
+            series['queries'] += metrics.queries
+            series['db'] += metrics.durations['db']
+            series['serializer'] += metrics.durations['serializer']
+            series['view'] += metrics.view_duration
+
+    def render(self):
+        """Функция выгрузки метрик в текстовом формате Prometheus."""
+        with self._lock:
+            requests = sorted(self._requests.items())
+            series = [
+                (key, {**value, 'buckets': list(value['buckets'])})
+                for key, value in sorted(self._series.items())
+            ]
+        lines = [
+            '# HELP http_requests_total Количество запросов.',
+            '# TYPE http_requests_total counter',
+        ]
+        lines.extend(
+            f'http_requests_total{{method="{method}",view="{view}",'
+            f'status="{status}"}} {count}'
+            for (method, view, status), count in requests
+        )
+        lines.extend((
+            '# HELP http_request_duration_seconds Время ответа.',
+            '# TYPE http_request_duration_seconds histogram',
+        ))
+        for (method, view), value in series:
+            labels = f'method="{method}",view="{view}"'
+            for bound, count in zip(DURATION_BUCKETS, value['buckets']):
+                lines.append(
+                    f'http_request_duration_seconds_bucket'
+                    f'{{{labels},le="{bound}"}} {count}'
+                )
+            lines.extend((
+                f'http_request_duration_seconds_bucket'
+                f'{{{labels},le="+Inf"}} {value["count"]}',
+                f'http_request_duration_seconds_sum{{{labels}}} '
+                f'{value["duration"]:.6f}',
+                f'http_request_duration_seconds_count{{{labels}}} '
+                f'{value["count"]}',
+            ))
+        for name, key, kind, description in (
+            ('http_request_db_queries_total', 'queries', 'counter',
+             'Количество SQL-запросов.'),
+            ('http_request_db_seconds_total', 'db', 'counter',
+             'Время выполнения SQL-запросов.'),
+            ('http_request_serializer_seconds_total', 'serializer',
+             'counter', 'Время сериализации.'),
+            ('http_request_view_seconds_total', 'view', 'counter',
+             'Время работы представления.'),
+        ):
+            lines.extend((
+                f'# HELP {name} {description}',
+                f'# TYPE {name} {kind}',
+            ))
+            lines.extend(
+                f'{name}{{method="{method}",view="{view}"}} '
+                f'{value[key]:.6f}'
+                for (method, view), value in series
+            )
+        return '\n'.join(lines) + '\n'
+
+
+registry = MetricsRegistry()
@@ -0,0 +1,90 @@
+import asyncio
+import logging
+import time
+
+from django.conf import settings
+
+from api.metrics import finish_request, get_current, registry, start_request
+
+
+logger = logging.getLogger(__name__)
+
+
+class RequestMetricsMiddleware:
+    """
+    Middleware замеров запросов: количество и время SQL-запросов,
+    время сериализации и работы представления.
+
+    Замеры передаются в заголовке Server-Timing и накапливаются
+    для выгрузки в формате Prometheus. Медленные запросы и запросы
+    с большим количеством SQL записываются в журнал вместе с самыми
+    частыми повторяющимися SQL-запросами. SQL-запросы потоковых
+    ответов, выполняемые после возврата ответа, не учитываются.
+    Работает и в синхронном (WSGI), и в асинхронном (ASGI) режиме.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if asyncio.iscoroutinefunction(get_response):
+            self._is_coroutine = asyncio.coroutines._is_coroutine
+
+    def __call__(self, request):
+        if asyncio.iscoroutinefunction(self.get_response):
+            return self.__acall__(request)
+        metrics, token = start_request()
+        try:
+            response = self.get_response(request)
+        finally:
+            finish_request(token)
+        return self.process_metrics(request, response, metrics)
+
+    async def __acall__(self, request):
+        metrics, token = start_request()
+        try:
+            response = await self.get_response(request)
+        finally:
+            finish_request(token)
+        return self.process_metrics(request, response, metrics)
+
+    def process_metrics(self, request, response, metrics):
+        """Функция учета замеров завершенного запроса."""
+        metrics.finish()
+        response['Server-Timing'] = metrics.server_timing()
+        view = getattr(request.resolver_match, 'view_name', None)
+        registry.observe(
+            request.method, view or 'unmatched', response.status_code, metrics
+        )
+        if (
+            metrics.duration * 1000 > settings.SLOW_REQUEST_MS
+            or metrics.queries > settings.SLOW_REQUEST_QUERIES
+        ):
+            self.log_slow_request(request, response, metrics)
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        metrics = get_current()
+        if metrics is not None:
+            metrics.view_started = time.perf_counter()
+
+    def log_slow_request(self, request, response, metrics):
+        """Функция записи медленного запроса в журнал."""
+        repeated = ''.join(
+            f'\n  {count} x {sql[:300]}'
+            for sql, count in metrics.repeated_statements(
+                settings.SLOW_REQUEST_TOP_STATEMENTS
+            )
+        )
+        logger.warning(
+            'Медленный запрос %s %s: %s, %.1f мс, SQL-запросов %s '
+            '(%.1f мс), сериализация %.1f мс%s',
+            request.method,
+            request.get_full_path(),
+            response.status_code,
+            metrics.duration * 1000,
+            metrics.queries,
+            metrics.durations['db'] * 1000,
+            metrics.durations['serializer'] * 1000,
+            repeated,
+        )
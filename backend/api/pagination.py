@@ -1,8 +1,130 @@
+import base64
+import binascii
+import json
+
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.db.models import Q
 from foodgram_backend.settings import PAGE_SIZE
+from rest_framework.exceptions import NotFound, ValidationError
 from rest_framework.pagination import PageNumberPagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
 
 
 class CustomPageNumberPagination(PageNumberPagination):
     """Класс кастомной пагинации."""
     page_size = PAGE_SIZE
     page_size_query_param = 'limit'
+
+
+class KeysetPagination(CustomPageNumberPagination):
+    """
+    Пагинация по номеру страницы с дополнительным режимом курсора.
+
+    Если в запросе списка передан параметр cursor (в том числе пустой),
+    страница выбирается по значениям полей ordering последнего объекта
+    предыдущей страницы, без OFFSET и без подсчета общего количества.
+    Курсор нельзя передать вместе с параметрами cursor_excluded_params,
+    которые меняют порядок выдачи (например, поиск по релевантности).
+    """
+    cursor_query_param = 'cursor'
+    invalid_cursor_message = 'Неверный курсор.'
+    excluded_param_message = 'Курсор нельзя использовать с параметром {}.'
+    cursor_excluded_params = ()
+    ordering = ()
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.use_cursor = (
+            self.cursor_query_param in request.query_params
+            and getattr(view, 'action', None) == 'list'
+        )
+        if not self.use_cursor:
+            return super().paginate_queryset(queryset, request, view)
+        for param in self.cursor_excluded_params:
+            if request.query_params.get(param, '').strip():
+                raise ValidationError({
+                    self.cursor_query_param: [
+                        self.excluded_param_message.format(param)
+                    ],
+                })
+        self.request = request
+        page_size = self.get_page_size(request)
+        if not page_size:
+            return None
+        queryset = queryset.order_by(*self.ordering)
+        cursor = request.query_params.get(self.cursor_query_param)
+        if cursor:
+            condition = self.get_cursor_filter(self.decode_cursor(cursor))
+            try:
+                queryset = queryset.filter(condition)
+            except (DjangoValidationError, TypeError, ValueError):
+                raise NotFound(self.invalid_cursor_message)
+        results = list(queryset[:page_size + 1])
+        self.has_next = len(results) > page_size
+        self.page = results[:page_size]
+        return self.page
+
+    def get_paginated_response(self, data):
+        if not self.use_cursor:
+            return super().get_paginated_response(data)
+        return Response({
+            'next': self.get_next_cursor_link(),
+            'results': data,
+        })
+
+    def get_next_cursor_link(self):
+        """Функция получения ссылки на следующую страницу курсора."""
+        if not self.has_next:
+            return None
+        return replace_query_param(
+            self.request.build_absolute_uri(),
+            self.cursor_query_param,
+            self.encode_cursor(self.page[-1]),
+        )
+
+    def get_cursor_filter(self, values):
+        """Функция построения условия выборки объектов после курсора."""
+        condition = Q()
+        for index, field in enumerate(self.ordering):
+            lookup = 'lt' if field.startswith('-') else 'gt'
+            step = Q(**{f'{field.lstrip("-")}__{lookup}': values[index]})
+            for previous, value in zip(self.ordering[:index], values):
+                step &= Q(**{previous.lstrip('-'): value})
+            condition |= step
+        return condition
+
+    def encode_cursor(self, obj):
+        """Функция кодирования курсора из полей объекта."""
+        values = []
+        for field in self.ordering:
+            value = getattr(obj, field.lstrip('-'))
+            if hasattr(value, 'isoformat'):
+                value = value.isoformat()
+            values.append(value)
+        return base64.urlsafe_b64encode(
+            json.dumps(values).encode()
+        ).decode()
+
+    def decode_cursor(self, cursor):
+        """Функция декодирования курсора."""
+        try:
+            values = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        except (binascii.Error, UnicodeDecodeError, ValueError):
+            raise NotFound(self.invalid_cursor_message)
+        if not isinstance(values, list) or len(values) != len(self.ordering):
+            raise NotFound(self.invalid_cursor_message)
+        return values
+
+
+class RecipePagination(KeysetPagination):
+    """
+    Пагинация ленты рецептов. Результаты поиска упорядочены по
+    релевантности, поэтому листаются только по номеру страницы.
+    """
+    ordering = ('-pub_date', 'id')
+    cursor_excluded_params = ('search',)
+
+
+class UserPagination(KeysetPagination):
+    """Пагинация списка пользователей."""
+    ordering = ('username', 'id')
@@ -1,4 +1,6 @@
+from django.conf import settings
 from rest_framework.permissions import SAFE_METHODS, BasePermission
+from rest_framework.throttling import BaseThrottle
 
 
 class IsAuthorOrReadOnly(BasePermission):
@@ -13,3 +15,17 @@ class IsAuthorOrReadOnly(BasePermission):
         return (
             obj.author == request.user
         )
+
+
+class IsMetricsClient(BasePermission):
+    """
+    Метрики доступны администраторам и запросам с адресов
+    из METRICS_ALLOWED_IPS. Адрес клиента определяется так же, как
+    при ограничении частоты запросов, с учетом NUM_PROXIES.
+    """
+    def has_permission(self, request, view):
+        return (
+            request.user.is_staff
+            or BaseThrottle().get_ident(request)
+            in settings.METRICS_ALLOWED_IPS
+        )
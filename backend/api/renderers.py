@@ -0,0 +1,139 @@
+from abc import ABCMeta, abstractmethod
+import csv
+import io
+import json
+
+from django.conf import settings
+from reportlab.lib.pagesizes import A4
+from reportlab.pdfbase import pdfmetrics
+from reportlab.pdfbase.ttfonts import TTFError, TTFont
+from reportlab.pdfgen import canvas
+from rest_framework.renderers import BaseRenderer
+
+from api.shopping_list import CreateShoppingList
+
+
+JSON_CONTENT_TYPE = 'application/json; charset=utf-8'
+
+
+def render_json(data, renderer_context):
+    """
+    Функция отображения ответа с ошибкой в JSON с соответствующим
+    заголовком Content-Type вместо типа выгрузки.
+    """
+    response = (renderer_context or {}).get('response')
+    if response is not None:
+        response['Content-Type'] = JSON_CONTENT_TYPE
+    return json.dumps(data, ensure_ascii=False).encode()
+
+
+class ShoppingListRenderer(BaseRenderer, metaclass=ABCMeta):
+    """
+    Абстрактный класс выгрузки списка покупок.
+    Строки списка отдаются по частям методом render_items.
+    """
+    charset = 'utf-8'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        """Функция отображения ответов с ошибками."""
+        return render_json(data, renderer_context)
+
+    @abstractmethod
+    def render_items(self, items):
+        """Функция построчной выгрузки ингредиентов."""
+
+
+class TxtShoppingListRenderer(ShoppingListRenderer):
+    """Выгрузка списка покупок в формате txt."""
+    media_type = 'text/plain'
+    format = 'txt'
+
+    def render_items(self, items):
+        for item in items:
+            yield f'{CreateShoppingList.format_item(item)}\n'.encode()
+
+
+class CsvShoppingListRenderer(ShoppingListRenderer):
+    """Выгрузка списка покупок в формате csv."""
+    media_type = 'text/csv'
+    format = 'csv'
+    header = ('Ингредиент', 'Единица измерения', 'Количество')
+
+    def render_items(self, items):
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        writer.writerow(self.header)
+        for item in items:
+            writer.writerow((
+                item['ingredient__name'],
+                item['ingredient__measurement_unit'],
+                item['total'],
+            ))
+            yield buffer.getvalue().encode()
+            buffer.seek(0)
+            buffer.truncate()
+        if buffer.tell():
+            yield buffer.getvalue().encode()
+
+
+class PdfShoppingListRenderer(ShoppingListRenderer):
+    """
+    Выгрузка списка покупок в формате pdf.
+    Для кириллицы используется шрифт SHOPPING_LIST_PDF_FONT.
+    Ингредиенты читаются из базы по частям, но reportlab записывает
+    документ только при сохранении, поэтому файл собирается в памяти
+    и отдается одной частью.
+    """
+    media_type = 'application/pdf'
+    format = 'pdf'
+    charset = None
+    title = 'Список покупок'
+    font_name = 'ShoppingListFont'
+    font_size = 12
+    line_height = 18
+    margin = 50
+
+    def get_font(self):
+        """Функция регистрации шрифта с поддержкой кириллицы."""
+        if self.font_name in pdfmetrics.getRegisteredFontNames():
+            return self.font_name
+        try:
+            pdfmetrics.registerFont(
+                TTFont(self.font_name, settings.SHOPPING_LIST_PDF_FONT)
+            )
+        except TTFError:
+            return 'Helvetica'
+        return self.font_name
+
+    def render_items(self, items):
+        buffer = io.BytesIO()
+        pdf = canvas.Canvas(buffer, pagesize=A4)
+        font = self.get_font()
+        width, height = A4
+        pdf.setFont(font, self.font_size + 4)
+        pdf.drawString(self.margin, height - self.margin, self.title)
+        pdf.setFont(font, self.font_size)
+        y = height - self.margin - 2 * self.line_height
+        for item in items:
+            if y < self.margin:
+                pdf.showPage()
+                pdf.setFont(font, self.font_size)
+                y = height - self.margin
+            pdf.drawString(
+                self.margin, y, CreateShoppingList.format_item(item)
+            )
+            y -= self.line_height
+        pdf.save()
+        yield buffer.getvalue()
+
+
+class PrometheusRenderer(BaseRenderer):
+    """Выгрузка метрик запросов в текстовом формате Prometheus."""
+    media_type = 'text/plain'
+    format = 'prometheus'
+    charset = 'utf-8'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if isinstance(data, str):
+            return data.encode()
+        return render_json(data, renderer_context)
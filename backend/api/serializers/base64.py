@@ -1,15 +1,89 @@
 import base64
+import binascii
 
-from django.core.files.base import ContentFile
+from django.conf import settings
+from django.core.files.uploadedfile import TemporaryUploadedFile
 from rest_framework import serializers
 
+from api.serializers.media import get_media_url_resolver
+from recipes.thumbnails import get_thumbnail_name
+
+
+def get_recipe_image_url(recipe, size, media_url):
+    """Функция получения ссылки на изображение рецепта размера size."""
+    if not recipe.image:
+        return None
+    return media_url(get_thumbnail_name(recipe, size) or recipe.image.name)
+
 
 class Base64ImageField(serializers.ImageField):
     """Сериализатор для изображений в формате base64."""
+    def to_representation(self, value):
+        """Функция получения ссылки на изображение."""
+        if not value:
+            return None
+        return get_media_url_resolver(self.context)(value.name)
+
     def to_internal_value(self, data):
-        """Функция декодирования изображений base64."""
+        """
+        Функция декодирования изображений base64.
+        Изображение декодируется частями во временный файл, который
+        затем переносится в хранилище без копирования в память
+        и закрывается по окончании запроса, как обычный загруженный файл.
+        """
         if isinstance(data, str) and data.startswith('data:image'):
             format, imgstr = data.split(';base64,')
             ext = format.split('/')[-1]
-            data = ContentFile(base64.b64decode(imgstr), name='temp.' + ext)
+            data = self.decode(imgstr, 'temp.' + ext, format[len('data:'):])
         return super().to_internal_value(data)
+
+    def decode(self, imgstr, name, content_type):
+        """
+        Функция потокового декодирования base64 во временный файл.
+        Пробелы и переносы строк из части отбрасываются, а символы
+        сверх кратного 4 числа переносятся в следующую часть.
+        """
+        chunk_size = settings.BASE64_DECODE_CHUNK_SIZE
+        file = TemporaryUploadedFile(name, content_type, 0, None)
+        carry = ''
+        try:
+            for start in range(0, len(imgstr), chunk_size):
+                chunk = carry + ''.join(
+                    imgstr[start:start + chunk_size].split()
+                )
+                end = len(chunk) - len(chunk) % 4
+                file.write(base64.b64decode(chunk[:end], validate=True))
+                carry = chunk[end:]
+            if carry:
+                raise binascii.Error('Incorrect padding')
+        except (binascii.Error, ValueError):
+            file.close()
+            self.fail('invalid_image')
+        file.size = file.tell()
+        file.seek(0)
+        request = self.context.get('request')
+        if request is not None:
+            getattr(request, '_request', request).FILES.appendlist(
+                self.field_name, file
+            )
+        return file
+
+
+class ThumbnailImageField(serializers.ImageField):
+    """
+    Поле изображения рецепта для чтения. Возвращает ссылку на миниатюру
+    размера size, а пока она не готова — на исходное изображение.
+    Размер можно передать в контексте сериализатора (thumbnail_size).
+    """
+    def __init__(self, size=None, **kwargs):
+        self.size = size
+        kwargs['source'] = '*'
+        kwargs['read_only'] = True
+        super().__init__(**kwargs)
+
+    def to_representation(self, recipe):
+        return get_recipe_image_url(
+            recipe,
+            self.size or self.context.get('thumbnail_size'),
+            get_media_url_resolver(self.context),
+        )
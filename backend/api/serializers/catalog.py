@@ -0,0 +1,23 @@
+from rest_framework import serializers
+
+from recipes.catalog import get_catalog
+
+
+class CatalogPrimaryKeyRelatedField(serializers.PrimaryKeyRelatedField):
+    """
+    Поле выбора ингредиента или тега по id.
+    Объект ищется в справочнике процесса без запроса к базе данных.
+    """
+
+    def __init__(self, catalog_field, **kwargs):
+        self.catalog_field = catalog_field
+        super().__init__(**kwargs)
+
+    def to_internal_value(self, data):
+        objects = getattr(get_catalog(), self.catalog_field)
+        try:
+            return objects[int(data)]
+        except KeyError:
+            self.fail('does_not_exist', pk_value=data)
+        except (TypeError, ValueError):
+            self.fail('incorrect_type', data_type=type(data).__name__)
@@ -0,0 +1,30 @@
+from django.conf import settings
+from django.utils.encoding import filepath_to_uri
+
+
+class MediaUrlResolver:
+    """
+    Класс получения ссылок на медиафайлы. Адрес MEDIA_URL с хостом
+    запроса вычисляется один раз, ссылка на файл собирается из пути.
+    """
+
+    def __init__(self, request=None):
+        self.prefix = settings.MEDIA_URL
+        if request is not None:
+            self.prefix = request.build_absolute_uri(self.prefix)
+
+    def __call__(self, name):
+        if not name:
+            return None
+        return f'{self.prefix}{filepath_to_uri(name)}'
+
+
+def get_media_url_resolver(context):
+    """Функция получения общего для запроса MediaUrlResolver."""
+    request = context.get('request')
+    if request is None:
+        return MediaUrlResolver()
+    resolver = getattr(request, 'media_url_resolver', None)
+    if resolver is None:
+        resolver = request.media_url_resolver = MediaUrlResolver(request)
+    return resolver
@@ -1,8 +1,16 @@
 from django.core.validators import MinValueValidator
+from django.db import models, transaction
 from foodgram_backend.constants import MIN_AMOUNT_INGREDIENTS, MIN_TIME_COOKING
 from rest_framework import serializers
 
-from api.serializers.base64 import Base64ImageField
+from api.metrics import TimedRepresentationMixin
+from api.serializers.base64 import (
+    Base64ImageField,
+    ThumbnailImageField,
+    get_recipe_image_url,
+)
+from api.serializers.catalog import CatalogPrimaryKeyRelatedField
+from api.serializers.media import get_media_url_resolver
 from api.serializers.users import ReadUserSerializer
 from recipes.models import (
     Favorite,
@@ -10,11 +18,12 @@ from recipes.models import (
     IngredientInRecipe,
     Recipe,
     RecipesInShoppingList,
+    ShoppingListIngredient,
     Tag,
 )
 
 
-class TagSerializer(serializers.ModelSerializer):
+class TagSerializer(TimedRepresentationMixin, serializers.ModelSerializer):
     """Сериализатор для модели Тега."""
 
     class Meta:
@@ -22,7 +31,9 @@ class TagSerializer(serializers.ModelSerializer):
         fields = ('id', 'name', 'slug')
 
 
-class IngredientSerializer(serializers.ModelSerializer):
+class IngredientSerializer(
+    TimedRepresentationMixin, serializers.ModelSerializer
+):
     """Сериализатор для модели Ингредиент."""
 
     class Meta:
@@ -45,7 +56,8 @@ class IngredientInRecipeSerializer(serializers.ModelSerializer):
 
 class IngredientRecipeSerializer(serializers.ModelSerializer):
     """Сериализатор для указания количества ингредиента в рецепте."""
-    id = serializers.PrimaryKeyRelatedField(
+    id = CatalogPrimaryKeyRelatedField(
+        catalog_field='ingredients_by_id',
         queryset=Ingredient.objects.all(),
         source='ingredient',
         required=True,
@@ -62,7 +74,70 @@ class IngredientRecipeSerializer(serializers.ModelSerializer):
         fields = ('id', 'amount')
 
 
-class ReadRecipeSerializer(serializers.ModelSerializer):
+class ReadRecipeListSerializer(
+    TimedRepresentationMixin, serializers.ListSerializer
+):
+    """
+    Сериализатор списка рецептов для чтения. Словари рецептов собираются
+    напрямую из предзагруженных объектов, без полей DRF для каждого
+    рецепта; авторы и теги страницы сериализуются один раз.
+    """
+
+    def to_representation(self, data):
+        recipes = data.all() if isinstance(data, models.Manager) else data
+        request = self.context.get('request')
+        authenticated = request is not None and request.user.is_authenticated
+        media_url = get_media_url_resolver(self.context)
+        image_size = self.context.get('thumbnail_size')
+        author_serializer = self.child.fields['author']
+        authors = {}
+        tags = {}
+        result = []
+        for recipe in recipes:
+            author = authors.get(recipe.author_id)
+            if author is None:
+                author = authors[recipe.author_id] = (
+                    author_serializer.to_representation(recipe.author)
+                )
+            recipe_tags = []
+            for tag in recipe.tags.all():
+                if tag.id not in tags:
+                    tags[tag.id] = {
+                        'id': tag.id,
+                        'name': tag.name,
+                        'slug': tag.slug,
+                    }
+                recipe_tags.append(tags[tag.id])
+            result.append({
+                'id': recipe.id,
+                'tags': recipe_tags,
+                'author': author,
+                'ingredients': [
+                    {
+                        'id': item.ingredient.id,
+                        'name': item.ingredient.name,
+                        'measurement_unit': item.ingredient.measurement_unit,
+                        'amount': item.amount,
+                    }
+                    for item in recipe.recipe_ingredient_amounts.all()
+                ],
+                'is_favorited': authenticated and (
+                    self.child.get_is_favorited(recipe)
+                ),
+                'is_in_shopping_cart': authenticated and (
+                    self.child.get_is_in_shopping_cart(recipe)
+                ),
+                'name': recipe.name,
+                'image': get_recipe_image_url(recipe, image_size, media_url),
+                'text': recipe.text,
+                'cooking_time': recipe.cooking_time,
+            })
+        return result
+
+
+class ReadRecipeSerializer(
+    TimedRepresentationMixin, serializers.ModelSerializer
+):
     """Сериализатор для получения (чтения) рецепта."""
     tags = TagSerializer(many=True, read_only=True)
     author = ReadUserSerializer(read_only=True)
@@ -73,10 +148,11 @@ class ReadRecipeSerializer(serializers.ModelSerializer):
     )
     is_favorited = serializers.SerializerMethodField(read_only=True)
     is_in_shopping_cart = serializers.SerializerMethodField(read_only=True)
-    image = Base64ImageField(read_only=True)
+    image = ThumbnailImageField()
 
     class Meta:
         model = Recipe
+        list_serializer_class = ReadRecipeListSerializer
         fields = (
             'id',
             'tags',
@@ -95,6 +171,8 @@ class ReadRecipeSerializer(serializers.ModelSerializer):
         user = self.context.get('request').user
         if not user.is_authenticated:
             return False
+        if hasattr(obj, 'is_favorited'):
+            return obj.is_favorited
         return Favorite.objects.filter(
             user=user,
             recipe=obj
@@ -105,14 +183,19 @@ class ReadRecipeSerializer(serializers.ModelSerializer):
         user = self.context.get('request').user
         if not user.is_authenticated:
             return False
+        if hasattr(obj, 'is_in_shopping_cart'):
+            return obj.is_in_shopping_cart
         return RecipesInShoppingList.objects.filter(
             user=user,
             recipe=obj
         ).exists()
 
 
-class MiniRecipeSerializer(serializers.ModelSerializer):
+class MiniRecipeSerializer(
+    TimedRepresentationMixin, serializers.ModelSerializer
+):
     """Сериализатор получения краткой информации о рецепте."""
+    image = ThumbnailImageField(size='small')
 
     class Meta:
         model = Recipe
@@ -130,12 +213,13 @@ class MiniRecipeSerializer(serializers.ModelSerializer):
         )
 
 
-class RecipeSerializer(serializers.ModelSerializer):
+class RecipeSerializer(TimedRepresentationMixin, serializers.ModelSerializer):
     """Сериализатор для создания и редактирования рецепта."""
     ingredients = IngredientRecipeSerializer(
         many=True,
     )
-    tags = serializers.PrimaryKeyRelatedField(
+    tags = CatalogPrimaryKeyRelatedField(
+        catalog_field='tags_by_id',
         queryset=Tag.objects.all(),
         many=True
     )
@@ -213,6 +297,62 @@ class RecipeSerializer(serializers.ModelSerializer):
             )
         return values
 
+    @staticmethod
+    def create_ingredients(recipe, ingredients):
+        """Функция добавления ингредиентов в рецепт одним запросом."""
+        IngredientInRecipe.objects.bulk_create(
+            IngredientInRecipe(
+                recipe=recipe,
+                ingredient=ingredient.get('ingredient'),
+                amount=ingredient.get('amount'),
+            )
+            for ingredient in ingredients
+        )
+
+    def update_ingredients(self, recipe, ingredients):
+        """
+        Функция обновления ингредиентов рецепта: удаляет, изменяет
+        и добавляет только отличающиеся строки и переносит разницу
+        в суммы списков покупок с этим рецептом.
+        """
+        current = {
+            item.ingredient_id: item
+            for item in recipe.recipe_ingredient_amounts.all()
+        }
+        amounts = {
+            ingredient.get('ingredient').id: ingredient.get('amount')
+            for ingredient in ingredients
+        }
+        differences = {
+            ingredient_id: amounts.get(ingredient_id, 0) - (
+                current[ingredient_id].amount
+                if ingredient_id in current else 0
+            )
+            for ingredient_id in current.keys() | amounts.keys()
+        }
+        removed = current.keys() - amounts.keys()
+        if removed:
+            recipe.recipe_ingredient_amounts.filter(
+                ingredient_id__in=removed
+            ).delete()
+        changed = []
+        for ingredient_id, item in current.items():
+            amount = amounts.get(ingredient_id)
+            if amount is not None and item.amount != amount:
+                item.amount = amount
+                changed.append(item)
+        if changed:
+            IngredientInRecipe.objects.bulk_update(changed, ('amount',))
+        self.create_ingredients(recipe, (
+            ingredient for ingredient in ingredients
+            if ingredient.get('ingredient').id not in current
+        ))
+        ShoppingListIngredient.objects.apply_amounts(
+            recipe.in_shopping_lists.values_list('user_id', flat=True),
+            differences,
+        )
+
+    @transaction.atomic
     def create(self, validated_data):
         """Функция создания рецепта."""
         ingredients = validated_data.pop('ingredients')
@@ -221,32 +361,37 @@ class RecipeSerializer(serializers.ModelSerializer):
         validated_data.pop('author', None)
         recipe = Recipe.objects.create(author=author, **validated_data)
         recipe.tags.set(tags)
-        for ingredient in ingredients:
-            IngredientInRecipe.objects.create(
-                recipe=recipe,
-                ingredient=ingredient.get('ingredient'),
-                amount=ingredient.get('amount'),
-            )
+        self.create_ingredients(recipe, ingredients)
         return recipe
 
+    @transaction.atomic
     def update(self, instance, validated_data):
         """Функция обновления рецепта."""
         ingredients = validated_data.pop('ingredients', None)
         tags = validated_data.pop('tags', None)
-        instance = super().update(instance, validated_data)
+        for field, value in validated_data.items():
+            setattr(instance, field, value)
+        # Счетчики и миниатюры меняются запросами других процессов,
+        # поэтому сохраняются только поля из запроса.
+        instance.save(update_fields=(*validated_data, 'updated_at'))
         if tags is not None:
-            instance.tags.clear()
             instance.tags.set(tags)
         if ingredients is not None:
-            instance.recipe_ingredient_amounts.all().delete()
-            for ingredient_data in ingredients:
-                IngredientInRecipe.objects.create(
-                    recipe=instance,
-                    ingredient=ingredient_data.get('ingredient'),
-                    amount=ingredient_data.get('amount'),
-                )
+            self.update_ingredients(instance, ingredients)
         return instance
 
     def to_representation(self, instance):
         """Функция предоставления информации в виде ReadRecipeSerializer."""
         return ReadRecipeSerializer(instance, context=self.context).data
+
+
+class RecipeMatchSerializer(serializers.Serializer):
+    """Сериализатор параметров подбора рецептов по ингредиентам."""
+    ingredients = serializers.ListField(
+        child=serializers.IntegerField(min_value=1),
+        allow_empty=False,
+    )
+    max_missing = serializers.IntegerField(min_value=0, required=False)
+    max_cooking_time = serializers.IntegerField(
+        min_value=MIN_TIME_COOKING, required=False
+    )
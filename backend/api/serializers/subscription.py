@@ -1,11 +1,53 @@
+from collections import defaultdict
+
+from django.db import models
 from rest_framework import serializers
 
+from api.metrics import TimedRepresentationMixin
+from api.serializers.base64 import Base64ImageField
 from api.serializers.recipes import MiniRecipeSerializer
 from recipes.models import Recipe
 from users.models import Subscription
 
 
-class SubscriptionSerializer(serializers.ModelSerializer):
+def get_recipes_limit(request):
+    """Функция получения ограничения числа рецептов из запроса."""
+    if request:
+        try:
+            return int(request.query_params.get('recipes_limit'))
+        except (TypeError, ValueError):
+            pass
+    return None
+
+
+class SubscriptionListSerializer(
+    TimedRepresentationMixin, serializers.ListSerializer
+):
+    """
+    Сериализатор списка подписок. Рецепты всех авторов страницы
+    загружаются одним запросом.
+    """
+
+    def to_representation(self, data):
+        subscriptions = list(
+            data.all() if isinstance(data, models.Manager) else data
+        )
+        recipes = defaultdict(list)
+        for recipe in Recipe.objects.recent_by_authors(
+            [subscription.following_id for subscription in subscriptions],
+            get_recipes_limit(self.context.get('request')),
+        ):
+            recipes[recipe.author_id].append(recipe)
+        for subscription in subscriptions:
+            subscription.following.recent_recipes = recipes[
+                subscription.following_id
+            ]
+        return super().to_representation(subscriptions)
+
+
+class SubscriptionSerializer(
+    TimedRepresentationMixin, serializers.ModelSerializer
+):
     """Сериализатор получения подписки пользователя на другого пользователя."""
     email = serializers.ReadOnlyField(source='following.email')
     id = serializers.ReadOnlyField(source='following.id')
@@ -15,10 +57,11 @@ class SubscriptionSerializer(serializers.ModelSerializer):
     is_subscribed = serializers.SerializerMethodField()
     recipes = serializers.SerializerMethodField()
     recipes_count = serializers.SerializerMethodField()
-    avatar = serializers.ImageField(source='following.avatar')
+    avatar = Base64ImageField(source='following.avatar', read_only=True)
 
     class Meta:
         model = Subscription
+        list_serializer_class = SubscriptionListSerializer
         fields = (
             'email',
             'id',
@@ -34,25 +77,23 @@ class SubscriptionSerializer(serializers.ModelSerializer):
     def get_is_subscribed(self, obj):
         """Функция проверки подписки на пользователя."""
         request = self.context.get('request')
-        if request and request.user.is_authenticated:
-            return Subscription.objects.filter(
-                user=request.user,
-                following=obj.following,
-            ).exists()
-        return False
+        if not request or not request.user.is_authenticated:
+            return False
+        if obj.user_id == request.user.id:
+            return True
+        return Subscription.objects.filter(
+            user=request.user,
+            following=obj.following,
+        ).exists()
 
     def get_recipes(self, obj):
         """Функция получения рецептов пользователя."""
-        recipes = Recipe.objects.filter(author=obj.following)
-        request = self.context.get('request')
-        if request:
-            limit = request.query_params.get('recipes_limit')
-            if limit:
-                try:
-                    limit = int(limit)
-                    recipes = recipes[:int(limit)]
-                except ValueError:
-                    pass
+        recipes = getattr(obj.following, 'recent_recipes', None)
+        if recipes is None:
+            recipes = Recipe.objects.recent_by_authors(
+                (obj.following_id,),
+                get_recipes_limit(self.context.get('request')),
+            )
         return MiniRecipeSerializer(recipes,
                                     many=True,
                                     context=self.context
@@ -60,10 +101,12 @@ class SubscriptionSerializer(serializers.ModelSerializer):
 
     def get_recipes_count(self, obj):
         """Функция получения количества рецептов пользователя."""
-        return Recipe.objects.filter(author=obj.following).count()
+        return obj.following.recipes_count
 
 
-class CreateSubscriptionSerializer(serializers.ModelSerializer):
+class CreateSubscriptionSerializer(
+    TimedRepresentationMixin, serializers.ModelSerializer
+):
     """Сериализатор для создания подписки на пользователя."""
 
     class Meta:
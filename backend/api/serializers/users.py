@@ -9,11 +9,12 @@ from foodgram_backend.constants import (
 from rest_framework import serializers
 from rest_framework.validators import UniqueValidator
 
+from api.metrics import TimedRepresentationMixin
 from api.serializers.base64 import Base64ImageField
 from users.models import Subscription, User
 
 
-class ReadUserSerializer(UserSerializer):
+class ReadUserSerializer(TimedRepresentationMixin, UserSerializer):
     """Сериализатор для получения профиля Пользователя (только чтение)."""
     is_subscribed = serializers.SerializerMethodField()
     avatar = Base64ImageField()
@@ -33,15 +34,17 @@ class ReadUserSerializer(UserSerializer):
     def get_is_subscribed(self, obj):
         """Функция проверки подписки пользователя на автора."""
         user = self.context.get('request').user
-        if user.is_authenticated:
-            return Subscription.objects.filter(
-                user=user,
-                following=obj
-            ).exists()
-        return False
+        if not user.is_authenticated:
+            return False
+        if hasattr(obj, 'is_subscribed'):
+            return obj.is_subscribed
+        return Subscription.objects.filter(
+            user=user,
+            following=obj
+        ).exists()
 
 
-class CreateUserSerializer(UserCreateSerializer):
+class CreateUserSerializer(TimedRepresentationMixin, UserCreateSerializer):
     """Сериализатор для создания профиля пользователя."""
     email = serializers.EmailField(
         max_length=MAX_EMAIL_LENGTH,
@@ -105,7 +108,7 @@ class CreateUserSerializer(UserCreateSerializer):
         return user
 
 
-class AvatarSerializer(serializers.ModelSerializer):
+class AvatarSerializer(TimedRepresentationMixin, serializers.ModelSerializer):
     """Сериализатор для работы с аватаром пользователей."""
     avatar = Base64ImageField(required=True, allow_null=False)
 
@@ -113,6 +116,12 @@ class AvatarSerializer(serializers.ModelSerializer):
         model = User
         fields = ('avatar',)
 
+    def update(self, instance, validated_data):
+        """Функция сохранения аватара без остальных полей пользователя."""
+        instance.avatar = validated_data['avatar']
+        instance.save(update_fields=('avatar',))
+        return instance
+
 
 class ChangePasswordSerializer(serializers.Serializer):
     """Сериализатор для смены пароля."""
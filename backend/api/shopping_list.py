@@ -1,27 +1,82 @@
-from django.db.models import Sum
+from django.conf import settings
+from django.core.cache import cache
 
-from recipes.models import IngredientInRecipe
+from recipes.cache import (
+    SHOPPING_LISTS_VERSION_KEY,
+    get_cache_version,
+    invalidate_cache_version,
+)
+from recipes.models import ShoppingListIngredient
+
+
+CART_VERSION_KEY = 'shopping_cart:version:{}'
+CART_CONTENT_KEY = 'shopping_cart:{}:{}:{}'
 
 
 class CreateShoppingList(object):
     """Класс создания списка покупок."""
 
     @staticmethod
-    def create_list(user):
-        """Функция создания списка покупок."""
-        ingredients = (
-            IngredientInRecipe.objects
-            .filter(recipe__in_shopping_lists__user=user)
+    def get_ingredients(user):
+        """Функция получения суммы ингредиентов из списка покупок."""
+        return (
+            ShoppingListIngredient.objects
+            .filter(user=user)
             .values(
                 'ingredient__name',
-                'ingredient__measurement_unit'
+                'ingredient__measurement_unit',
+                'total',
             )
-            .annotate(total=Sum('amount'))
             .order_by('ingredient__name')
         )
 
-        return [
-            f"{ing['ingredient__name']} "
-            f"({ing['ingredient__measurement_unit']}) — {ing['total']}"
-            for ing in ingredients
-        ]
+    @staticmethod
+    def format_item(item):
+        """Функция получения строки списка покупок."""
+        return (
+            f"{item['ingredient__name']} "
+            f"({item['ingredient__measurement_unit']}) — {item['total']}"
+        )
+
+    @staticmethod
+    def get_version(user_id):
+        """
+        Функция получения версии списка покупок пользователя. Версия
+        меняется при изменении списка пользователя, а также ингредиентов
+        и пересчете всех списков (SHOPPING_LISTS_VERSION_KEY).
+        """
+        return '{}:{}'.format(
+            get_cache_version(SHOPPING_LISTS_VERSION_KEY),
+            get_cache_version(CART_VERSION_KEY.format(user_id)),
+        )
+
+    @staticmethod
+    def invalidate(*user_ids):
+        """Функция сброса сохраненных выгрузок списков покупок."""
+        invalidate_cache_version(
+            *(CART_VERSION_KEY.format(user_id) for user_id in user_ids)
+        )
+
+    @classmethod
+    def stream(cls, user, renderer):
+        """
+        Функция выгрузки списка покупок по частям.
+        Готовый файл сохраняется в кеше до изменения списка покупок.
+        """
+        key = CART_CONTENT_KEY.format(
+            user.pk, cls.get_version(user.pk), renderer.format
+        )
+        content = cache.get(key)
+        if content is not None:
+            yield content
+            return
+        chunks = []
+        ingredients = cls.get_ingredients(user).iterator(
+            chunk_size=settings.SHOPPING_CART_CHUNK_SIZE
+        )
+        for chunk in renderer.render_items(ingredients):
+            chunks.append(chunk)
+            yield chunk
+        cache.set(
+            key, b''.join(chunks), settings.SHOPPING_CART_CACHE_TIMEOUT
+        )
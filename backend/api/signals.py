@@ -0,0 +1,37 @@
+from functools import partial
+
+from django.db import transaction
+from django.db.backends.signals import connection_created
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from rest_framework.authtoken.models import Token
+
+from api.authentication import invalidate_token, invalidate_user
+from api.metrics import record_current_query
+from users.models import User
+
+
+@receiver(connection_created)
+def connection_opened(sender, connection, **kwargs):
+    """Подключает учет SQL-запросов к новому соединению с базой данных."""
+    if record_current_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(record_current_query)
+
+
+@receiver((post_save, post_delete), sender=User)
+def user_changed(sender, instance, **kwargs):
+    """
+    Сбрасывает кеш аутентификации пользователя при изменении профиля,
+    пароля или активности, в том числе после фиксации транзакции.
+    Сохранение только времени входа кеш не сбрасывает.
+    """
+    if set(kwargs.get('update_fields') or ()) == {'last_login'}:
+        return
+    invalidate_user(instance.pk)
+    transaction.on_commit(partial(invalidate_user, instance.pk))
+
+
+@receiver(post_delete, sender=Token)
+def token_deleted(sender, instance, **kwargs):
+    """Сбрасывает кеш токена при выходе пользователя."""
+    invalidate_token(instance.key)
@@ -0,0 +1,85 @@
+from io import StringIO
+import shutil
+import tempfile
+
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import TransactionTestCase, override_settings
+
+from recipes.models import Ingredient, Recipe, Tag
+
+
+MEDIA_ROOT = tempfile.mkdtemp()
+
+
+@override_settings(MEDIA_ROOT=MEDIA_ROOT)
+class AsyncViewsTest(TransactionTestCase):
+    """
+    Асинхронные представления отвечают так же, как синхронные, и
+    кешируют ответы анонимным пользователям. Запросы к базе данных
+    выполняются в других потоках, поэтому данные фиксируются.
+    """
+
+    def setUp(self):
+        Tag.objects.bulk_create(
+            Tag(name=f'Тег {number}', slug=f'tag-{number}')
+            for number in range(3)
+        )
+        Ingredient.objects.bulk_create(
+            Ingredient(name=name, measurement_unit='г')
+            for name in (
+                'Сахар', 'Сахарная пудра', 'Тростниковый сахар', 'Соль',
+                'Мука', 'Масло', 'Молоко', 'Яйца', 'Вода', 'Дрожжи',
+                'Корица',
+            )
+        )
+        call_command(
+            'generate_fixtures', users=3, recipes=6, favorites=1,
+            cart=1, subscriptions=1, stdout=StringIO(),
+        )
+        cache.clear()
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(MEDIA_ROOT, ignore_errors=True)
+
+    def test_ingredient_search_matches_sync(self):
+        for name in ('сахар', 'САХ', 'ол', 'нет такого'):
+            with self.subTest(name=name):
+                self.assertEqual(
+                    self.client.get(
+                        '/api/async/ingredients/', {'name': name}
+                    ).json(),
+                    self.client.get(
+                        '/api/ingredients/', {'name': name}
+                    ).json(),
+                )
+
+    def test_recipes_match_sync(self):
+        recipe = Recipe.objects.first()
+        self.assertEqual(
+            self.client.get('/api/async/recipes/?limit=4').json()['results'],
+            self.client.get('/api/recipes/?limit=4').json()['results'],
+        )
+        self.assertEqual(
+            self.client.get(f'/api/async/recipes/{recipe.pk}/').json(),
+            self.client.get(f'/api/recipes/{recipe.pk}/').json(),
+        )
+
+    def test_anonymous_responses_cached(self):
+        recipe = Recipe.objects.first()
+        for url in (
+            '/api/async/recipes/?limit=4',
+            f'/api/async/recipes/{recipe.pk}/',
+            '/api/async/tags/',
+            '/api/async/ingredients/?name=сахар',
+        ):
+            with self.subTest(url=url):
+                response = self.client.get(url)
+                self.assertEqual(response.status_code, 200)
+                self.assertIn('Last-Modified', response)
+                self.assertEqual(self.client.get(url).json(), response.json())
+                self.assertEqual(self.client.get(
+                    url, HTTP_IF_NONE_MATCH=response['ETag']
+                ).status_code, 304)
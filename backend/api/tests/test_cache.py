@@ -0,0 +1,77 @@
+from datetime import timedelta
+
+from django.core.cache import cache
+from django.test import TestCase
+from django.utils import timezone
+from django.utils.http import http_date
+from rest_framework.test import APIClient
+
+from recipes.models import Recipe
+from users.models import User
+
+
+URL = '/api/recipes/'
+
+
+class RecipeListCacheTest(TestCase):
+    """
+    Ответы ленты рецептов анонимным пользователям содержат ETag и
+    Last-Modified по времени изменения рецептов страницы.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        author = User.objects.create_user(
+            email='author@example.com', username='author',
+            first_name='author', last_name='author', password='password',
+        )
+        cls.modified = timezone.now() - timedelta(days=1)
+        for number in range(3):
+            recipe = Recipe.objects.create(
+                author=author, name=f'Рецепт {number}', text='Описание',
+                cooking_time=10, image='',
+            )
+            Recipe.objects.filter(pk=recipe.pk).update(
+                updated_at=cls.modified - timedelta(hours=number)
+            )
+
+    def setUp(self):
+        cache.clear()
+
+    def test_last_modified_from_page(self):
+        for params, modified in (
+            ({'limit': 3}, self.modified),
+            ({'limit': 1}, self.modified - timedelta(hours=2)),
+            ({'limit': 1, 'page': 3}, self.modified),
+            ({'cursor': '', 'limit': 2}, self.modified - timedelta(hours=1)),
+        ):
+            with self.subTest(params=params):
+                response = APIClient().get(URL, params)
+                self.assertEqual(
+                    response['Last-Modified'],
+                    http_date(modified.timestamp()),
+                )
+
+    def test_not_modified(self):
+        response = APIClient().get(URL, {'limit': 2})
+        self.assertEqual(response.status_code, 200)
+        for headers in (
+            {'HTTP_IF_NONE_MATCH': response['ETag']},
+            {'HTTP_IF_MODIFIED_SINCE': response['Last-Modified']},
+        ):
+            with self.subTest(headers=headers):
+                self.assertEqual(
+                    APIClient().get(URL, {'limit': 2}, **headers)
+                    .status_code,
+                    304,
+                )
+        with self.captureOnCommitCallbacks(execute=True):
+            recipe = Recipe.objects.first()
+            recipe.name = 'Новый рецепт'
+            recipe.save()
+        self.assertEqual(
+            APIClient().get(
+                URL, {'limit': 2}, HTTP_IF_NONE_MATCH=response['ETag']
+            ).status_code,
+            200,
+        )
@@ -0,0 +1,23 @@
+from django.core.cache import cache
+from django.test import TestCase
+
+from recipes.catalog import get_catalog
+from recipes.models import Tag
+
+
+class CatalogInvalidationTest(TestCase):
+    """Справочники сбрасываются только после фиксации транзакции."""
+
+    def setUp(self):
+        cache.clear()
+
+    def test_reset_after_commit(self):
+        self.assertEqual(get_catalog().tags, ())
+        with self.captureOnCommitCallbacks() as callbacks:
+            Tag.objects.create(name='Завтрак', slug='breakfast')
+            self.assertEqual(get_catalog().tags, ())
+        for callback in callbacks:
+            callback()
+        self.assertEqual(
+            [tag.slug for tag in get_catalog().tags], ['breakfast']
+        )
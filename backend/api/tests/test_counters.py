@@ -0,0 +1,67 @@
+from django.test import TestCase
+from rest_framework.test import APIRequestFactory
+
+from api.serializers.recipes import RecipeSerializer
+from api.serializers.users import AvatarSerializer
+from recipes.models import Favorite, Recipe
+from users.models import Subscription, User
+
+
+AVATAR = (
+    'data:image/png;base64,iVBORw0KGgoAAAANSUhEUgAAAAEAAAABCAYAAAAfFcSJAAAA'
+    'DUlEQVR42mNk+M9QDwADhgGAWjR9awAAAABJRU5ErkJggg=='
+)
+
+
+class CounterUpdateTest(TestCase):
+    """
+    Изменение рецепта или аватара не затирает счетчики, увеличенные
+    другим запросом после загрузки объекта.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.author, cls.reader = (
+            User.objects.create_user(
+                email=f'{name}@example.com', username=name,
+                first_name=name, last_name=name, password='password',
+            )
+            for name in ('author', 'reader')
+        )
+        cls.recipe = Recipe.objects.create(
+            author=cls.author, name='Рецепт', text='Описание',
+            cooking_time=10, image='recipes/images/recipe.png',
+        )
+
+    def get_context(self, user):
+        request = APIRequestFactory().patch('/')
+        request.user = user
+        self.addCleanup(request.close)
+        return {'request': request}
+
+    def test_favorite_survives_recipe_update(self):
+        recipe = Recipe.objects.get(pk=self.recipe.pk)
+        Favorite.objects.create(user=self.reader, recipe=self.recipe)
+        serializer = RecipeSerializer(
+            recipe, data={'name': 'Новое название'}, partial=True,
+            context=self.get_context(self.author),
+        )
+        serializer.is_valid(raise_exception=True)
+        serializer.save()
+        recipe.refresh_from_db()
+        self.assertEqual(recipe.name, 'Новое название')
+        self.assertEqual(recipe.favorites_count, 1)
+
+    def test_follower_survives_avatar_update(self):
+        author = User.objects.get(pk=self.author.pk)
+        Subscription.objects.create(user=self.reader, following=self.author)
+        serializer = AvatarSerializer(
+            author, data={'avatar': AVATAR},
+            context=self.get_context(author),
+        )
+        serializer.is_valid(raise_exception=True)
+        serializer.save()
+        author.refresh_from_db()
+        author.avatar.delete(save=False)
+        self.assertEqual(author.followers_count, 1)
+        self.assertEqual(author.recipes_count, 1)
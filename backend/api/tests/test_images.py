@@ -0,0 +1,110 @@
+import base64
+import io
+import runpy
+import shutil
+import tempfile
+from unittest import mock
+
+from PIL import Image
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.core.files.base import ContentFile
+from django.test import TestCase, override_settings
+from rest_framework.test import APIRequestFactory
+
+from api.serializers.base64 import Base64ImageField
+from recipes.models import Recipe
+from recipes.thumbnails import make_thumbnails
+from users.models import User
+
+
+MEDIA_ROOT = tempfile.mkdtemp()
+SETTINGS_PATH = str(settings.BASE_DIR / 'foodgram_backend' / 'settings.py')
+
+
+def get_png(color, mode='RGB'):
+    buffer = io.BytesIO()
+    Image.new(mode, (300, 200), color).save(buffer, 'PNG')
+    return buffer.getvalue()
+
+
+@override_settings(MEDIA_ROOT=MEDIA_ROOT)
+class ImageTest(TestCase):
+    """Декодирование изображений base64 и замена миниатюр рецепта."""
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(MEDIA_ROOT, ignore_errors=True)
+
+    @override_settings(BASE64_DECODE_CHUNK_SIZE=10)
+    def test_decode_with_line_breaks(self):
+        image = get_png((60, 120, 200))
+        encoded = base64.encodebytes(image).decode().replace('\n', '\r\n ')
+        request = APIRequestFactory().post('/')
+        self.addCleanup(request.close)
+        field = Base64ImageField()
+        field.bind('image', None)
+        field._context = {'request': request}
+        file = field.to_internal_value(f'data:image/png;base64,{encoded}')
+        self.assertEqual(file.read(), image)
+
+    def test_replaced_thumbnails_deleted(self):
+        author = User.objects.create_user(
+            email='author@example.com', username='author',
+            first_name='author', last_name='author', password='password',
+        )
+        storage = Recipe._meta.get_field('image').storage
+        first, second = (
+            storage.save(f'recipes/images/{name}.png', ContentFile(image))
+            for name, image in (
+                ('first', get_png((60, 120, 200))),
+                ('second', get_png((200, 120, 60))),
+            )
+        )
+        recipe = Recipe.objects.create(
+            author=author, name='Рецепт', text='Описание',
+            cooking_time=10, image=first,
+        )
+        previous = make_thumbnails(recipe.pk, first)
+        Recipe.objects.filter(pk=recipe.pk).update(image=second)
+        current = make_thumbnails(recipe.pk, second)
+        for size in settings.THUMBNAIL_SIZES:
+            with self.subTest(size=size):
+                self.assertFalse(storage.exists(previous[size]))
+                self.assertTrue(storage.exists(current[size]))
+
+    def test_thumbnail_formats(self):
+        storage = Recipe._meta.get_field('image').storage
+        for mode, color in (('RGBA', (60, 120, 200, 100)), ('P', 1)):
+            name = storage.save(
+                f'recipes/images/{mode}.png',
+                ContentFile(get_png(color, mode)),
+            )
+            for image_format, extension in (
+                ('JPEG', 'jpg'), ('WEBP', 'webp'),
+            ):
+                with self.subTest(mode=mode, format=image_format):
+                    with override_settings(THUMBNAIL_FORMAT=image_format):
+                        thumbnails = make_thumbnails(None, name)
+                    for size in settings.THUMBNAIL_SIZES:
+                        self.assertTrue(
+                            thumbnails[size].endswith(f'.{extension}')
+                        )
+                        with storage.open(thumbnails[size]) as thumbnail:
+                            self.assertEqual(
+                                Image.open(thumbnail).format, image_format
+                            )
+
+    def test_thumbnail_format_setting(self):
+        for value, expected in (('webp', 'WEBP'), ('Jpeg', 'JPEG')):
+            with self.subTest(value=value):
+                with mock.patch.dict('os.environ', THUMBNAIL_FORMAT=value):
+                    self.assertEqual(runpy.run_path(
+                        SETTINGS_PATH
+                    )['THUMBNAIL_FORMAT'], expected)
+        for value in ('PNG', 'jpg'):
+            with self.subTest(value=value):
+                with mock.patch.dict('os.environ', THUMBNAIL_FORMAT=value):
+                    with self.assertRaises(ImproperlyConfigured):
+                        runpy.run_path(SETTINGS_PATH)
@@ -0,0 +1,87 @@
+import csv
+from io import StringIO
+from pathlib import Path
+import shutil
+import tempfile
+
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.test import TestCase
+
+from recipes.models import Tag
+
+
+class ImportCsvTest(TestCase):
+    """Импорт тегов: обмен названиями и ошибки с номером записи."""
+
+    @classmethod
+    def setUpTestData(cls):
+        Tag.objects.bulk_create(
+            Tag(name=name, slug=slug) for name, slug in (
+                ('Завтрак', 'breakfast'),
+                ('Обед', 'lunch'),
+                ('Ужин', 'dinner'),
+            )
+        )
+
+    def setUp(self):
+        self.directory = Path(tempfile.mkdtemp())
+        self.addCleanup(shutil.rmtree, self.directory, ignore_errors=True)
+        self.ingredients = self.write(
+            'ingredients.csv', 'name,measurement_unit\nСахар,г\n'
+        )
+
+    def write(self, name, content):
+        path = self.directory / name
+        path.write_text(content, encoding='utf-8')
+        return path
+
+    def import_tags(self, content, **options):
+        call_command(
+            'import_csv', ingredients=self.ingredients,
+            tags=self.write('tags.csv', content), stdout=StringIO(),
+            **options,
+        )
+
+    def get_tags(self):
+        return dict(Tag.objects.values_list('slug', 'name'))
+
+    def test_names_swapped(self):
+        self.import_tags(
+            'name,slug\nОбед,breakfast\nЗавтрак,lunch\n'
+            'Полдник,dinner\nУжин,supper\n',
+            chunk_size=2,
+        )
+        self.assertEqual(self.get_tags(), {
+            'breakfast': 'Обед',
+            'lunch': 'Завтрак',
+            'dinner': 'Полдник',
+            'supper': 'Ужин',
+        })
+
+    def test_name_conflicts(self):
+        for content, message in (
+            ('name,slug\nОбед,breakfast\n', 'запись 1: название Обед'),
+            (
+                'name,slug\nСнэк,snack\nЗавтрак,brunch\n',
+                'запись 2: название Завтрак',
+            ),
+            (
+                'name,slug\nСнэк,snack\nСнэк,brunch\n',
+                'запись 2: название Снэк уже указано в записи 1',
+            ),
+        ):
+            with self.subTest(content=content):
+                with self.assertRaisesMessage(CommandError, message):
+                    self.import_tags(content)
+        self.assertEqual(len(self.get_tags()), 3)
+
+    def test_malformed_csv(self):
+        limit = csv.field_size_limit(20)
+        self.addCleanup(csv.field_size_limit, limit)
+        with self.assertRaisesMessage(CommandError, 'строка 3:'):
+            self.import_tags(
+                f'name,slug\nПолдник,lunch\n{"Я" * 30},long\n',
+                chunk_size=1,
+            )
+        self.assertEqual(self.get_tags()['lunch'], 'Обед')
@@ -0,0 +1,119 @@
+from django.core.cache import cache
+from django.test import TestCase
+from rest_framework.test import APIClient
+
+from recipes.models import Ingredient, IngredientInRecipe, Recipe
+from users.models import User
+
+
+URL = '/api/recipes/match/'
+
+
+class RecipeMatchTest(TestCase):
+    """Подбор рецептов по имеющимся ингредиентам и обновление индекса."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user(
+            email='author@example.com', username='author',
+            first_name='author', last_name='author', password='password',
+        )
+        cls.ingredients = {
+            name: Ingredient.objects.create(name=name, measurement_unit='г')
+            for name in ('Мука', 'Сахар', 'Соль', 'Вода')
+        }
+        cls.recipes = {
+            name: cls.create_recipe(name, cooking_time, ingredients)
+            for name, cooking_time, ingredients in (
+                ('Блины', 10, ('Мука', 'Сахар')),
+                ('Пирог', 20, ('Мука', 'Сахар', 'Соль')),
+                ('Лепешки', 5, ('Мука', 'Соль')),
+                ('Рассол', 1, ('Соль', 'Вода')),
+            )
+        }
+
+    @classmethod
+    def create_recipe(cls, name, cooking_time, ingredients):
+        recipe = Recipe.objects.create(
+            author=cls.author, name=name, text='Описание',
+            cooking_time=cooking_time, image='',
+        )
+        for ingredient in ingredients:
+            cls.add_ingredient(recipe, ingredient)
+        return recipe
+
+    @classmethod
+    def add_ingredient(cls, recipe, name):
+        IngredientInRecipe.objects.create(
+            recipe=recipe, ingredient=cls.ingredients[name], amount=100
+        )
+
+    def setUp(self):
+        cache.clear()
+
+    def match(self, *names, **params):
+        response = APIClient().get(URL, {
+            'ingredients': ','.join(
+                str(self.ingredients[name].pk) for name in names
+            ),
+            **params,
+        })
+        self.assertEqual(response.status_code, 200)
+        return [
+            (recipe['name'], recipe['match_ratio'])
+            for recipe in response.json()['results']
+        ]
+
+    def test_ordering(self):
+        self.assertEqual(self.match('Мука', 'Сахар'), [
+            ('Блины', 1.0), ('Пирог', 0.667), ('Лепешки', 0.5),
+        ])
+
+    def test_missing_ingredients(self):
+        response = APIClient().get(URL, {
+            'ingredients': self.ingredients['Мука'].pk, 'max_missing': 1,
+        })
+        self.assertEqual(
+            [
+                (recipe['name'], recipe['missing_ingredients'])
+                for recipe in response.json()['results']
+            ],
+            [
+                ('Лепешки', [self.ingredients['Соль'].pk]),
+                ('Блины', [self.ingredients['Сахар'].pk]),
+            ],
+        )
+
+    def test_max_missing(self):
+        self.assertEqual(
+            self.match('Мука', 'Сахар', max_missing=0), [('Блины', 1.0)]
+        )
+
+    def test_max_cooking_time(self):
+        self.assertEqual(
+            self.match('Мука', 'Сахар', max_cooking_time=15),
+            [('Блины', 1.0), ('Лепешки', 0.5)],
+        )
+
+    def test_index_after_edit_and_delete(self):
+        self.assertEqual(len(self.match('Мука', 'Сахар')), 3)
+        with self.captureOnCommitCallbacks(execute=True):
+            recipe = self.recipes['Лепешки']
+            recipe.ingredients.remove(self.ingredients['Соль'])
+            self.add_ingredient(recipe, 'Сахар')
+            recipe.save()
+            self.recipes['Пирог'].delete()
+        self.assertEqual(self.match('Мука', 'Сахар'), [
+            ('Лепешки', 1.0), ('Блины', 1.0),
+        ])
+
+    def test_invalid_params(self):
+        for params in (
+            {},
+            {'ingredients': 'мука'},
+            {'ingredients': '1', 'max_missing': -1},
+        ):
+            with self.subTest(params=params):
+                self.assertEqual(
+                    APIClient().get(URL, params).status_code, 400
+                )
@@ -0,0 +1,60 @@
+from django.db import connection
+from django.db.migrations.executor import MigrationExecutor
+from django.test import TransactionTestCase
+
+
+class DuplicateCleanupMigrationTest(TransactionTestCase):
+    """
+    Миграция 0009 удаляет повторное избранное и рецепты в списке
+    покупок и пересчитывает счетчики и суммы ингредиентов по оставшимся.
+    """
+    migrate_from = [('recipes', '0008_recipe_search')]
+    migrate_to = [('recipes', '0009_hot_path_indexes')]
+
+    def migrate(self, targets):
+        executor = MigrationExecutor(connection)
+        executor.loader.build_graph()
+        executor.migrate(targets)
+        return executor.loader.project_state(targets).apps
+
+    def tearDown(self):
+        executor = MigrationExecutor(connection)
+        executor.migrate(executor.loader.graph.leaf_nodes())
+
+    def test_counters_and_totals_recalculated(self):
+        apps = self.migrate(self.migrate_from)
+        user = apps.get_model('users', 'User').objects.create(
+            email='user@example.com', username='user',
+            first_name='user', last_name='user',
+        )
+        ingredient = apps.get_model('recipes', 'Ingredient').objects.create(
+            name='Сахар', measurement_unit='г'
+        )
+        recipe = apps.get_model('recipes', 'Recipe').objects.create(
+            author=user, name='Рецепт', text='Описание', cooking_time=10,
+            image='recipes/images/recipe.png', favorites_count=2,
+            shopping_count=2,
+        )
+        apps.get_model('recipes', 'IngredientInRecipe').objects.create(
+            recipe=recipe, ingredient=ingredient, amount=5
+        )
+        for model_name in ('Favorite', 'RecipesInShoppingList'):
+            apps.get_model('recipes', model_name).objects.bulk_create(
+                apps.get_model('recipes', model_name)(
+                    user=user, recipe=recipe
+                )
+                for _ in range(2)
+            )
+        apps.get_model('recipes', 'ShoppingListIngredient').objects.create(
+            user=user, ingredient=ingredient, total=10
+        )
+
+        apps = self.migrate(self.migrate_to)
+        recipe = apps.get_model('recipes', 'Recipe').objects.get()
+        self.assertEqual(recipe.favorites_count, 1)
+        self.assertEqual(recipe.shopping_count, 1)
+        self.assertEqual(
+            apps.get_model('recipes', 'ShoppingListIngredient')
+            .objects.get().total,
+            5,
+        )
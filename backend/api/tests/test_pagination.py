@@ -0,0 +1,22 @@
+from django.test import TestCase
+from rest_framework.test import APIClient
+
+
+class RecipeCursorTest(TestCase):
+    """Курсор ленты рецептов нельзя совместить с поиском."""
+
+    def test_cursor_with_search_rejected(self):
+        for url in ('/api/recipes/', '/api/async/recipes/'):
+            with self.subTest(url=url):
+                response = APIClient().get(
+                    url, {'cursor': '', 'search': 'борщ'}
+                )
+                self.assertEqual(response.status_code, 400)
+                self.assertIn('cursor', response.json())
+
+    def test_cursor_with_blank_search_allowed(self):
+        response = APIClient().get(
+            '/api/recipes/', {'cursor': '', 'search': ' '}
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json(), {'next': None, 'results': []})
@@ -0,0 +1,122 @@
+from io import StringIO
+import shutil
+import tempfile
+
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+
+from recipes.catalog import get_catalog
+from recipes.models import Ingredient, RecipesInShoppingList, Tag
+from users.models import Subscription, User
+
+
+MEDIA_ROOT = tempfile.mkdtemp()
+
+
+@override_settings(MEDIA_ROOT=MEDIA_ROOT)
+class QueryCountTestCase(TestCase):
+    """
+    Базовый класс проверки количества SQL-запросов: данные создаются
+    командой generate_fixtures, изображения — во временной папке.
+    Справочники загружаются в память процесса до замера.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        Tag.objects.bulk_create(
+            Tag(name=f'Тег {number}', slug=f'tag-{number}')
+            for number in range(5)
+        )
+        Ingredient.objects.bulk_create(
+            Ingredient(name=f'Ингредиент {number}', measurement_unit='г')
+            for number in range(60)
+        )
+        call_command(
+            'generate_fixtures', users=20, recipes=120, favorites=10,
+            cart=8, subscriptions=6, stdout=StringIO(),
+        )
+        cls.user = User.objects.filter(
+            subscriptions__isnull=False, shopping_lists__isnull=False,
+        ).order_by('id').first()
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(MEDIA_ROOT, ignore_errors=True)
+
+    def setUp(self):
+        cache.clear()
+        get_catalog()
+        self.anonymous = APIClient()
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def count_queries(self, client, url):
+        """Функция выполнения запроса с чтением всего ответа."""
+        with CaptureQueriesContext(connection) as context:
+            response = client.get(url)
+            if response.streaming:
+                b''.join(response.streaming_content)
+        self.assertEqual(response.status_code, 200, url)
+        return len(context.captured_queries)
+
+
+class RecipeQueriesTest(QueryCountTestCase):
+    """Количество запросов ленты и рецепта не зависит от объема данных."""
+
+    def test_list_anonymous(self):
+        for limit in (4, 20, 50):
+            with self.subTest(limit=limit):
+                self.assertEqual(self.count_queries(
+                    self.anonymous, f'/api/recipes/?limit={limit}'
+                ), 4)
+
+    def test_list_authenticated(self):
+        for limit in (4, 20, 50):
+            with self.subTest(limit=limit):
+                self.assertEqual(self.count_queries(
+                    self.client, f'/api/recipes/?limit={limit}'
+                ), 5)
+
+    def test_detail(self):
+        recipe_id = RecipesInShoppingList.objects.filter(
+            user=self.user
+        ).values_list('recipe_id', flat=True).first()
+        self.assertEqual(self.count_queries(
+            self.anonymous, f'/api/recipes/{recipe_id}/'
+        ), 4)
+        self.assertEqual(self.count_queries(
+            self.client, f'/api/recipes/{recipe_id}/'
+        ), 4)
+
+    def test_download_shopping_cart(self):
+        for format in ('txt', 'csv', 'pdf'):
+            with self.subTest(format=format):
+                self.assertEqual(self.count_queries(
+                    self.client,
+                    f'/api/recipes/download_shopping_cart/?format={format}',
+                ), 1)
+
+
+class SubscriptionQueriesTest(QueryCountTestCase):
+    """
+    Страница подписок с превью рецептов всех авторов читается
+    тремя запросами при любом количестве авторов и рецептов.
+    """
+
+    def test_subscriptions(self):
+        self.assertGreater(
+            Subscription.objects.filter(user=self.user).count(), 2
+        )
+        for url in (
+            '/api/users/subscriptions/?limit=1',
+            '/api/users/subscriptions/',
+            '/api/users/subscriptions/?recipes_limit=2',
+            '/api/users/subscriptions/?limit=20&recipes_limit=3',
+        ):
+            with self.subTest(url=url):
+                self.assertEqual(self.count_queries(self.client, url), 3)
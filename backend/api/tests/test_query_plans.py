@@ -0,0 +1,32 @@
+from io import StringIO
+
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.db import connection
+
+from api.tests.test_queries import QueryCountTestCase
+
+
+class QueryPlanTest(QueryCountTestCase):
+    """
+    Лента рецептов, рецепты автора и проверки избранного и списка
+    покупок используют индексы (команда check_query_plans). Данных
+    достаточно, чтобы после ANALYZE планировщик выбирал индексы сам.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        call_command(
+            'generate_fixtures', users=200, recipes=3000, favorites=20,
+            cart=10, subscriptions=5, stdout=StringIO(),
+        )
+        with connection.cursor() as cursor:
+            cursor.execute('ANALYZE')
+
+    def test_hot_queries_use_indexes(self):
+        stdout = StringIO()
+        try:
+            call_command('check_query_plans', stdout=stdout)
+        except CommandError as error:
+            self.fail(f'{error}\n{stdout.getvalue()}')
@@ -0,0 +1,82 @@
+from django.core.cache import cache
+from django.test import TestCase
+from rest_framework.test import APIClient
+
+from recipes.models import Ingredient, IngredientInRecipe, Recipe
+from users.models import User
+
+
+URL = '/api/recipes/'
+
+
+class RecipeSearchTest(TestCase):
+    """Полнотекстовый поиск рецептов и обновление поискового индекса."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user(
+            email='author@example.com', username='author',
+            first_name='author', last_name='author', password='password',
+        )
+        cls.ingredient = Ingredient.objects.create(
+            name='Клубника', measurement_unit='г'
+        )
+
+    def setUp(self):
+        cache.clear()
+
+    def create_recipe(self, name, text='Описание', ingredient=None):
+        with self.captureOnCommitCallbacks(execute=True):
+            recipe = Recipe.objects.create(
+                author=self.author, name=name, text=text, cooking_time=10,
+                image='',
+            )
+            if ingredient is not None:
+                IngredientInRecipe.objects.create(
+                    recipe=recipe, ingredient=ingredient, amount=100
+                )
+                recipe.save()
+        return recipe
+
+    def search(self, value):
+        response = APIClient().get(URL, {'search': value})
+        self.assertEqual(response.status_code, 200)
+        return [recipe['name'] for recipe in response.json()['results']]
+
+    def test_ranking(self):
+        self.create_recipe('Торт', text='Украсить клубникой')
+        self.create_recipe('Пирог', ingredient=self.ingredient)
+        self.create_recipe('Клубника со сливками')
+        self.assertEqual(
+            self.search('клубника'),
+            ['Клубника со сливками', 'Пирог'],
+        )
+        self.create_recipe('Варенье', text='Клубника и сахар')
+        self.assertEqual(
+            self.search('клубника'),
+            ['Клубника со сливками', 'Пирог', 'Варенье'],
+        )
+
+    def test_prefix_match(self):
+        self.create_recipe('Клубничный пирог')
+        self.assertEqual(self.search('клубн'), ['Клубничный пирог'])
+        self.assertEqual(self.search('пиро клуб'), ['Клубничный пирог'])
+        self.assertEqual(self.search('торт'), [])
+
+    def test_removed_on_delete(self):
+        recipe = self.create_recipe('Клубника со сливками')
+        self.assertEqual(self.search('клубника'), ['Клубника со сливками'])
+        with self.captureOnCommitCallbacks(execute=True):
+            recipe.delete()
+        self.assertEqual(self.search('клубника'), [])
+
+    def test_reindexed_on_ingredient_rename_and_delete(self):
+        self.create_recipe('Пирог', ingredient=self.ingredient)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.ingredient.name = 'Малина'
+            self.ingredient.save()
+        self.assertEqual(self.search('клубника'), [])
+        self.assertEqual(self.search('малина'), ['Пирог'])
+        with self.captureOnCommitCallbacks(execute=True):
+            self.ingredient.delete()
+        self.assertEqual(self.search('малина'), [])
@@ -0,0 +1,42 @@
+from django.core.cache import cache
+from django.test import TestCase
+from rest_framework.test import APIClient
+
+from recipes.models import Recipe
+from users.models import Subscription, User
+
+
+class RecipeListAuthorTest(TestCase):
+    """Автор в ленте рецептов совпадает с профилем пользователя."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user(
+            email='author@example.com', username='author',
+            first_name='author', last_name='author', password='password',
+            avatar='users/avatar.png',
+        )
+        cls.user = User.objects.create_user(
+            email='user@example.com', username='user',
+            first_name='user', last_name='user', password='password',
+        )
+        Subscription.objects.create(user=cls.user, following=cls.author)
+        for number in range(2):
+            Recipe.objects.create(
+                author=cls.author, name=f'Рецепт {number}', text='Описание',
+                cooking_time=10, image='',
+            )
+
+    def setUp(self):
+        cache.clear()
+
+    def test_author_matches_profile(self):
+        authenticated = APIClient()
+        authenticated.force_authenticate(self.user)
+        for client in (APIClient(), authenticated):
+            with self.subTest(authenticated=client is authenticated):
+                recipes = client.get('/api/recipes/').json()['results']
+                profile = client.get(f'/api/users/{self.author.pk}/').json()
+                self.assertEqual(len(recipes), 2)
+                for recipe in recipes:
+                    self.assertEqual(recipe['author'], profile)
@@ -0,0 +1,118 @@
+from io import StringIO
+
+from django.contrib.admin import site
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import TestCase
+from rest_framework.test import APIClient
+
+from recipes.admin import IngredientInRecipeAdmin
+from recipes.models import (
+    Ingredient,
+    IngredientInRecipe,
+    Recipe,
+    RecipesInShoppingList,
+    ShoppingListIngredient,
+)
+from users.models import User
+
+
+URL = '/api/recipes/download_shopping_cart/'
+
+
+class ShoppingListExportTest(TestCase):
+    """Сохраненные выгрузки списка покупок и ответы с ошибками."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(
+            email='user@example.com', username='user',
+            first_name='user', last_name='user', password='password',
+        )
+        cls.ingredient = Ingredient.objects.create(
+            name='Сахар', measurement_unit='г'
+        )
+        ShoppingListIngredient.objects.create(
+            user=cls.user, ingredient=cls.ingredient, total=100
+        )
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def download(self):
+        response = self.client.get(URL, {'format': 'txt'})
+        self.assertEqual(response.status_code, 200)
+        return b''.join(response.streaming_content).decode()
+
+    def test_ingredient_change_resets_export(self):
+        self.assertEqual(self.download(), 'Сахар (г) — 100\n')
+        with self.captureOnCommitCallbacks(execute=True):
+            self.ingredient.measurement_unit = 'кг'
+            self.ingredient.save()
+        self.assertEqual(self.download(), 'Сахар (кг) — 100\n')
+
+    def test_rebuild_resets_export(self):
+        self.assertEqual(self.download(), 'Сахар (г) — 100\n')
+        call_command('rebuild_shopping_lists', stdout=StringIO())
+        self.assertEqual(self.download(), '')
+
+    def test_error_content_type(self):
+        for export_format in ('txt', 'csv', 'pdf'):
+            with self.subTest(format=export_format):
+                response = APIClient().get(URL, {'format': export_format})
+                self.assertEqual(response.status_code, 401)
+                self.assertEqual(
+                    response['Content-Type'], 'application/json; charset=utf-8'
+                )
+                self.assertIn('detail', response.json())
+
+
+class ShoppingListTotalsTest(TestCase):
+    """Суммы ингредиентов списка покупок при расхождениях и правках."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(
+            email='user@example.com', username='user',
+            first_name='user', last_name='user', password='password',
+        )
+        cls.sugar, cls.salt = (
+            Ingredient.objects.create(name=name, measurement_unit='г')
+            for name in ('Сахар', 'Соль')
+        )
+        cls.recipe = Recipe.objects.create(
+            author=cls.user, name='Рецепт', text='Описание',
+            cooking_time=10, image='recipes/images/recipe.png',
+        )
+        cls.amount = IngredientInRecipe.objects.create(
+            recipe=cls.recipe, ingredient=cls.sugar, amount=10
+        )
+        RecipesInShoppingList.objects.create(
+            user=cls.user, recipe=cls.recipe
+        )
+
+    def get_totals(self):
+        return dict(ShoppingListIngredient.objects.values_list(
+            'ingredient__name', 'total'
+        ))
+
+    def test_removal_below_zero_deletes_total(self):
+        ShoppingListIngredient.objects.update(total=5)
+        client = APIClient()
+        client.force_authenticate(self.user)
+        response = client.delete(
+            f'/api/recipes/{self.recipe.pk}/shopping_cart/'
+        )
+        self.assertEqual(response.status_code, 204)
+        self.assertEqual(self.get_totals(), {})
+
+    def test_admin_edit_updates_totals(self):
+        model_admin = IngredientInRecipeAdmin(IngredientInRecipe, site)
+        amount = IngredientInRecipe.objects.get(pk=self.amount.pk)
+        amount.ingredient, amount.amount = self.salt, 3
+        model_admin.save_model(None, amount, None, True)
+        self.assertEqual(self.get_totals(), {'Соль': 3})
+        model_admin.delete_model(None, amount)
+        self.assertEqual(self.get_totals(), {})
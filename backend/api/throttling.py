@@ -0,0 +1,171 @@
+import threading
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.exceptions import ImproperlyConfigured
+from rest_framework.settings import api_settings
+from rest_framework.throttling import (
+    AnonRateThrottle,
+    SimpleRateThrottle,
+    UserRateThrottle,
+)
+
+from recipes.cache import LocalCache
+
+
+WINDOW_KEY = '{}:{}'
+LOCAL_SIZE = 10000
+LOCAL_TIMEOUT = 24 * 60 * 60
+LOCAL_RATIO = 0.5
+LOCAL_BATCH_RATIO = 0.1
+
+_windows = LocalCache(LOCAL_SIZE, LOCAL_TIMEOUT)
+_lock = threading.Lock()
+
+
+class WindowState:
+    """Известные процессу счетчики окна и зарезервированные запросы."""
+    __slots__ = ('index', 'current', 'previous', 'lease')
+
+    def __init__(self, index):
+        self.index = index
+        self.current = 0
+        self.previous = None
+        self.lease = 0
+
+    def estimate(self, weight):
+        return self.current + (self.previous or 0) * weight
+
+
+class SharedRateThrottle(SimpleRateThrottle):
+    """
+    Ограничение частоты запросов скользящим окном по счетчикам в общем
+    кеше. Счетчик текущего окна увеличивается атомарно (cache.incr),
+    количество запросов оценивается как текущее окно плюс часть
+    предыдущего.
+
+    Пока оценка ниже LOCAL_RATIO лимита, процесс вместе с запросом
+    резервирует в общем счетчике пачку следующих запросов и пропускает
+    их без обращения к кешу. Зарезервированные запросы уже учтены
+    в счетчике, поэтому лимит не превышается при любом числе процессов;
+    неиспользованный резерв возвращается при смене окна.
+    """
+
+    def get_rate(self):
+        try:
+            return api_settings.DEFAULT_THROTTLE_RATES[self.scope]
+        except KeyError:
+            raise ImproperlyConfigured(
+                f'Не задано ограничение запросов для {self.scope}'
+            )
+
+    def get_window_key(self, index):
+        return WINDOW_KEY.format(self.key, index)
+
+    def get_batch_size(self):
+        """
+        Функция получения размера резерва процесса: резервы всех
+        WORKER_PROCESSES процессов вместе не больше LOCAL_BATCH_RATIO
+        лимита. Для малых лимитов (recipe_create, скачивание списка
+        покупок) резерв нулевой и каждый запрос считается в общем кеше.
+        """
+        return int(
+            self.num_requests * LOCAL_BATCH_RATIO / settings.WORKER_PROCESSES
+        )
+
+    def add(self, index, amount):
+        """Функция атомарного увеличения счетчика окна в общем кеше."""
+        key = self.get_window_key(index)
+        cache.add(key, 0, self.duration * 2)
+        try:
+            return cache.incr(key, amount)
+        except ValueError:
+            cache.set(key, amount, self.duration * 2)
+            return amount
+
+    def release(self, index, amount):
+        """Функция возврата неиспользованного резерва в счетчик окна."""
+        try:
+            return cache.decr(self.get_window_key(index), amount)
+        except ValueError:
+            return 0
+
+    def allow_request(self, request, view):
+        if self.rate is None:
+            return True
+        self.key = self.get_cache_key(request, view)
+        if self.key is None:
+            return True
+        now = self.timer()
+        index = int(now // self.duration)
+        self.weight = 1 - now % self.duration / self.duration
+        released = 0
+        with _lock:
+            state = _windows.get(self.key)
+            if state is not None and state.index == index and state.lease:
+                state.lease -= 1
+                return True
+            if state is None or state.index != index:
+                if state is not None:
+                    released, state.lease = state.lease, 0
+                    stale_index = state.index
+                state = WindowState(index)
+                _windows.set(self.key, state)
+            estimate = state.estimate(self.weight)
+        if released:
+            self.release(stale_index, released)
+        batch = self.get_batch_size()
+        if estimate + 1 + batch > self.num_requests * LOCAL_RATIO:
+            batch = 0
+        self.current = self.add(index, 1 + batch)
+        self.previous = state.previous
+        if self.previous is None:
+            self.previous = cache.get(self.get_window_key(index - 1), 0)
+        granted = max(0, min(1 + batch, int(
+            self.num_requests - self.previous * self.weight
+            - (self.current - 1 - batch)
+        )))
+        if granted < 1 + batch:
+            self.release(index, 1 + batch - granted)
+            self.current -= 1 + batch - granted
+        with _lock:
+            state.current = self.current
+            state.previous = self.previous
+            state.lease += max(0, granted - 1)
+        return granted > 0 or self.throttle_failure()
+
+    def wait(self):
+        available = self.num_requests - self.current
+        if available > 0 and self.previous:
+            return max(
+                0.0, (self.weight - available / self.previous) * self.duration
+            )
+        return self.weight * self.duration
+
+
+class SharedAnonRateThrottle(SharedRateThrottle, AnonRateThrottle):
+    """Ограничение запросов анонимных пользователей по IP-адресу."""
+
+
+class SharedUserRateThrottle(SharedRateThrottle, UserRateThrottle):
+    """Ограничение запросов пользователей (анонимных — по IP-адресу)."""
+
+
+class SharedScopedRateThrottle(SharedUserRateThrottle):
+    """
+    Отдельное ограничение для действий представления:
+    throttle_scopes = {действие: область ограничения}.
+    """
+
+    def __init__(self):
+        self.rate = None
+
+    def allow_request(self, request, view):
+        self.scope = getattr(view, 'throttle_scopes', {}).get(
+            getattr(view, 'action', None)
+        )
+        if not self.scope:
+            return True
+        self.rate = self.get_rate()
+        self.num_requests, self.duration = self.parse_rate(self.rate)
+        return super().allow_request(request, view)
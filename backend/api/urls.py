@@ -1,8 +1,16 @@
+from django.conf import settings
 from django.urls import include, path
 from rest_framework.routers import DefaultRouter
 
+from api.async_views import (
+    ingredient_list,
+    recipe_detail,
+    recipe_list,
+    tag_list,
+)
 from api.views import (
     IngredientViewSet,
+    MetricsView,
     RecipeRedirectView,
     RecipeViewSet,
     TagViewSet,
@@ -25,8 +33,22 @@ urlpatterns = [
     path('auth/', include('djoser.urls')),
     path('auth/', include('djoser.urls.authtoken')),
     path(
-        's/<int:pk>/',
+        's/<str:code>/',
         RecipeRedirectView.as_view({'get': 'link_redirect'}),
         name='short-link'
     ),
+    path('internal/metrics/', MetricsView.as_view(), name='metrics'),
+    path('async/recipes/', recipe_list, name='async-recipes-list'),
+    path(
+        'async/recipes/<int:pk>/',
+        recipe_detail,
+        name='async-recipes-detail',
+    ),
+    path('async/tags/', tag_list, name='async-tags-list'),
+    path(
+        'async/ingredients/', ingredient_list, name='async-ingredients-list'
+    ),
 ]
+
+if settings.AUTH_JWT:
+    urlpatterns.append(path('auth/', include('djoser.urls.jwt')))
@@ -1,19 +1,32 @@
-from django.http import HttpResponse
+from django.conf import settings
+from django.http import Http404, StreamingHttpResponse
 from django.shortcuts import get_object_or_404, redirect
 from django.urls import reverse
+from django.utils import timezone
+from django.utils.cache import patch_cache_control
 from django_filters.rest_framework import DjangoFilterBackend
 from rest_framework import mixins, status, viewsets
 from rest_framework.decorators import action
 from rest_framework.permissions import AllowAny, IsAuthenticated
 from rest_framework.response import Response
+from rest_framework.views import APIView
 
+from api.cache import CachedResponseMixin, get_recipes_modified
 from api.filters import IngredientFilter, RecipeFilter
-from api.pagination import CustomPageNumberPagination
-from api.permissions import IsAuthorOrReadOnly
+from api.metrics import registry
+from api.pagination import RecipePagination, UserPagination
+from api.permissions import IsAuthorOrReadOnly, IsMetricsClient
+from api.renderers import (
+    CsvShoppingListRenderer,
+    PdfShoppingListRenderer,
+    PrometheusRenderer,
+    TxtShoppingListRenderer,
+)
 from api.serializers.recipes import (
     IngredientSerializer,
     MiniRecipeSerializer,
     ReadRecipeSerializer,
+    RecipeMatchSerializer,
     RecipeSerializer,
     TagSerializer,
 )
@@ -28,6 +41,10 @@ from api.serializers.users import (
     ReadUserSerializer,
 )
 from api.shopping_list import CreateShoppingList
+from recipes.cache import RECIPES_VERSION_KEY
+from recipes.catalog import CATALOG_VERSION_KEY, get_catalog
+from recipes.links import make_code, parse_code, recipe_exists
+from recipes.matching import match_recipes
 from recipes.models import (
     Favorite,
     Ingredient,
@@ -44,32 +61,114 @@ class ListRetrieveViewSet(
     """Класс для наследования. Возвращает список объектов или объект."""
 
 
-class IngredientViewSet(ListRetrieveViewSet):
+class CatalogViewSet(ListRetrieveViewSet):
+    """
+    Класс для наследования. Возвращает объекты справочника из памяти
+    процесса; при переданных параметрах фильтрации обращается к базе.
+    """
+    catalog_field = None
+
+    def is_filtered(self):
+        """Функция проверки наличия параметров фильтрации в запросе."""
+        filterset_class = getattr(self, 'filterset_class', None)
+        return filterset_class is not None and any(
+            self.request.query_params.get(name)
+            for name in filterset_class.base_filters
+        )
+
+    def list(self, request, *args, **kwargs):
+        """Функция получения списка объектов справочника."""
+        if self.is_filtered():
+            return super().list(request, *args, **kwargs)
+        serializer = self.get_serializer(
+            getattr(get_catalog(), self.catalog_field),
+            many=True,
+        )
+        return Response(serializer.data)
+
+    def get_object(self):
+        """Функция получения объекта справочника по id."""
+        objects = getattr(get_catalog(), f'{self.catalog_field}_by_id')
+        try:
+            obj = objects[int(self.kwargs[self.lookup_field])]
+        except (KeyError, ValueError):
+            raise Http404
+        self.check_object_permissions(self.request, obj)
+        return obj
+
+
+class IngredientViewSet(CachedResponseMixin, CatalogViewSet):
     """Вьюсет для ингредиентов."""
+    cache_version_keys = (CATALOG_VERSION_KEY,)
     queryset = Ingredient.objects.all()
+    catalog_field = 'ingredients'
     serializer_class = IngredientSerializer
     filterset_class = IngredientFilter
     filter_backends = (DjangoFilterBackend,)
 
+    def filter_queryset(self, queryset):
+        """Функция фильтрации с ограничением числа результатов поиска."""
+        queryset = super().filter_queryset(queryset)
+        if self.action == 'list' and self.request.query_params.get('name'):
+            return queryset[:settings.INGREDIENT_SEARCH_LIMIT]
+        return queryset
 
-class TagViewSet(ListRetrieveViewSet):
+
+class TagViewSet(CachedResponseMixin, CatalogViewSet):
     """Вьюсет для тегов."""
+    cache_version_keys = (CATALOG_VERSION_KEY,)
     queryset = Tag.objects.all()
+    catalog_field = 'tags'
     serializer_class = TagSerializer
 
 
-class RecipeViewSet(viewsets.ModelViewSet):
+class RecipeViewSet(CachedResponseMixin, viewsets.ModelViewSet):
     """Вьюсет для рецептов."""
+    cache_version_keys = (RECIPES_VERSION_KEY, CATALOG_VERSION_KEY)
     queryset = Recipe.objects.all()
-    pagination_class = CustomPageNumberPagination
+    pagination_class = RecipePagination
     filter_backends = (DjangoFilterBackend,)
     filterset_class = RecipeFilter
     permission_classes = (IsAuthorOrReadOnly,)
     serializer_class = RecipeSerializer
+    throttle_scopes = {
+        'create': 'recipe_create',
+        'download_shopping_cart': 'shopping_cart_download',
+    }
+
+    def get_queryset(self):
+        """Функция получения рецептов, подготовленных для чтения."""
+        queryset = super().get_queryset()
+        if self.action in ('list', 'retrieve', 'match'):
+            queryset = queryset.for_read(self.request.user)
+        return queryset
+
+    def paginate_queryset(self, queryset):
+        """
+        Функция получения страницы рецептов; запоминает время изменения
+        рецептов страницы для заголовка Last-Modified.
+        """
+        page = super().paginate_queryset(queryset)
+        if self.action == 'list':
+            self.page_modified = max(
+                (recipe.updated_at for recipe in page or ()), default=None
+            )
+        return page
+
+    def get_last_modified(self, data):
+        """Функция получения времени изменения рецепта или страницы."""
+        if self.action == 'list':
+            return self.page_modified or timezone.now()
+        return get_recipes_modified(data)
 
     def get_permissions(self):
         """Функция выбора прав доступа."""
-        if self.action in ('create', 'shopping_cart', 'favorite'):
+        if self.action in (
+            'create',
+            'shopping_cart',
+            'favorite',
+            'download_shopping_cart',
+        ):
             return (IsAuthenticated(),)
         if self.action in ('update', 'partial_update', 'destroy'):
             return (IsAuthorOrReadOnly(),)
@@ -77,12 +176,19 @@ class RecipeViewSet(viewsets.ModelViewSet):
 
     def get_serializer_class(self):
         """Функция выбора сериализатора."""
-        if self.action in ('list', 'retrieve'):
+        if self.action in ('list', 'retrieve', 'match'):
             return ReadRecipeSerializer
         if self.action in ('create', 'update', 'partial_update'):
             return RecipeSerializer
         return super().get_serializer()
 
+    def get_serializer_context(self):
+        """Функция выбора размера изображений для ленты рецептов."""
+        context = super().get_serializer_context()
+        if self.action in ('list', 'match'):
+            context['thumbnail_size'] = 'medium'
+        return context
+
     def get_serializer(self, *args, **kwargs):
         if self.action in ('update', 'partial_update'):
             kwargs['partial'] = False
@@ -92,6 +198,23 @@ class RecipeViewSet(viewsets.ModelViewSet):
         """Функция сохраняет рецепт устанавливая пользователя автором."""
         serializer.save(author=self.request.user)
 
+    def perform_update(self, serializer):
+        """Функция сохраняет рецепт и сбрасывает выгрузки списков покупок."""
+        super().perform_update(serializer)
+        CreateShoppingList.invalidate(
+            *serializer.instance.in_shopping_lists.values_list(
+                'user_id', flat=True
+            )
+        )
+
+    def perform_destroy(self, instance):
+        """Функция удаляет рецепт и сбрасывает выгрузки списков покупок."""
+        user_ids = list(
+            instance.in_shopping_lists.values_list('user_id', flat=True)
+        )
+        super().perform_destroy(instance)
+        CreateShoppingList.invalidate(*user_ids)
+
     @action(
         detail=True,
         methods=['get'],
@@ -103,7 +226,7 @@ class RecipeViewSet(viewsets.ModelViewSet):
         recipe = self.get_object()
         short_link = reverse(
             'short-link',
-            kwargs={'pk': recipe.pk}
+            kwargs={'code': make_code(recipe.pk)}
         )
         full_short_link = request.build_absolute_uri(short_link)
         return Response(
@@ -111,6 +234,47 @@ class RecipeViewSet(viewsets.ModelViewSet):
             status=status.HTTP_200_OK,
         )
 
+    @action(
+        detail=False,
+        methods=['get'],
+        permission_classes=(AllowAny,),
+    )
+    def match(self, request):
+        """
+        Функция подбора рецептов по имеющимся ингредиентам.
+        Рецепты сортируются по доле имеющихся ингредиентов; для каждого
+        возвращаются эта доля и id недостающих ингредиентов.
+        """
+        params = RecipeMatchSerializer(data={
+            **request.query_params.dict(),
+            'ingredients': [
+                value
+                for values in request.query_params.getlist('ingredients')
+                for value in values.split(',') if value
+            ],
+        })
+        params.is_valid(raise_exception=True)
+        ingredients = set(params.validated_data['ingredients'])
+        page = self.paginate_queryset(match_recipes(
+            ingredients,
+            params.validated_data.get('max_missing'),
+            params.validated_data.get('max_cooking_time'),
+        ))
+        recipes = self.get_queryset().in_bulk(
+            [match.recipe_id for match in page]
+        )
+        page = [match for match in page if match.recipe_id in recipes]
+        data = self.get_serializer(
+            [recipes[match.recipe_id] for match in page], many=True
+        ).data
+        for recipe, match in zip(data, page):
+            recipe['match_ratio'] = round(match.ratio, 3)
+            recipe['missing_ingredients'] = [
+                ingredient['id'] for ingredient in recipe['ingredients']
+                if ingredient['id'] not in ingredients
+            ]
+        return self.get_paginated_response(data)
+
     @action(
         detail=True,
         methods=['post', 'delete'],
@@ -121,18 +285,16 @@ class RecipeViewSet(viewsets.ModelViewSet):
         recipe = self.get_object()
         user = self.request.user
         if request.method == 'POST':
-            if RecipesInShoppingList.objects.filter(
-                    recipe=recipe,
-                    user=user
-            ).exists():
+            _, created = RecipesInShoppingList.objects.get_or_create(
+                recipe=recipe,
+                user=user,
+            )
+            if not created:
                 return Response(
                     'Рецепт уже был добавлен в список покупок',
                     status=status.HTTP_400_BAD_REQUEST,
                 )
-            RecipesInShoppingList.objects.create(
-                recipe=recipe,
-                user=user,
-            )
+            CreateShoppingList.invalidate(user.pk)
             serializer = MiniRecipeSerializer(
                 recipe,
                 context={'request': request}
@@ -148,6 +310,7 @@ class RecipeViewSet(viewsets.ModelViewSet):
             ).first()
             if recipe_shop_list:
                 recipe_shop_list.delete()
+                CreateShoppingList.invalidate(user.pk)
                 return Response(
                     'Рецепт удален из списка покупок!',
                     status=status.HTTP_204_NO_CONTENT,
@@ -161,19 +324,24 @@ class RecipeViewSet(viewsets.ModelViewSet):
     @action(
         detail=False,
         methods=['get'],
-        permission_classes=(IsAuthenticated,)
+        permission_classes=(IsAuthenticated,),
+        renderer_classes=(
+            TxtShoppingListRenderer,
+            CsvShoppingListRenderer,
+            PdfShoppingListRenderer,
+        ),
     )
     def download_shopping_cart(self, request):
-        """Функция скачивания списка покупок в формате txt."""
-        shopping_list = CreateShoppingList.create_list(request.user)
-        responce = HttpResponse(
-            '\n'.join(shopping_list),
-            content_type='text/plain',
+        """Функция скачивания списка покупок в формате txt, csv или pdf."""
+        renderer = request.accepted_renderer
+        response = StreamingHttpResponse(
+            CreateShoppingList.stream(request.user, renderer),
+            content_type=renderer.media_type,
         )
-        responce['Content-Disposition'] = (
-            'attachment; filename="shopping_cart.txt"'
+        response['Content-Disposition'] = (
+            f'attachment; filename="shopping_cart.{renderer.format}"'
         )
-        return responce
+        return response
 
     @action(
         detail=True,
@@ -185,12 +353,14 @@ class RecipeViewSet(viewsets.ModelViewSet):
         recipe = self.get_object()
         user = self.request.user
         if request.method == 'POST':
-            if Favorite.objects.filter(user=user, recipe=recipe).exists():
+            _, created = Favorite.objects.get_or_create(
+                user=user, recipe=recipe
+            )
+            if not created:
                 return Response(
                     'Данный рецепт уже находится в избранном!',
                     status=status.HTTP_400_BAD_REQUEST,
                 )
-            Favorite.objects.create(user=user, recipe=recipe)
             serializer = MiniRecipeSerializer(
                 recipe,
                 context={'request': request}
@@ -221,7 +391,7 @@ class UserViewSet(viewsets.ModelViewSet):
     """Вьюсет для работы с пользователями."""
     queryset = User.objects.all()
     permission_classes = [AllowAny]
-    pagination_class = CustomPageNumberPagination
+    pagination_class = UserPagination
 
     def get_serializer_class(self):
         if self.action == 'create':
@@ -238,14 +408,18 @@ class UserViewSet(viewsets.ModelViewSet):
         """Функция добавления или удаления аватара текущего пользователя."""
         user = request.user
         if request.method == 'PUT':
-            serializer = AvatarSerializer(user, data=request.data)
+            serializer = AvatarSerializer(
+                user,
+                data=request.data,
+                context={'request': request},
+            )
             serializer.is_valid(raise_exception=True)
             serializer.save()
             return Response(serializer.data, status=status.HTTP_200_OK)
         elif request.method == 'DELETE':
-            user.avatar.delete()
+            user.avatar.delete(save=False)
             user.avatar = None
-            user.save()
+            user.save(update_fields=('avatar',))
             return Response(status=status.HTTP_204_NO_CONTENT)
 
     @action(
@@ -268,7 +442,9 @@ class UserViewSet(viewsets.ModelViewSet):
         """
         Функция отображения подписок пользователя на других пользователей.
         """
-        subscriptions = Subscription.objects.filter(user=request.user)
+        subscriptions = Subscription.objects.filter(
+            user=request.user
+        ).select_related('following')
         page = self.paginate_queryset(subscriptions)
         serializer = SubscriptionSerializer(
             page,
@@ -323,7 +499,7 @@ class UserViewSet(viewsets.ModelViewSet):
             current_user.set_password(
                 password_serializer.validated_data['new_password']
             )
-            current_user.save()
+            current_user.save(update_fields=('password',))
             return Response(
                 'Пароль изменен!',
                 status=status.HTTP_204_NO_CONTENT
@@ -333,10 +509,32 @@ class UserViewSet(viewsets.ModelViewSet):
 
 
 class RecipeRedirectView(viewsets.ViewSet):
-    """Перенаправление на полный рецепт по короткой ссылке."""
+    """
+    Перенаправление на полный рецепт по короткой ссылке.
+    Без аутентификации: ответ одинаков для всех и кешируется прокси.
+    """
+    authentication_classes = ()
+    permission_classes = (AllowAny,)
 
-    def link_redirect(self, request, pk):
+    def link_redirect(self, request, code):
         """Функция перенаправления на страницу рецепта."""
-        recipe = get_object_or_404(Recipe, pk=pk)
-        full_recipe_url = request.build_absolute_uri(f'/recipes/{recipe.pk}/')
-        return redirect(full_recipe_url)
+        pk = parse_code(code)
+        if pk is None and code.isdigit():
+            pk = int(code)
+        if pk is None or not recipe_exists(pk):
+            raise Http404
+        response = redirect(request.build_absolute_uri(f'/recipes/{pk}/'))
+        patch_cache_control(
+            response, public=True, max_age=settings.SHORT_LINK_CACHE_TIMEOUT
+        )
+        return response
+
+
+class MetricsView(APIView):
+    """Метрики запросов процесса в формате Prometheus."""
+    permission_classes = (IsMetricsClient,)
+    renderer_classes = (PrometheusRenderer,)
+    throttle_classes = ()
+
+    def get(self, request):
+        return Response(registry.render())
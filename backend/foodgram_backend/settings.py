@@ -1,6 +1,8 @@
+from datetime import timedelta
 import os
 from pathlib import Path
 
+from django.core.exceptions import ImproperlyConfigured
 from dotenv import load_dotenv
 
 
@@ -16,6 +18,45 @@ ALLOWED_HOSTS = os.getenv('ALLOWED_HOSTS', '*').split(', ')
 
 PAGE_SIZE = 4
 
+INGREDIENT_SEARCH_LIMIT = int(os.getenv('INGREDIENT_SEARCH_LIMIT', 50))
+
+SEARCH_CONFIG = os.getenv('SEARCH_CONFIG', 'russian')
+
+RESPONSE_CACHE_TIMEOUT = int(os.getenv('RESPONSE_CACHE_TIMEOUT', 5 * 60))
+SHORT_LINK_CACHE_TIMEOUT = int(os.getenv('SHORT_LINK_CACHE_TIMEOUT', 60 * 60))
+
+THUMBNAIL_SIZES = {'small': 240, 'medium': 640}
+THUMBNAIL_EXTENSIONS = {'WEBP': 'webp', 'JPEG': 'jpg'}
+THUMBNAIL_FORMAT = os.getenv('THUMBNAIL_FORMAT', 'WEBP').upper()
+if THUMBNAIL_FORMAT not in THUMBNAIL_EXTENSIONS:
+    raise ImproperlyConfigured(
+        'THUMBNAIL_FORMAT должен быть одним из: '
+        f'{", ".join(THUMBNAIL_EXTENSIONS)}'
+    )
+THUMBNAIL_QUALITY = 80
+THUMBNAIL_WORKERS = int(os.getenv('THUMBNAIL_WORKERS', 2))
+BASE64_DECODE_CHUNK_SIZE = 64 * 1024
+
+WORKER_PROCESSES = int(os.getenv('GUNICORN_WORKERS') or 1)
+
+AUTH_CACHE_TIMEOUT = int(os.getenv('AUTH_CACHE_TIMEOUT', 5 * 60))
+AUTH_LOCAL_CACHE_TIMEOUT = int(os.getenv('AUTH_LOCAL_CACHE_TIMEOUT', 30))
+AUTH_JWT = os.getenv('AUTH_JWT', 'False').lower() == 'true'
+
+SLOW_REQUEST_MS = int(os.getenv('SLOW_REQUEST_MS', 500))
+SLOW_REQUEST_QUERIES = int(os.getenv('SLOW_REQUEST_QUERIES', 50))
+SLOW_REQUEST_TOP_STATEMENTS = 5
+METRICS_ALLOWED_IPS = os.getenv('METRICS_ALLOWED_IPS', '127.0.0.1').split(', ')
+
+SHOPPING_CART_CHUNK_SIZE = 2000
+SHOPPING_CART_CACHE_TIMEOUT = int(
+    os.getenv('SHOPPING_CART_CACHE_TIMEOUT', 60 * 60)
+)
+SHOPPING_LIST_PDF_FONT = os.getenv(
+    'SHOPPING_LIST_PDF_FONT',
+    '/usr/share/fonts/truetype/dejavu/DejaVuSans.ttf',
+)
+
 DJANGO_APPS = [
     'django.contrib.admin',
     'django.contrib.auth',
@@ -43,6 +84,7 @@ INSTALLED_APPS = DJANGO_APPS + THIRD_PARTY_APPS + LOCAL_APPS
 AUTH_USER_MODEL = 'users.User'
 
 MIDDLEWARE = [
+    'api.middleware.RequestMetricsMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -88,9 +130,33 @@ else:
             'PASSWORD': os.getenv('POSTGRES_PASSWORD', 'password'),
             'HOST': os.getenv('DB_HOST', 'host'),
             'PORT': os.getenv('DB_PORT', 5432),
+            'CONN_MAX_AGE': int(os.getenv('DB_CONN_MAX_AGE', 60)),
         }
     }
 
+CACHES = {
+    'default': {
+        'BACKEND': os.getenv(
+            'CACHE_BACKEND',
+            'django.core.cache.backends.locmem.LocMemCache',
+        ),
+        'LOCATION': os.getenv('CACHE_LOCATION', ''),
+    }
+}
+
+# Кеш в памяти процесса не общий для процессов gunicorn: сброс записей
+# в одном процессе не виден другим, а ограничения частоты запросов
+# считаются в каждом процессе отдельно.
+SHARED_CACHE = CACHES['default']['BACKEND'] not in (
+    'django.core.cache.backends.locmem.LocMemCache',
+)
+if WORKER_PROCESSES > 1 and not SHARED_CACHE:
+    raise ImproperlyConfigured(
+        'Для нескольких процессов gunicorn (GUNICORN_WORKERS) нужен общий '
+        'кеш: задайте CACHE_BACKEND и CACHE_LOCATION, например Redis'
+    )
+AUTH_CACHE = SHARED_CACHE and AUTH_CACHE_TIMEOUT > 0
+
 AUTH_PASSWORD_VALIDATORS = [
     {
         'NAME': 'django.contrib.auth.password_validation.UserAttributeSimilarityValidator',
@@ -130,12 +196,37 @@ REST_FRAMEWORK = {
         'django_filters.rest_framework.DjangoFilterBackend',
     ],
     'DEFAULT_THROTTLE_CLASSES': [
-        'rest_framework.throttling.UserRateThrottle',
-        'rest_framework.throttling.AnonRateThrottle',
+        'api.throttling.SharedUserRateThrottle',
+        'api.throttling.SharedAnonRateThrottle',
+        'api.throttling.SharedScopedRateThrottle',
     ],
+    'DEFAULT_THROTTLE_RATES': {
+        'anon': os.getenv('THROTTLE_ANON_RATE', '600/minute'),
+        'user': os.getenv('THROTTLE_USER_RATE', '1200/minute'),
+        'recipe_create': os.getenv('THROTTLE_RECIPE_CREATE_RATE', '30/minute'),
+        'shopping_cart_download': os.getenv(
+            'THROTTLE_SHOPPING_CART_DOWNLOAD_RATE', '20/minute'
+        ),
+    },
     'DEFAULT_AUTHENTICATION_CLASSES': [
-        'rest_framework.authentication.TokenAuthentication',
+        'api.authentication.CachedTokenAuthentication',
     ],
+    'NUM_PROXIES': int(os.getenv('NUM_PROXIES', 1)),
+}
+
+if AUTH_JWT:
+    REST_FRAMEWORK['DEFAULT_AUTHENTICATION_CLASSES'].insert(
+        0, 'api.authentication.CachedJWTAuthentication'
+    )
+
+SIMPLE_JWT = {
+    'ACCESS_TOKEN_LIFETIME': timedelta(
+        minutes=int(os.getenv('JWT_ACCESS_TOKEN_MINUTES', 15))
+    ),
+    'REFRESH_TOKEN_LIFETIME': timedelta(
+        days=int(os.getenv('JWT_REFRESH_TOKEN_DAYS', 7))
+    ),
+    'AUTH_HEADER_TYPES': ('Bearer',),
 }
 
 DJOSER = {
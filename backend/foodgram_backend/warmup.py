@@ -0,0 +1,81 @@
+import logging
+import time
+
+from django.conf import settings
+from django.db import connections
+from django.urls import URLResolver, get_resolver
+from django.utils import translation
+from rest_framework.serializers import Serializer
+from rest_framework.settings import api_settings
+
+from recipes.catalog import get_catalog
+from recipes.matching import get_recipe_index
+
+
+logger = logging.getLogger(__name__)
+
+SERIALIZER_MODULES = ('api.',)
+
+
+def prime_urls(resolver=None):
+    """
+    Функция компиляции регулярных выражений адресов и построения таблиц
+    для reverse(), которые Django иначе строит при первых запросах.
+    """
+    resolver = resolver or get_resolver()
+    resolver.reverse_dict
+    for pattern in resolver.url_patterns:
+        pattern.pattern.regex
+        if isinstance(pattern, URLResolver):
+            prime_urls(pattern)
+
+
+def get_serializers(base=Serializer):
+    for serializer in base.__subclasses__():
+        yield serializer
+        yield from get_serializers(serializer)
+
+
+def prime_serializers():
+    """
+    Функция построения полей сериализаторов API: заполняет кеши
+    _meta моделей и импортирует классы из настроек DRF.
+    """
+    for name in api_settings.defaults:
+        getattr(api_settings, name)
+    for serializer in set(get_serializers()):
+        if serializer.__module__.startswith(SERIALIZER_MODULES):
+            serializer().fields
+
+
+def prime_data():
+    """
+    Функция загрузки справочников и индекса ингредиентов рецептов
+    в память процесса. Соединения с базой данных закрываются, чтобы
+    процессы-потомки не использовали общий сокет.
+    """
+    try:
+        get_catalog()
+        get_recipe_index()
+    finally:
+        connections.close_all()
+
+
+def warmup():
+    """
+    Функция прогрева приложения перед запуском воркеров: адреса,
+    сериализаторы, переводы, справочники и индекс рецептов. Ошибка
+    загрузки данных (база данных или кеш еще недоступны) не мешает
+    запуску: данные будут загружены при первых запросах.
+    """
+    started = time.perf_counter()
+    prime_urls()
+    with translation.override(settings.LANGUAGE_CODE):
+        prime_serializers()
+    try:
+        prime_data()
+    except Exception:
+        logger.warning('Данные не загружены при прогреве', exc_info=True)
+    logger.info(
+        'Прогрев завершен за %.1f мс', (time.perf_counter() - started) * 1000
+    )
@@ -0,0 +1,49 @@
+"""
+Настройки gunicorn для запуска в контейнере.
+
+Приложение загружается в главном процессе (preload_app) и прогревается
+до запуска воркеров, после чего объекты переносятся в постоянное
+поколение сборщика мусора (gc.freeze). Сборщик мусора в воркерах
+не трогает эти объекты, поэтому страницы памяти остаются общими
+с главным процессом (copy-on-write).
+"""
+import gc
+import multiprocessing
+import os
+
+
+bind = os.getenv('GUNICORN_BIND', '0.0.0.0:8000')
+worker_class = 'gthread'
+workers = int(
+    os.getenv('GUNICORN_WORKERS') or multiprocessing.cpu_count() + 1
+)
+# Число процессов передается настройкам Django (WORKER_PROCESSES),
+# которые проверяют, что кеш общий для всех процессов.
+os.environ['GUNICORN_WORKERS'] = str(workers)
+threads = int(os.getenv('GUNICORN_THREADS', 4))
+max_requests = int(os.getenv('GUNICORN_MAX_REQUESTS', 1000))
+max_requests_jitter = int(os.getenv('GUNICORN_MAX_REQUESTS_JITTER', 100))
+timeout = int(os.getenv('GUNICORN_TIMEOUT', 30))
+keepalive = 5
+preload_app = True
+if os.path.isdir('/dev/shm'):
+    worker_tmp_dir = '/dev/shm'
+
+# Пока приложение загружается, сборщик мусора выключен: освобожденные
+# объекты оставляют в страницах памяти пустоты, которые воркеры
+# заполнят и тем самым скопируют страницы.
+gc.disable()
+
+
+def when_ready(server):
+    """Функция прогрева приложения перед запуском воркеров."""
+    if server.cfg.preload_app:
+        from foodgram_backend.warmup import warmup
+
+        warmup()
+    gc.freeze()
+    gc.enable()
+    server.log.info(
+        'Объектов в постоянном поколении сборщика мусора: %d',
+        gc.get_freeze_count(),
+    )
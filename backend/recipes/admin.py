@@ -1,11 +1,17 @@
+from collections import Counter, defaultdict
+from functools import partial
+
 from django.contrib import admin
+from django.db import transaction
 
+from .cache import SHOPPING_LISTS_VERSION_KEY, invalidate_cache_version
 from .models import (
     Favorite,
     Ingredient,
     IngredientInRecipe,
     Recipe,
     RecipesInShoppingList,
+    ShoppingListIngredient,
     Tag,
 )
 
@@ -39,11 +45,13 @@ class RecipeAdmin(admin.ModelAdmin):
     )
     filter_horizontal = ('tags', 'ingredients')
     list_filter = ('tags',)
+    list_select_related = ('author',)
     search_fields = ('name', 'author__username')
+    readonly_fields = ('favorites_count', 'shopping_count')
 
     def recipe_in_favorites(self, obj):
         """Функция получения количества добавлений рецептов в избранное."""
-        return obj.favorites.count()
+        return obj.favorites_count
     recipe_in_favorites.short_description = ("Количество добавление рецепта в "
                                              "избранное")
 
@@ -56,6 +64,50 @@ class IngredientInRecipeAdmin(admin.ModelAdmin):
     search_fields = ('recipe__name', 'ingredient__name')
     list_filter = ('recipe', 'ingredient')
 
+    def change_recipes(self, changes):
+        """
+        Функция переноса изменений количеств {рецепт: {id ингредиента:
+        изменение}} в суммы списков покупок. Время изменения рецепта
+        обновляется, чтобы сбросить кеш ответов и обновить индексы.
+        """
+        for recipe, amounts in changes.items():
+            ShoppingListIngredient.objects.apply_amounts(
+                recipe.in_shopping_lists.values_list('user_id', flat=True),
+                amounts,
+            )
+            recipe.save(update_fields=('updated_at',))
+        transaction.on_commit(
+            partial(invalidate_cache_version, SHOPPING_LISTS_VERSION_KEY)
+        )
+
+    def get_removals(self, items):
+        changes = defaultdict(Counter)
+        for item in items:
+            changes[item.recipe][item.ingredient_id] -= item.amount
+        return changes
+
+    def save_model(self, request, obj, form, change):
+        changes = defaultdict(Counter)
+        if change:
+            changes = self.get_removals(
+                IngredientInRecipe.objects.select_related('recipe').filter(
+                    pk=obj.pk
+                )
+            )
+        super().save_model(request, obj, form, change)
+        changes[obj.recipe][obj.ingredient_id] += obj.amount
+        self.change_recipes(changes)
+
+    def delete_model(self, request, obj):
+        changes = self.get_removals((obj,))
+        super().delete_model(request, obj)
+        self.change_recipes(changes)
+
+    def delete_queryset(self, request, queryset):
+        changes = self.get_removals(queryset.select_related('recipe'))
+        super().delete_queryset(request, queryset)
+        self.change_recipes(changes)
+
 
 @admin.register(RecipesInShoppingList)
 class RecipesInShoppingListAdmin(admin.ModelAdmin):
@@ -65,6 +117,15 @@ class RecipesInShoppingListAdmin(admin.ModelAdmin):
     list_filter = ('user',)
 
 
+@admin.register(ShoppingListIngredient)
+class ShoppingListIngredientAdmin(admin.ModelAdmin):
+    """Админка для сумм ингредиентов в списках покупок."""
+    list_display = ('id', 'user', 'ingredient', 'total')
+    list_select_related = ('user', 'ingredient')
+    search_fields = ('user__username', 'ingredient__name')
+    readonly_fields = ('user', 'ingredient', 'total')
+
+
 @admin.register(Favorite)
 class FavoriteAdmin(admin.ModelAdmin):
     """Админка для избранного."""
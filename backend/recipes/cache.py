@@ -0,0 +1,65 @@
+from collections import OrderedDict
+import threading
+import time
+import uuid
+
+from django.core.cache import cache
+
+
+RECIPES_VERSION_KEY = 'recipes:version'
+SHOPPING_LISTS_VERSION_KEY = 'shopping_lists:version'
+
+
+def get_cache_version(key):
+    """
+    Функция получения версии данных из общего кеша.
+    Версия создается при первом обращении и меняется при сбросе.
+    """
+    version = cache.get(key)
+    if version is None:
+        version = uuid.uuid4().hex
+        if not cache.add(key, version, None):
+            version = cache.get(key, version)
+    return version
+
+
+def invalidate_cache_version(*keys):
+    """Функция сброса версий данных во всех процессах."""
+    cache.delete_many(keys)
+
+
+class LocalCache:
+    """
+    Ограниченный по размеру LRU-кеш в памяти процесса. Записи устаревают
+    через timeout секунд, поэтому изменения, сделанные другими
+    процессами, становятся видны не позже этого времени.
+    """
+
+    def __init__(self, size, timeout):
+        self.size = size
+        self.timeout = timeout
+        self._items = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            item = self._items.get(key)
+            if item is None:
+                return None
+            value, expires = item
+            if expires <= time.monotonic():
+                del self._items[key]
+                return None
+            self._items.move_to_end(key)
+            return value
+
+    def set(self, key, value):
+        with self._lock:
+            self._items[key] = (value, time.monotonic() + self.timeout)
+            self._items.move_to_end(key)
+            while len(self._items) > self.size:
+                self._items.popitem(last=False)
+
+    def delete(self, key):
+        with self._lock:
+            self._items.pop(key, None)
@@ -0,0 +1,85 @@
+from bisect import bisect_left
+import threading
+from types import MappingProxyType
+
+from recipes.cache import get_cache_version, invalidate_cache_version
+from recipes.models import Ingredient, Tag
+
+
+CATALOG_VERSION_KEY = 'recipes:catalog:version'
+
+_catalog = None
+_lock = threading.Lock()
+
+
+class Catalog:
+    """
+    Неизменяемый снимок справочников ингредиентов и тегов.
+
+    Объекты снимка общие для всех запросов процесса и не должны
+    изменяться.
+    """
+
+    def __init__(self, version, ingredients, tags):
+        self.version = version
+        self.ingredients = tuple(ingredients)
+        self.ingredients_by_id = MappingProxyType(
+            {ingredient.pk: ingredient for ingredient in self.ingredients}
+        )
+        self.ingredient_names = tuple(sorted(
+            (ingredient.name.casefold(), ingredient.pk)
+            for ingredient in self.ingredients
+        ))
+        self.tags = tuple(tags)
+        self.tags_by_id = MappingProxyType({tag.pk: tag for tag in self.tags})
+        self.tags_by_slug = MappingProxyType(
+            {tag.slug: tag for tag in self.tags}
+        )
+
+    def search_ingredients(self, value, limit=None):
+        """
+        Функция поиска ингредиентов: сначала совпадения по началу
+        названия, затем по вхождению подстроки.
+        """
+        value = value.casefold()
+        start = bisect_left(self.ingredient_names, (value,))
+        found = []
+        for name, pk in self.ingredient_names[start:]:
+            if not name.startswith(value):
+                break
+            found.append(pk)
+        found.extend(
+            pk for name, pk in self.ingredient_names
+            if value in name and not name.startswith(value)
+        )
+        return [self.ingredients_by_id[pk] for pk in found[:limit]]
+
+
+def get_catalog_version():
+    """Функция получения текущей версии справочников."""
+    return get_cache_version(CATALOG_VERSION_KEY)
+
+
+def get_catalog():
+    """
+    Функция получения справочников из памяти процесса.
+    Снимок перечитывается из базы данных при смене версии.
+    """
+    global _catalog
+    version = get_catalog_version()
+    catalog = _catalog
+    if catalog is not None and catalog.version == version:
+        return catalog
+    with _lock:
+        if _catalog is None or _catalog.version != version:
+            _catalog = Catalog(
+                version,
+                Ingredient.objects.all(),
+                Tag.objects.all(),
+            )
+        return _catalog
+
+
+def invalidate_catalog():
+    """Функция сброса справочников во всех процессах."""
+    invalidate_cache_version(CATALOG_VERSION_KEY)
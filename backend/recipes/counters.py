@@ -0,0 +1,61 @@
+from django.db.models import Count, F, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
+
+from recipes.models import Favorite, Recipe, RecipesInShoppingList
+from users.models import Subscription, User
+
+
+COUNTERS = (
+    (Recipe, 'favorites_count', Favorite, 'recipe'),
+    (Recipe, 'shopping_count', RecipesInShoppingList, 'recipe'),
+    (User, 'recipes_count', Recipe, 'author'),
+    (User, 'followers_count', Subscription, 'following'),
+)
+
+
+def change_counters(instance, step):
+    """
+    Атомарно изменяет счетчики, в которых учитывается объект,
+    не опуская их ниже нуля.
+    """
+    for model, field, counted_model, relation in COUNTERS:
+        if not isinstance(instance, counted_model):
+            continue
+        queryset = model.objects.filter(
+            pk=getattr(instance, f'{relation}_id')
+        )
+        if step < 0:
+            queryset = queryset.filter(**{f'{field}__gte': -step})
+        queryset.update(**{field: F(field) + step})
+
+
+def count_expression(counted_model, relation):
+    """Функция получения подзапроса с фактическим значением счетчика."""
+    return Coalesce(
+        Subquery(
+            counted_model.objects.filter(**{relation: OuterRef('pk')})
+            .order_by()
+            .values(relation)
+            .annotate(total=Count('pk'))
+            .values('total')
+        ),
+        Value(0),
+    )
+
+
+def reconcile_counters(fix=True):
+    """
+    Функция сверки счетчиков с фактическими данными.
+    Возвращает число расхождений по каждому счетчику.
+    """
+    drift = {}
+    for model, field, counted_model, relation in COUNTERS:
+        actual = count_expression(counted_model, relation)
+        drift[f'{model._meta.label}.{field}'] = (
+            model.objects.annotate(actual=actual)
+            .exclude(**{field: F('actual')})
+            .count()
+        )
+        if fix:
+            model.objects.update(**{field: actual})
+    return drift
@@ -0,0 +1,98 @@
+import string
+
+from django.core.cache import cache
+from django.utils.crypto import constant_time_compare, salted_hmac
+
+from recipes.cache import LocalCache
+from recipes.models import Recipe
+
+
+ALPHABET = string.digits + string.ascii_letters
+SIGNATURE_LENGTH = 4
+LINK_KEY = 'recipes:link:{}'
+MISSING_TIMEOUT = 60
+LOCAL_TIMEOUT = 60
+LOCAL_SIZE = 10000
+
+_local = LocalCache(LOCAL_SIZE, LOCAL_TIMEOUT)
+
+
+def encode(number):
+    """Функция записи неотрицательного числа в base62."""
+    digits = []
+    while True:
+        number, digit = divmod(number, len(ALPHABET))
+        digits.append(ALPHABET[digit])
+        if not number:
+            return ''.join(reversed(digits))
+
+
+def decode(value):
+    """Функция чтения числа из base62; None для недопустимой строки."""
+    number = 0
+    for char in value:
+        digit = ALPHABET.find(char)
+        if digit < 0:
+            return None
+        number = number * len(ALPHABET) + digit
+    return number
+
+
+def get_signature(pk):
+    digest = salted_hmac('recipes.links', str(pk)).digest()
+    number = int.from_bytes(digest, 'big') % len(ALPHABET) ** SIGNATURE_LENGTH
+    return encode(number).rjust(SIGNATURE_LENGTH, ALPHABET[0])
+
+
+def make_code(pk):
+    """Функция получения кода короткой ссылки рецепта."""
+    return encode(pk) + get_signature(pk)
+
+
+def parse_code(code):
+    """
+    Функция получения id рецепта из кода короткой ссылки.
+    Для кода с неверной подписью возвращается None без обращения
+    к базе данных и кешу.
+    """
+    value = code[:-SIGNATURE_LENGTH]
+    pk = decode(value)
+    if not pk or encode(pk) != value or not constant_time_compare(
+        get_signature(pk), code[-SIGNATURE_LENGTH:]
+    ):
+        return None
+    return pk
+
+
+def recipe_exists(pk):
+    """
+    Функция проверки существования рецепта для короткой ссылки.
+    Ответ берется из памяти процесса, затем из общего кеша; база
+    данных запрашивается только при промахе обоих.
+    """
+    if _local.get(pk):
+        return True
+    exists = cache.get(LINK_KEY.format(pk))
+    if exists is None:
+        exists = Recipe.objects.filter(pk=pk).exists()
+        cache.set(
+            LINK_KEY.format(pk), exists, None if exists else MISSING_TIMEOUT
+        )
+    if exists:
+        _local.set(pk, True)
+    return exists
+
+
+def add_link(pk):
+    """Функция прогрева кеша коротких ссылок новым рецептом."""
+    cache.set(LINK_KEY.format(pk), True, None)
+    _local.set(pk, True)
+
+
+def delete_link(pk):
+    """
+    Функция удаления рецепта из кеша коротких ссылок. Другие процессы
+    перестают находить рецепт в памяти не позже чем через LOCAL_TIMEOUT.
+    """
+    cache.delete(LINK_KEY.format(pk))
+    _local.delete(pk)
@@ -0,0 +1,155 @@
+import json
+import re
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+
+from recipes.models import Favorite, Recipe, RecipesInShoppingList
+from users.models import User
+
+
+FEED_SIZE = 10
+INDEX_NODE_TYPES = frozenset(
+    ('Index Scan', 'Index Only Scan', 'Bitmap Index Scan')
+)
+SQLITE_INDEX_RE = re.compile(r'USING (?:COVERING )?INDEX (\S+)')
+
+
+class Command(BaseCommand):
+    """Класс для проверки планов выполнения частых запросов."""
+    help = (
+        'Проверяет через EXPLAIN, что лента рецептов и проверки избранного '
+        'и списка покупок используют индексы'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--verbose-plans',
+            action='store_true',
+            help='Вывести планы всех запросов',
+        )
+
+    def handle(self, *args, **options):
+        user = User.objects.order_by('id').first()
+        recipe = Recipe.objects.order_by('id').first()
+        if user is None or recipe is None:
+            raise CommandError(
+                'Нет пользователей или рецептов, создайте данные командой '
+                'generate_fixtures'
+            )
+        failures = []
+        for name, queryset, indexes in self.get_checks(user, recipe):
+            used = self.get_used_indexes(queryset)
+            missing = [
+                (model, columns) for model, columns in indexes
+                if not self.get_index_names(model, columns) & used
+            ]
+            if options['verbose_plans'] or missing:
+                self.stdout.write(f'{name}:\n{queryset.explain()}')
+            if missing:
+                failures.append(name)
+                for model, columns in missing:
+                    self.stdout.write(self.style.ERROR(
+                        f'{name}: не используется индекс '
+                        f'{model._meta.db_table} ({", ".join(columns)})'
+                    ))
+        if failures:
+            raise CommandError(
+                f'Запросы без индексов: {", ".join(failures)}'
+            )
+        self.stdout.write(self.style.SUCCESS('Все запросы используют индексы'))
+
+    def get_checks(self, user, recipe):
+        """
+        Функция получения проверяемых запросов:
+        (название, запрос, [(модель, столбцы ожидаемого индекса)]).
+        """
+        feed_index = (Recipe, ('pub_date', 'id'))
+        favorite_index = (Favorite, ('user_id', 'recipe_id'))
+        shopping_index = (RecipesInShoppingList, ('user_id', 'recipe_id'))
+        return (
+            (
+                'recipes_feed',
+                Recipe.objects.order_by('-pub_date', 'id')[:FEED_SIZE],
+                (feed_index,),
+            ),
+            (
+                'recipes_feed_flags',
+                Recipe.objects.with_user_flags(user).order_by(
+                    '-pub_date', 'id'
+                )[:FEED_SIZE],
+                (feed_index, favorite_index, shopping_index),
+            ),
+            (
+                'recipes_author',
+                Recipe.objects.filter(author=user).order_by(
+                    '-pub_date', 'id'
+                )[:FEED_SIZE],
+                ((Recipe, ('author_id', 'pub_date')),),
+            ),
+            (
+                'favorite',
+                Favorite.objects.filter(user=user, recipe=recipe).order_by(),
+                (favorite_index,),
+            ),
+            (
+                'shopping_cart',
+                RecipesInShoppingList.objects.filter(
+                    user=user, recipe=recipe
+                ).order_by(),
+                (shopping_index,),
+            ),
+        )
+
+    def get_used_indexes(self, queryset):
+        """
+        Функция получения имен индексов, которые читает план запроса:
+        узлы Index Scan, Index Only Scan и Bitmap Index Scan в PostgreSQL,
+        шаги SEARCH и SCAN с USING INDEX в SQLite. Статистика планировщика
+        не подменяется, поэтому индекс, который есть, но проигрывает
+        последовательному чтению, проверку не проходит.
+        """
+        if connection.vendor != 'postgresql':
+            return set(SQLITE_INDEX_RE.findall(queryset.explain()))
+        sql, params = queryset.query.sql_with_params()
+        with connection.cursor() as cursor:
+            cursor.execute(f'EXPLAIN (FORMAT JSON) {sql}', params)
+            plans = cursor.fetchone()[0]
+        if isinstance(plans, str):
+            plans = json.loads(plans)
+        nodes = [plan['Plan'] for plan in plans]
+        used = set()
+        while nodes:
+            node = nodes.pop()
+            if node['Node Type'] in INDEX_NODE_TYPES:
+                used.add(node['Index Name'])
+            nodes.extend(node.get('Plans', ()))
+        return used
+
+    def get_index_names(self, model, columns):
+        """
+        Функция получения имен индексов таблицы, начинающихся со столбцов
+        columns. Индексы уникальных ограничений SQLite называются
+        sqlite_autoindex_*, поэтому они читаются из PRAGMA.
+        """
+        table = model._meta.db_table
+        with connection.cursor() as cursor:
+            if connection.vendor == 'sqlite':
+                cursor.execute(f'PRAGMA index_list({table})')
+                indexes = {}
+                for name in [row[1] for row in cursor.fetchall()]:
+                    cursor.execute(f'PRAGMA index_info({name})')
+                    indexes[name] = [row[2] for row in sorted(cursor)]
+            else:
+                indexes = {
+                    name: constraint['columns']
+                    for name, constraint
+                    in connection.introspection.get_constraints(
+                        cursor, table
+                    ).items()
+                    if constraint['index'] or constraint['unique']
+                }
+        return {
+            name for name, index_columns in indexes.items()
+            if list(index_columns[:len(columns)]) == list(columns)
+        }
@@ -0,0 +1,297 @@
+from collections import Counter
+import io
+from itertools import accumulate
+import random
+
+from PIL import Image
+from django.contrib.auth.hashers import make_password
+from django.core.files.base import ContentFile
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from recipes.cache import RECIPES_VERSION_KEY, invalidate_cache_version
+from recipes.counters import reconcile_counters
+from recipes.models import (
+    Favorite,
+    Ingredient,
+    IngredientInRecipe,
+    Recipe,
+    RecipesInShoppingList,
+    ShoppingListIngredient,
+    Tag,
+)
+from recipes.search import update_search_index
+from recipes.thumbnails import make_thumbnails
+from users.models import Subscription, User
+
+
+FIXTURE_IMAGE_NAME = 'recipes/images/fixture.png'
+
+
+def zipf_weights(count, exponent=1.0):
+    """
+    Функция получения накопленных весов распределения Ципфа:
+    элемент с номером n выбирается в n^exponent раз реже первого.
+    """
+    return list(accumulate(
+        1 / rank ** exponent for rank in range(1, count + 1)
+    ))
+
+
+def sample(rng, population, weights, count):
+    """Функция выбора count различных элементов с учетом весов."""
+    count = min(count, len(population))
+    chosen = set()
+    while len(chosen) < count:
+        chosen.update(rng.choices(
+            population, cum_weights=weights, k=count - len(chosen)
+        ))
+    return chosen
+
+
+class Command(BaseCommand):
+    """
+    Класс для создания тестовых пользователей, рецептов, избранного,
+    списков покупок и подписок. Популярность авторов, ингредиентов
+    и рецептов распределена по закону Ципфа, как в реальных данных.
+    """
+    help = (
+        'Создает тестовых пользователей, рецепты, избранное, списки '
+        'покупок и подписки для нагрузочного тестирования'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--users', type=int, default=100,
+            help='Количество пользователей',
+        )
+        parser.add_argument(
+            '--recipes', type=int, default=1000,
+            help='Количество рецептов',
+        )
+        parser.add_argument(
+            '--ingredients', type=int, default=12,
+            help='Наибольшее количество ингредиентов в рецепте',
+        )
+        parser.add_argument(
+            '--favorites', type=int, default=20,
+            help='Среднее количество рецептов в избранном пользователя',
+        )
+        parser.add_argument(
+            '--cart', type=int, default=5,
+            help='Среднее количество рецептов в списке покупок',
+        )
+        parser.add_argument(
+            '--subscriptions', type=int, default=10,
+            help='Среднее количество подписок пользователя',
+        )
+        parser.add_argument(
+            '--prefix', default='fixture',
+            help='Префикс имен создаваемых пользователей',
+        )
+        parser.add_argument(
+            '--password', default='fixture-password',
+            help='Пароль создаваемых пользователей',
+        )
+        parser.add_argument(
+            '--seed', type=int, default=0,
+            help='Начальное значение генератора случайных чисел',
+        )
+        parser.add_argument(
+            '--batch-size', type=int, default=1000,
+            help='Количество записей, добавляемых одним запросом',
+        )
+
+    def handle(self, *args, **options):
+        if options['users'] < 1:
+            raise CommandError('Нужен хотя бы один пользователь')
+        if min(options['recipes'], options['favorites'], options['cart'],
+               options['subscriptions']) < 0:
+            raise CommandError('Количество не может быть отрицательным')
+        if options['ingredients'] < 1:
+            raise CommandError('В рецепте нужен хотя бы один ингредиент')
+        self.rng = random.Random(options['seed'])
+        self.batch_size = options['batch_size']
+        self.ingredient_ids = list(
+            Ingredient.objects.values_list('id', flat=True)
+        )
+        self.tag_ids = list(Tag.objects.values_list('id', flat=True))
+        if not self.ingredient_ids or not self.tag_ids:
+            raise CommandError(
+                'Сначала загрузите ингредиенты и теги командой import_csv'
+            )
+        self.rng.shuffle(self.ingredient_ids)
+        with transaction.atomic():
+            users = self.create_users(
+                options['users'], options['prefix'], options['password']
+            )
+            recipes = self.create_recipes(
+                users, options['recipes'], options['ingredients']
+            )
+            self.create_links(
+                Favorite, 'recipe_id', users, recipes, options['favorites']
+            )
+            carts = self.create_links(
+                RecipesInShoppingList, 'recipe_id',
+                users, recipes, options['cart'],
+            )
+            self.create_shopping_lists(carts)
+            self.create_subscriptions(users, options['subscriptions'])
+            reconcile_counters()
+            update_search_index(recipes)
+        invalidate_cache_version(RECIPES_VERSION_KEY)
+        self.stdout.write(self.style.SUCCESS(
+            f'Созданы пользователи: {len(users)}, рецепты: {len(recipes)}'
+        ))
+
+    def bulk_create(self, model, objects):
+        """
+        Функция добавления объектов частями.
+        Возвращает id добавленных объектов в порядке добавления.
+        """
+        last_id = model.objects.order_by('-id').values_list(
+            'id', flat=True
+        ).first() or 0
+        model.objects.bulk_create(objects, batch_size=self.batch_size)
+        return list(
+            model.objects.filter(id__gt=last_id).order_by('id')
+            .values_list('id', flat=True)
+        )
+
+    def create_users(self, count, prefix, password):
+        start = User.objects.filter(username__startswith=prefix).count()
+        password = make_password(password)
+        return self.bulk_create(User, (
+            User(
+                username=f'{prefix}{number}',
+                email=f'{prefix}{number}@example.com',
+                first_name=f'Имя{number}',
+                last_name=f'Фамилия{number}',
+                password=password,
+            )
+            for number in range(start, start + count)
+        ))
+
+    def create_image(self):
+        """
+        Функция создания изображения и миниатюр, общих для всех
+        создаваемых рецептов.
+        """
+        buffer = io.BytesIO()
+        Image.new('RGB', (1024, 768), (200, 120, 60)).save(buffer, 'PNG')
+        storage = Recipe._meta.get_field('image').storage
+        name = storage.save(
+            FIXTURE_IMAGE_NAME, ContentFile(buffer.getvalue())
+        )
+        return name, make_thumbnails(None, name)
+
+    def create_recipes(self, users, count, max_ingredients):
+        """
+        Функция создания рецептов с ингредиентами и тегами.
+        Сохраняет ингредиенты рецептов для расчета списков покупок.
+        """
+        if not count:
+            self.recipe_ingredients = {}
+            return []
+        image, thumbnails = self.create_image()
+        authors = self.rng.choices(
+            users, cum_weights=zipf_weights(len(users)), k=count
+        )
+        recipes = self.bulk_create(Recipe, (
+            Recipe(
+                author_id=author_id,
+                name=f'Рецепт {number}',
+                text=f'Описание рецепта {number}',
+                image=image,
+                thumbnails=thumbnails,
+                cooking_time=self.rng.randint(5, 180),
+            )
+            for number, author_id in enumerate(authors, start=1)
+        ))
+        ingredient_weights = zipf_weights(len(self.ingredient_ids))
+        self.recipe_ingredients = {
+            recipe_id: {
+                ingredient_id: self.rng.randint(1, 500)
+                for ingredient_id in sample(
+                    self.rng, self.ingredient_ids, ingredient_weights,
+                    self.rng.randint(1, max_ingredients),
+                )
+            }
+            for recipe_id in recipes
+        }
+        IngredientInRecipe.objects.bulk_create(
+            (
+                IngredientInRecipe(
+                    recipe_id=recipe_id,
+                    ingredient_id=ingredient_id,
+                    amount=amount,
+                )
+                for recipe_id, amounts in self.recipe_ingredients.items()
+                for ingredient_id, amount in amounts.items()
+            ),
+            batch_size=self.batch_size,
+        )
+        Recipe.tags.through.objects.bulk_create(
+            (
+                Recipe.tags.through(recipe_id=recipe_id, tag_id=tag_id)
+                for recipe_id in recipes
+                for tag_id in self.rng.sample(
+                    self.tag_ids,
+                    self.rng.randint(1, min(3, len(self.tag_ids))),
+                )
+            ),
+            batch_size=self.batch_size,
+        )
+        return recipes
+
+    def create_links(
+        self, model, field, users, targets, average, allow_self=True
+    ):
+        """
+        Функция создания связей пользователей с популярными объектами.
+        Возвращает список пар (id пользователя, id объекта).
+        """
+        if not targets or not average:
+            return []
+        weights = zipf_weights(len(targets))
+        links = [
+            (user_id, target_id)
+            for user_id in users
+            for target_id in sample(
+                self.rng, targets, weights, self.rng.randint(0, 2 * average)
+            )
+            if allow_self or user_id != target_id
+        ]
+        model.objects.bulk_create(
+            (
+                model(user_id=user_id, **{field: target_id})
+                for user_id, target_id in links
+            ),
+            batch_size=self.batch_size,
+        )
+        return links
+
+    def create_shopping_lists(self, carts):
+        """Функция расчета сумм ингредиентов списков покупок."""
+        totals = Counter()
+        for user_id, recipe_id in carts:
+            for ingredient_id, amount in self.recipe_ingredients[
+                recipe_id
+            ].items():
+                totals[user_id, ingredient_id] += amount
+        ShoppingListIngredient.objects.bulk_create(
+            (
+                ShoppingListIngredient(
+                    user_id=user_id, ingredient_id=ingredient_id, total=total,
+                )
+                for (user_id, ingredient_id), total in totals.items()
+            ),
+            batch_size=self.batch_size,
+        )
+
+    def create_subscriptions(self, users, average):
+        """Функция создания подписок, чаще всего на активных авторов."""
+        self.create_links(
+            Subscription, 'following_id', users, users, average,
+            allow_self=False,
+        )
@@ -1,67 +1,255 @@
 import csv
-import traceback
+import gzip
+from itertools import islice
+import json
+from pathlib import Path
+import re
+import time
+from uuid import uuid4
 
 from django.conf import settings
-from django.core.management.base import BaseCommand
-from django.db import transaction
+from django.core.management.base import BaseCommand, CommandError
+from django.db import IntegrityError, transaction
+from foodgram_backend.constants import (
+    MAX_NAME_INGREDIENT_LENGTH,
+    MAX_NAME_TAG_LENGTH,
+    MAX_SLUG_TAG_LENGTH,
+    MAX_UNIT_LENGTH,
+    REGEX_SLUG,
+)
 
+from recipes.catalog import invalidate_catalog
 from recipes.models import Ingredient, Tag
 
 
+def read_rows(path):
+    """
+    Функция построчного чтения записей из файла csv, json или jsonl,
+    в том числе сжатого gzip (.gz).
+    """
+    compressed = path.suffix == '.gz'
+    suffix = Path(path.stem).suffix if compressed else path.suffix
+    opener = gzip.open if compressed else open
+    with opener(path, 'rt', encoding='utf-8', newline='') as file:
+        if suffix == '.csv':
+            reader = csv.DictReader(file)
+            try:
+                yield from reader
+            except csv.Error as error:
+                # DictReader.line_num обновляется только после успешно
+                # прочитанной записи, номер строки с ошибкой — у reader.
+                raise CommandError(
+                    f'{path}, строка {reader.reader.line_num}: {error}'
+                )
+        elif suffix == '.jsonl':
+            for line_number, line in enumerate(file, start=1):
+                if line.strip():
+                    try:
+                        yield json.loads(line)
+                    except ValueError as error:
+                        raise CommandError(
+                            f'{path}, строка {line_number}: {error}'
+                        )
+        elif suffix == '.json':
+            yield from json.load(file)
+        else:
+            raise CommandError(f'Неизвестный формат файла: {path}')
+
+
 class Command(BaseCommand):
-    """Класс для импорта данных из CSV файлов."""
-    help = 'Импортирует файлы csv с данными'
+    """
+    Класс для импорта ингредиентов и тегов. Записи загружаются частями
+    и добавляются без удаления существующих данных.
+    """
+    help = (
+        'Импортирует ингредиенты и теги из файлов csv, json или jsonl '
+        '(в том числе .gz); существующие записи не удаляются'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--ingredients',
+            type=Path,
+            default=settings.BASE_DIR / 'data' / 'ingredients.csv',
+            help='Файл с ингредиентами',
+        )
+        parser.add_argument(
+            '--tags',
+            type=Path,
+            default=settings.BASE_DIR / 'data' / 'tags.csv',
+            help='Файл с тегами',
+        )
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            default=500,
+            help='Количество записей, загружаемых одним запросом',
+        )
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Только показать отличия от базы данных, не изменяя её',
+        )
 
-    @transaction.atomic
     def handle(self, *args, **options):
-        dir_place = settings.BASE_DIR / 'data'
+        self.chunk_size = options['chunk_size']
+        self.dry_run = options['dry_run']
+        self.verbosity = options['verbosity']
+        if self.chunk_size < 1:
+            raise CommandError('Размер части должен быть больше нуля')
         try:
-            self.import_ingredient(dir_place)
-            self.import_tags(dir_place)
-            self.stdout.write(self.style.SUCCESS(
-                'Импорт всех данный успешно завершен!'
-            ))
-        except Exception:
-            self.stdout.write(self.style.ERROR('Импорт данных не выполнен!'))
-
-    def import_ingredient(self, dir_place):
-        with open(dir_place / 'ingredients.csv', newline='') as file:
-            reader = csv.DictReader(file, delimiter=',')
-            Ingredient.objects.all().delete()
-            self.stdout.write('Начало импорта данных Ingredients')
-            for row in reader:
-                try:
-                    Ingredient.objects.create(
-                        name=row['name'],
-                        measurement_unit=row['measurement_unit'],
-                    )
-                except Exception as e:
-                    self.stdout.write(
-                        self.style.ERROR(f'Ошибка импорта  Ingredient: {e}')
-                    )
-                    self.stdout.write(traceback.format_exc())
-            else:
-                self.stdout.write(
-                    self.style.SUCCESS('Импорт данный Ingredients завершен')
+            with transaction.atomic():
+                changed = self.import_file(
+                    options['ingredients'], 'Ingredient',
+                    self.import_ingredients,
+                )
+                changed += self.import_file(
+                    options['tags'], 'Tag', self.import_tags,
                 )
+        except (IntegrityError, OSError, ValueError) as error:
+            raise CommandError(f'Импорт данных не выполнен: {error}')
+        if changed and not self.dry_run:
+            invalidate_catalog()
+        self.stdout.write(self.style.SUCCESS(
+            'Проверка данных завершена' if self.dry_run
+            else 'Импорт всех данных успешно завершен!'
+        ))
 
-    def import_tags(self, dir_place):
-        with open(dir_place / 'tags.csv', newline='') as file:
-            reader = csv.DictReader(file, delimiter=',')
-            Tag.objects.all().delete()
-            self.stdout.write('Начало импорта данных Tag')
-            for row in reader:
-                try:
-                    Tag.objects.create(
-                        name=row['name'],
-                        slug=row['slug'],
-                    )
-                except Exception as e:
-                    self.stdout.write(
-                        self.style.ERROR(f'Ошибка импорта  Tag: {e}')
-                    )
-                    self.stdout.write(traceback.format_exc())
-            else:
+    def import_file(self, path, label, import_chunk):
+        """
+        Функция импорта файла частями по chunk_size записей.
+        Возвращает количество добавленных и измененных записей.
+        """
+        self.path = path
+        self.stdout.write(f'Начало импорта данных {label} из {path}')
+        started = time.monotonic()
+        rows = enumerate(read_rows(path), start=1)
+        total = created = updated = 0
+        while True:
+            chunk = list(islice(rows, self.chunk_size))
+            if not chunk:
+                break
+            chunk_created, chunk_updated = import_chunk(chunk)
+            total += len(chunk)
+            created += chunk_created
+            updated += chunk_updated
+            if self.verbosity > 1:
+                self.stdout.write(f'Обработано записей {label}: {total}')
+        elapsed = time.monotonic() - started
+        self.stdout.write(self.style.SUCCESS(
+            f'Импорт данных {label} завершен: записей {total}, '
+            f'добавлено {created}, изменено {updated}, '
+            f'{total / elapsed if elapsed else total:.0f} записей/с'
+        ))
+        return created + updated
+
+    def get_value(self, number, row, field, max_length):
+        """Функция получения и проверки значения поля записи."""
+        value = row.get(field) if isinstance(row, dict) else None
+        if not isinstance(value, str) or not value.strip():
+            raise CommandError(
+                f'{self.path}, запись {number}: не заполнено поле {field}'
+            )
+        value = value.strip()
+        if len(value) > max_length:
+            raise CommandError(
+                f'{self.path}, запись {number}: поле {field} длиннее '
+                f'{max_length} символов'
+            )
+        return value
+
+    def import_ingredients(self, chunk):
+        """Функция добавления отсутствующих ингредиентов части файла."""
+        ingredients = {
+            (
+                self.get_value(
+                    number, row, 'name', MAX_NAME_INGREDIENT_LENGTH
+                ),
+                self.get_value(
+                    number, row, 'measurement_unit', MAX_UNIT_LENGTH
+                ),
+            )
+            for number, row in chunk
+        }
+        existing = set(
+            Ingredient.objects.filter(
+                name__in={name for name, _ in ingredients}
+            ).values_list('name', 'measurement_unit')
+        )
+        new = sorted(ingredients - existing)
+        if self.dry_run:
+            for name, measurement_unit in new:
+                self.stdout.write(f'+ {name} ({measurement_unit})')
+        elif new:
+            Ingredient.objects.bulk_create(
+                (
+                    Ingredient(name=name, measurement_unit=measurement_unit)
+                    for name, measurement_unit in new
+                ),
+                ignore_conflicts=True,
+            )
+        return len(new), 0
+
+    def import_tags(self, chunk):
+        """
+        Функция добавления новых тегов и обновления названий
+        существующих тегов с тем же слагом. Теги, названия которых
+        переходят к другим тегам, сначала получают временные названия.
+        """
+        tags = {}
+        numbers = {}
+        for number, row in chunk:
+            slug = self.get_value(number, row, 'slug', MAX_SLUG_TAG_LENGTH)
+            if not re.fullmatch(REGEX_SLUG, slug):
+                raise CommandError(
+                    f'{self.path}, запись {number}: неверный слаг {slug}'
+                )
+            name = self.get_value(number, row, 'name', MAX_NAME_TAG_LENGTH)
+            other_number, other_slug = numbers.get(name, (None, slug))
+            if other_slug != slug and tags[other_slug] == name:
+                raise CommandError(
+                    f'{self.path}, запись {number}: название {name} '
+                    f'уже указано в записи {other_number}'
+                )
+            tags[slug] = name
+            numbers[name] = number, slug
+        taken = Tag.objects.filter(name__in=tags.values()).exclude(
+            slug__in=tags
+        ).values_list('name', 'slug').first()
+        if taken is not None:
+            name, slug = taken
+            raise CommandError(
+                f'{self.path}, запись {numbers[name][0]}: название {name} '
+                f'уже занято тегом {slug}'
+            )
+        existing = Tag.objects.in_bulk(tags, field_name='slug')
+        new = [slug for slug in tags if slug not in existing]
+        changed = [
+            tag for slug, tag in existing.items() if tag.name != tags[slug]
+        ]
+        if self.dry_run:
+            for slug in new:
+                self.stdout.write(f'+ {slug}: {tags[slug]}')
+            for tag in changed:
                 self.stdout.write(
-                    self.style.SUCCESS('Импорт данных Tag завершен')
+                    f'~ {tag.slug}: {tag.name} -> {tags[tag.slug]}'
                 )
+            return len(new), len(changed)
+        first, last = chunk[0][0], chunk[-1][0]
+        try:
+            names = set(tags.values())
+            swapped = [tag for tag in changed if tag.name in names]
+            for tag in swapped:
+                tag.name = uuid4().hex
+            Tag.objects.bulk_update(swapped, ('name',))
+            for tag in changed:
+                tag.name = tags[tag.slug]
+            Tag.objects.bulk_update(changed, ('name',))
+            Tag.objects.bulk_create(
+                Tag(name=tags[slug], slug=slug) for slug in new
+            )
+        except IntegrityError as error:
+            raise CommandError(
+                f'{self.path}, записи {first}-{last}: {error}'
+            )
+        return len(new), len(changed)
@@ -0,0 +1,30 @@
+from django.core.management.base import BaseCommand
+
+from recipes.models import Recipe
+from recipes.thumbnails import has_thumbnails, make_thumbnails
+
+
+class Command(BaseCommand):
+    """Класс для создания миниатюр изображений рецептов."""
+    help = 'Создает недостающие миниатюры изображений рецептов'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--all',
+            action='store_true',
+            help='Пересоздать миниатюры всех рецептов',
+        )
+
+    def handle(self, *args, **options):
+        created = 0
+        recipes = Recipe.objects.exclude(image='').only(
+            'id', 'image', 'thumbnails'
+        )
+        for recipe in recipes.iterator():
+            if not options['all'] and has_thumbnails(recipe):
+                continue
+            make_thumbnails(recipe.pk, recipe.image.name)
+            created += 1
+        self.stdout.write(self.style.SUCCESS(
+            f'Созданы миниатюры изображений рецептов: {created}'
+        ))
@@ -0,0 +1,66 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from recipes.cache import SHOPPING_LISTS_VERSION_KEY, invalidate_cache_version
+from recipes.models import ShoppingListIngredient
+
+
+class Command(BaseCommand):
+    """Класс для пересчета сумм ингредиентов в списках покупок."""
+    help = 'Пересчитывает суммы ингредиентов в списках покупок'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--verify',
+            action='store_true',
+            help='Только проверить суммы, не изменяя их',
+        )
+
+    def handle(self, *args, **options):
+        expected = ShoppingListIngredient.objects.calculate()
+        if options['verify']:
+            self.verify(expected)
+            return
+        with transaction.atomic():
+            ShoppingListIngredient.objects.all().delete()
+            ShoppingListIngredient.objects.bulk_create(
+                (
+                    ShoppingListIngredient(
+                        user_id=user_id,
+                        ingredient_id=ingredient_id,
+                        total=total,
+                    )
+                    for (user_id, ingredient_id), total in expected.items()
+                ),
+                batch_size=1000,
+            )
+        invalidate_cache_version(SHOPPING_LISTS_VERSION_KEY)
+        self.stdout.write(self.style.SUCCESS(
+            f'Суммы списков покупок пересчитаны: {len(expected)}'
+        ))
+
+    def verify(self, expected):
+        stored = {
+            (user_id, ingredient_id): total
+            for user_id, ingredient_id, total
+            in ShoppingListIngredient.objects.values_list(
+                'user_id', 'ingredient_id', 'total'
+            )
+        }
+        differences = sorted(
+            key for key in expected.keys() | stored.keys()
+            if expected.get(key) != stored.get(key)
+        )
+        for user_id, ingredient_id in differences:
+            self.stdout.write(
+                f'Пользователь {user_id}, ингредиент {ingredient_id}: '
+                f'{stored.get((user_id, ingredient_id))} вместо '
+                f'{expected.get((user_id, ingredient_id))}'
+            )
+        if differences:
+            raise CommandError(
+                f'Найдено расхождений в списках покупок: {len(differences)}'
+            )
+        self.stdout.write(self.style.SUCCESS(
+            'Суммы списков покупок совпадают с рецептами'
+        ))
@@ -0,0 +1,25 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from recipes.counters import reconcile_counters
+
+
+class Command(BaseCommand):
+    """Класс для сверки счетчиков рецептов и пользователей."""
+    help = 'Сверяет и исправляет счетчики избранного, покупок и подписок'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--verify',
+            action='store_true',
+            help='Только проверить счетчики, не изменяя их',
+        )
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            drift = reconcile_counters(fix=not options['verify'])
+        for counter, count in drift.items():
+            self.stdout.write(f'{counter}: расхождений {count}')
+        if options['verify'] and any(drift.values()):
+            raise CommandError('Счетчики расходятся с данными')
+        self.stdout.write(self.style.SUCCESS('Сверка счетчиков завершена'))
@@ -0,0 +1,215 @@
+from array import array
+from collections import Counter, defaultdict, namedtuple
+from collections.abc import Sequence
+from datetime import timedelta
+import math
+import threading
+
+from django.utils import timezone
+
+from recipes.cache import RECIPES_VERSION_KEY, get_cache_version
+from recipes.catalog import get_catalog_version
+from recipes.models import IngredientInRecipe, Recipe
+
+
+REFRESH_MARGIN = timedelta(minutes=5)
+LOAD_CHUNK_SIZE = 2000
+
+RecipeMatch = namedtuple(
+    'RecipeMatch', ('recipe_id', 'matched', 'missing', 'ratio')
+)
+
+_index = None
+_lock = threading.Lock()
+_refresh_lock = threading.Lock()
+
+
+class RecipeMatches(Sequence):
+    """
+    Отсортированные результаты подбора. Объекты RecipeMatch создаются
+    только для запрошенных элементов, например для страницы выдачи.
+    """
+
+    def __init__(self, keys):
+        self.keys = keys
+
+    def __len__(self):
+        return len(self.keys)
+
+    def __getitem__(self, item):
+        if isinstance(item, slice):
+            return [self.build(key) for key in self.keys[item]]
+        return self.build(self.keys[item])
+
+    @staticmethod
+    def build(key):
+        negative_ratio, missing, _, negative_id, matched = key
+        return RecipeMatch(-negative_id, matched, missing, -negative_ratio)
+
+
+class RecipeIndex:
+    """
+    Инвертированный индекс ингредиентов рецептов в памяти процесса:
+    для каждого ингредиента хранится массив позиций рецептов с ним.
+
+    При изменении рецептов индекс дочитывает из базы только рецепты,
+    измененные после прошлого обновления; позиции измененных
+    и удаленных рецептов помечаются пустыми и пропускаются.
+    """
+
+    def __init__(self, catalog_version):
+        self.catalog_version = catalog_version
+        self.version = None
+        self.synced_at = None
+        self.recipe_ids = array('q')
+        self.sizes = array('L')
+        self.cooking_times = array('L')
+        self.positions = {}
+        self.updated_at = {}
+        self.postings = defaultdict(lambda: array('L'))
+
+    @property
+    def dead(self):
+        """Количество пустых позиций."""
+        return len(self.recipe_ids) - len(self.positions)
+
+    def add(self, recipe_id, cooking_time, updated_at, ingredient_ids):
+        self.remove(recipe_id)
+        self.updated_at[recipe_id] = updated_at
+        position = len(self.recipe_ids)
+        self.recipe_ids.append(recipe_id)
+        self.sizes.append(len(ingredient_ids))
+        self.cooking_times.append(cooking_time)
+        self.positions[recipe_id] = position
+        for ingredient_id in ingredient_ids:
+            self.postings[ingredient_id].append(position)
+
+    def remove(self, recipe_id):
+        position = self.positions.pop(recipe_id, None)
+        self.updated_at.pop(recipe_id, None)
+        if position is not None:
+            self.recipe_ids[position] = 0
+
+    def fetch(self):
+        """
+        Функция чтения из базы рецептов, измененных после прошлого
+        обновления, и списка существующих рецептов, если какие-то из них
+        удалены. Индекс не изменяется, поэтому функция вызывается без
+        блокировки _lock: позиции меняет только обновляющий поток.
+        """
+        synced_at = timezone.now() - REFRESH_MARGIN
+        recipes = Recipe.objects.order_by()
+        ingredients = IngredientInRecipe.objects.order_by()
+        if self.synced_at is not None:
+            recipes = recipes.filter(updated_at__gte=self.synced_at)
+            ingredients = ingredients.filter(
+                recipe__updated_at__gte=self.synced_at
+            )
+        # Рецепты читаются до ингредиентов: если рецепт изменится между
+        # запросами, в индекс попадет прежнее время изменения, и рецепт
+        # будет перечитан при следующем обновлении.
+        changed = list(recipes.values_list(
+            'id', 'cooking_time', 'updated_at'
+        ).iterator(chunk_size=LOAD_CHUNK_SIZE))
+        recipe_ingredients = defaultdict(list)
+        for recipe_id, ingredient_id in ingredients.values_list(
+            'recipe_id', 'ingredient_id'
+        ).iterator(chunk_size=LOAD_CHUNK_SIZE):
+            recipe_ingredients[recipe_id].append(ingredient_id)
+        existing = None
+        if self.synced_at is not None:
+            added = sum(
+                recipe_id not in self.positions for recipe_id, _, _ in changed
+            )
+            if Recipe.objects.count() != len(self.positions) + added:
+                existing = set(Recipe.objects.values_list('id', flat=True))
+        return synced_at, changed, recipe_ingredients, existing
+
+    def apply(self, changes, version):
+        """
+        Функция применения прочитанных функцией fetch изменений: рецепты,
+        не изменявшиеся с прошлой загрузки, пропускаются, удаленные
+        убираются из индекса.
+        """
+        synced_at, recipes, recipe_ingredients, existing = changes
+        for recipe_id, cooking_time, updated_at in recipes:
+            if self.updated_at.get(recipe_id) != updated_at:
+                self.add(
+                    recipe_id, cooking_time, updated_at,
+                    recipe_ingredients.get(recipe_id, ()),
+                )
+        if existing is not None:
+            for recipe_id in self.positions.keys() - existing:
+                self.remove(recipe_id)
+        self.version = version
+        self.synced_at = synced_at
+
+    def match(self, ingredient_ids, max_missing=None, max_cooking_time=None):
+        """
+        Функция подбора рецептов по имеющимся ингредиентам.
+        Возвращает рецепты хотя бы с одним имеющимся ингредиентом,
+        отсортированные по доле имеющихся ингредиентов, затем по
+        количеству недостающих и времени приготовления.
+        """
+        matched = Counter()
+        for ingredient_id in set(ingredient_ids):
+            matched.update(self.postings.get(ingredient_id, ()))
+        if max_missing is None:
+            max_missing = math.inf
+        if max_cooking_time is None:
+            max_cooking_time = math.inf
+        recipe_ids, sizes = self.recipe_ids, self.sizes
+        cooking_times = self.cooking_times
+        results = []
+        append = results.append
+        for position, count in matched.items():
+            recipe_id = recipe_ids[position]
+            if not recipe_id:
+                continue
+            size = sizes[position]
+            missing = size - count
+            cooking_time = cooking_times[position]
+            if missing > max_missing or cooking_time > max_cooking_time:
+                continue
+            append((-count / size, missing, cooking_time, -recipe_id, count))
+        results.sort()
+        return RecipeMatches(results)
+
+
+def get_recipe_index():
+    """
+    Функция получения индекса ингредиентов рецептов из памяти процесса.
+    Индекс дочитывается при смене версии рецептов и строится заново
+    при смене справочников или если пустых позиций больше, чем занятых.
+    Запросы к базе данных выполняются под блокировкой _refresh_lock,
+    а подбор рецептов (_lock) ждет только применения изменений.
+    """
+    global _index
+    version = get_cache_version(RECIPES_VERSION_KEY)
+    catalog_version = get_catalog_version()
+    index = _index
+    if (
+        index is not None and index.version == version
+        and index.catalog_version == catalog_version
+    ):
+        return index
+    with _refresh_lock:
+        index = _index
+        if (
+            index is None or index.catalog_version != catalog_version
+            or index.dead > len(index.positions)
+        ):
+            index = RecipeIndex(catalog_version)
+        if index.version != version:
+            changes = index.fetch()
+            with _lock:
+                index.apply(changes, version)
+        _index = index
+        return index
+
+
+def match_recipes(ingredient_ids, max_missing=None, max_cooking_time=None):
+    """Функция подбора рецептов по ингредиентам под блокировкой индекса."""
+    index = get_recipe_index()
+    with _lock:
+        return index.match(ingredient_ids, max_missing, max_cooking_time)
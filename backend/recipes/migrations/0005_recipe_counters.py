@@ -0,0 +1,55 @@
+# Generated by Django 3.2.16 on 2026-10-17 16:15
+
+from django.db import migrations, models
+from django.db.models.functions import Coalesce
+
+
+def count_expression(counted_model, relation):
+    return Coalesce(
+        models.Subquery(
+            counted_model.objects.filter(**{relation: models.OuterRef('pk')})
+            .order_by()
+            .values(relation)
+            .annotate(total=models.Count('pk'))
+            .values('total')
+        ),
+        models.Value(0),
+    )
+
+
+def fill_counters(apps, schema_editor):
+    Favorite = apps.get_model('recipes', 'Favorite')
+    Recipe = apps.get_model('recipes', 'Recipe')
+    RecipesInShoppingList = apps.get_model('recipes', 'RecipesInShoppingList')
+    Subscription = apps.get_model('users', 'Subscription')
+    User = apps.get_model('users', 'User')
+    Recipe.objects.update(
+        favorites_count=count_expression(Favorite, 'recipe'),
+        shopping_count=count_expression(RecipesInShoppingList, 'recipe'),
+    )
+    User.objects.update(
+        recipes_count=count_expression(Recipe, 'author'),
+        followers_count=count_expression(Subscription, 'following'),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0004_shoppinglistingredient'),
+        ('users', '0002_user_counters'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='recipe',
+            name='favorites_count',
+            field=models.PositiveIntegerField(default=0, verbose_name='Количество добавлений в избранное'),
+        ),
+        migrations.AddField(
+            model_name='recipe',
+            name='shopping_count',
+            field=models.PositiveIntegerField(default=0, verbose_name='Количество добавлений в список покупок'),
+        ),
+        migrations.RunPython(fill_counters, migrations.RunPython.noop),
+    ]
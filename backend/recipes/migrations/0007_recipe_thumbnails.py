@@ -0,0 +1,22 @@
+# Generated by Django 3.2.16 on 2026-10-17 18:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0006_recipe_updated_at'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='recipe',
+            name='thumbnails',
+            field=models.JSONField(
+                blank=True,
+                default=dict,
+                verbose_name='Миниатюры изображения',
+            ),
+        ),
+    ]
@@ -0,0 +1,74 @@
+# Generated by Django 3.2.16 on 2026-10-17 20:10
+
+from django.conf import settings
+from django.db import migrations
+
+
+INGREDIENT_NAMES_SQL = (
+    '(SELECT {} FROM recipes_ingredientinrecipe item '
+    'JOIN recipes_ingredient ingredient '
+    'ON ingredient.id = item.ingredient_id '
+    'WHERE item.recipe_id = recipe.id)'
+)
+
+
+def create_search_index(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == 'postgresql':
+        schema_editor.execute(
+            'ALTER TABLE recipes_recipe '
+            'ADD COLUMN IF NOT EXISTS search_vector tsvector'
+        )
+        schema_editor.execute(
+            'CREATE INDEX IF NOT EXISTS recipes_recipe_search_vector '
+            'ON recipes_recipe USING gin (search_vector)'
+        )
+        schema_editor.execute(
+            'UPDATE recipes_recipe AS recipe SET search_vector = '
+            "setweight(to_tsvector(%(config)s::regconfig, recipe.name), 'A') "
+            "|| setweight(to_tsvector(%(config)s::regconfig, "
+            "coalesce({}, '')), 'B') || "
+            "setweight(to_tsvector(%(config)s::regconfig, recipe.text), 'C')"
+            .format(INGREDIENT_NAMES_SQL.format(
+                "string_agg(ingredient.name, ' ')"
+            )),
+            {'config': settings.SEARCH_CONFIG},
+        )
+    elif vendor == 'sqlite':
+        schema_editor.execute(
+            'CREATE VIRTUAL TABLE IF NOT EXISTS recipes_recipe_search '
+            "USING fts5(name, ingredients, text, tokenize='unicode61')"
+        )
+        schema_editor.execute(
+            'INSERT INTO recipes_recipe_search '
+            '(rowid, name, ingredients, text) '
+            "SELECT recipe.id, recipe.name, coalesce({}, ''), recipe.text "
+            'FROM recipes_recipe recipe'
+            .format(INGREDIENT_NAMES_SQL.format(
+                "group_concat(ingredient.name, ' ')"
+            ))
+        )
+
+
+def drop_search_index(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == 'postgresql':
+        schema_editor.execute(
+            'DROP INDEX IF EXISTS recipes_recipe_search_vector'
+        )
+        schema_editor.execute(
+            'ALTER TABLE recipes_recipe DROP COLUMN IF EXISTS search_vector'
+        )
+    elif vendor == 'sqlite':
+        schema_editor.execute('DROP TABLE IF EXISTS recipes_recipe_search')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0007_recipe_thumbnails'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
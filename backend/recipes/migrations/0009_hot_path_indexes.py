@@ -0,0 +1,149 @@
+# Generated by Django 3.2.16 on 2026-10-17 21:00
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+from django.db.models.functions import Coalesce
+
+
+def count_expression(counted_model, relation):
+    return Coalesce(
+        models.Subquery(
+            counted_model.objects.filter(**{relation: models.OuterRef('pk')})
+            .order_by()
+            .values(relation)
+            .annotate(total=models.Count('pk'))
+            .values('total')
+        ),
+        models.Value(0),
+    )
+
+
+def rebuild_shopping_list_ingredients(apps):
+    IngredientInRecipe = apps.get_model('recipes', 'IngredientInRecipe')
+    ShoppingListIngredient = apps.get_model(
+        'recipes', 'ShoppingListIngredient'
+    )
+    ShoppingListIngredient.objects.all().delete()
+    ShoppingListIngredient.objects.bulk_create(
+        (
+            ShoppingListIngredient(
+                user_id=item['recipe__in_shopping_lists__user'],
+                ingredient_id=item['ingredient'],
+                total=item['total'],
+            )
+            for item in IngredientInRecipe.objects.filter(
+                recipe__in_shopping_lists__isnull=False,
+            ).values(
+                'recipe__in_shopping_lists__user',
+                'ingredient',
+            ).annotate(total=models.Sum('amount')).order_by()
+        ),
+        batch_size=1000,
+    )
+
+
+def delete_duplicates(apps, schema_editor):
+    """
+    Удаляет повторные записи избранного и списков покупок перед
+    созданием уникальных ограничений; остается самая ранняя запись.
+    Исторические модели не отправляют сигналы, поэтому счетчики
+    рецептов и суммы списков покупок, учитывавшие удаленные записи,
+    пересчитываются по оставшимся.
+    """
+    deleted = 0
+    for model_name in ('Favorite', 'RecipesInShoppingList'):
+        model = apps.get_model('recipes', model_name)
+        duplicates = model.objects.values('user', 'recipe').annotate(
+            first_id=models.Min('id'), total=models.Count('id'),
+        ).filter(total__gt=1).order_by()
+        for item in duplicates:
+            deleted += model.objects.filter(
+                user=item['user'], recipe=item['recipe'],
+            ).exclude(id=item['first_id']).delete()[0]
+    if not deleted:
+        return
+    Recipe = apps.get_model('recipes', 'Recipe')
+    Recipe.objects.update(
+        favorites_count=count_expression(
+            apps.get_model('recipes', 'Favorite'), 'recipe'
+        ),
+        shopping_count=count_expression(
+            apps.get_model('recipes', 'RecipesInShoppingList'), 'recipe'
+        ),
+    )
+    rebuild_shopping_list_ingredients(apps)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('recipes', '0008_recipe_search'),
+    ]
+
+    operations = [
+        migrations.RunPython(delete_duplicates, migrations.RunPython.noop),
+        migrations.AlterModelOptions(
+            name='recipe',
+            options={
+                'ordering': ('-pub_date', 'id'),
+                'verbose_name': 'рецепт',
+                'verbose_name_plural': 'Рецепты',
+            },
+        ),
+        migrations.AddIndex(
+            model_name='recipe',
+            index=models.Index(
+                fields=['author', '-pub_date'],
+                name='recipe_author_pub_date_idx',
+            ),
+        ),
+        migrations.AddIndex(
+            model_name='recipe',
+            index=models.Index(
+                fields=['-pub_date', 'id'], name='recipe_pub_date_id_idx'
+            ),
+        ),
+        migrations.AddConstraint(
+            model_name='favorite',
+            constraint=models.UniqueConstraint(
+                fields=('user', 'recipe'), name='unique_favorite'
+            ),
+        ),
+        migrations.AddConstraint(
+            model_name='recipesinshoppinglist',
+            constraint=models.UniqueConstraint(
+                fields=('user', 'recipe'), name='unique_shopping_list_recipe'
+            ),
+        ),
+        migrations.AlterField(
+            model_name='favorite',
+            name='user',
+            field=models.ForeignKey(
+                db_index=False,
+                on_delete=django.db.models.deletion.CASCADE,
+                to=settings.AUTH_USER_MODEL,
+            ),
+        ),
+        migrations.AlterField(
+            model_name='recipe',
+            name='author',
+            field=models.ForeignKey(
+                db_index=False,
+                on_delete=django.db.models.deletion.CASCADE,
+                to=settings.AUTH_USER_MODEL,
+                verbose_name='Автор рецепта',
+            ),
+        ),
+        migrations.AlterField(
+            model_name='recipesinshoppinglist',
+            name='user',
+            field=models.ForeignKey(
+                db_index=False,
+                on_delete=django.db.models.deletion.CASCADE,
+                related_name='shopping_lists',
+                to=settings.AUTH_USER_MODEL,
+            ),
+        ),
+    ]
@@ -1,5 +1,6 @@
 from django.core.validators import MinValueValidator, RegexValidator
 from django.db import models
+from django.db.models.functions import Greatest, RowNumber
 from foodgram_backend.constants import (
     MAX_NAME_INGREDIENT_LENGTH,
     MAX_NAME_RECIPE_LENGTH,
@@ -11,7 +12,7 @@ from foodgram_backend.constants import (
     REGEX_SLUG,
 )
 
-from users.models import User
+from users.models import Subscription, User
 
 
 class Tag(models.Model):
@@ -68,6 +69,84 @@ class Ingredient(models.Model):
         return f'Ингредиент: {self.name}'
 
 
+class RecipeQuerySet(models.QuerySet):
+    """Набор запросов для рецептов."""
+
+    def with_user_flags(self, user):
+        """
+        Аннотирует рецепты флагами нахождения в избранном
+        и в списке покупок пользователя.
+        """
+        if not user.is_authenticated:
+            return self
+        return self.annotate(
+            is_favorited=models.Exists(
+                Favorite.objects.filter(
+                    user=user,
+                    recipe=models.OuterRef('pk'),
+                )
+            ),
+            is_in_shopping_cart=models.Exists(
+                RecipesInShoppingList.objects.filter(
+                    user=user,
+                    recipe=models.OuterRef('pk'),
+                )
+            ),
+        )
+
+    def for_read(self, user):
+        """
+        Подготавливает рецепты к сериализации: подгружает автора,
+        теги и ингредиенты фиксированным числом запросов.
+        """
+        if user.is_authenticated:
+            author = models.Prefetch(
+                'author',
+                queryset=User.objects.annotate(
+                    is_subscribed=models.Exists(
+                        Subscription.objects.filter(
+                            user=user,
+                            following=models.OuterRef('pk'),
+                        )
+                    )
+                ),
+            )
+            queryset = self.prefetch_related(author)
+        else:
+            queryset = self.select_related('author')
+        return queryset.prefetch_related(
+            'tags',
+            models.Prefetch(
+                'recipe_ingredient_amounts',
+                queryset=IngredientInRecipe.objects.select_related(
+                    'ingredient'
+                ),
+            ),
+        ).with_user_flags(user)
+
+    def recent_by_authors(self, author_ids, limit=None):
+        """
+        Возвращает последние рецепты каждого из авторов одним запросом,
+        не больше limit рецептов на автора (ROW_NUMBER() OVER автора).
+        """
+        queryset = self.filter(author_id__in=author_ids)
+        if limit is None:
+            return queryset
+        ranked = queryset.annotate(
+            position=models.Window(
+                expression=RowNumber(),
+                partition_by=models.F('author_id'),
+                order_by=(models.F('pub_date').desc(), models.F('id')),
+            )
+        ).order_by()
+        sql, params = ranked.query.sql_with_params()
+        return self.model.objects.raw(
+            f'SELECT * FROM ({sql}) ranked '
+            'WHERE ranked.position <= %s ORDER BY ranked.position',
+            (*params, limit),
+        )
+
+
 class Recipe(models.Model):
     """Модель рецепта."""
     tags = models.ManyToManyField(
@@ -78,6 +157,7 @@ class Recipe(models.Model):
         User,
         on_delete=models.CASCADE,
         verbose_name='Автор рецепта',
+        db_index=False,
     )
     ingredients = models.ManyToManyField(
         Ingredient,
@@ -94,6 +174,11 @@ class Recipe(models.Model):
         verbose_name='Изображение рецепта',
         help_text='Загрузите изображение блюда.',
     )
+    thumbnails = models.JSONField(
+        verbose_name='Миниатюры изображения',
+        default=dict,
+        blank=True,
+    )
     text = models.TextField(
         verbose_name='Описание рецепта',
         help_text="Опишите рецепт."
@@ -113,11 +198,34 @@ class Recipe(models.Model):
         verbose_name='Дата публикации',
         auto_now_add=True,
     )
+    updated_at = models.DateTimeField(
+        verbose_name='Дата изменения',
+        auto_now=True,
+    )
+    favorites_count = models.PositiveIntegerField(
+        verbose_name='Количество добавлений в избранное',
+        default=0,
+    )
+    shopping_count = models.PositiveIntegerField(
+        verbose_name='Количество добавлений в список покупок',
+        default=0,
+    )
+
+    objects = RecipeQuerySet.as_manager()
 
     class Meta:
-        ordering = ('-pub_date',)
+        ordering = ('-pub_date', 'id')
         verbose_name = 'рецепт'
         verbose_name_plural = 'Рецепты'
+        indexes = (
+            models.Index(
+                fields=('author', '-pub_date'),
+                name='recipe_author_pub_date_idx',
+            ),
+            models.Index(
+                fields=('-pub_date', 'id'), name='recipe_pub_date_id_idx'
+            ),
+        )
 
     def __str__(self):
         return f'Рецепт: {self.name}'
@@ -165,6 +273,7 @@ class RecipesInShoppingList(models.Model):
         User,
         on_delete=models.CASCADE,
         related_name='shopping_lists',
+        db_index=False,
     )
     recipe = models.ForeignKey(
         Recipe,
@@ -176,6 +285,11 @@ class RecipesInShoppingList(models.Model):
         ordering = ('recipe',)
         verbose_name = 'рецепты в списке покупок'
         verbose_name_plural = 'Рецепты в списке покупок'
+        constraints = (
+            models.UniqueConstraint(
+                fields=('user', 'recipe'), name='unique_shopping_list_recipe'
+            ),
+        )
 
     def __str__(self):
         return (
@@ -184,11 +298,119 @@ class RecipesInShoppingList(models.Model):
         )
 
 
+class ShoppingListIngredientQuerySet(models.QuerySet):
+    """Набор запросов для суммарных ингредиентов списков покупок."""
+
+    def apply_amounts(self, user_ids, amounts):
+        """
+        Изменяет суммы ингредиентов в списках покупок пользователей
+        на указанные величины {id ингредиента: изменение количества}.
+        Суммы не опускаются ниже нуля, даже если разошлись с рецептами;
+        нулевые суммы удаляются.
+        """
+        user_ids = list(user_ids)
+        amounts = {
+            ingredient_id: amount
+            for ingredient_id, amount in amounts.items() if amount
+        }
+        if not user_ids or not amounts:
+            return
+        self.bulk_create(
+            (
+                self.model(
+                    user_id=user_id,
+                    ingredient_id=ingredient_id,
+                    total=0,
+                )
+                for user_id in user_ids
+                for ingredient_id, amount in amounts.items() if amount > 0
+            ),
+            ignore_conflicts=True,
+        )
+        items = self.filter(user_id__in=user_ids, ingredient_id__in=amounts)
+        items.update(total=Greatest(
+            models.F('total') + models.Case(
+                *(models.When(ingredient_id=ingredient_id, then=amount)
+                  for ingredient_id, amount in amounts.items()),
+                default=0,
+                output_field=models.IntegerField(),
+            ),
+            0,
+        ))
+        items.filter(total__lte=0).delete()
+
+    def add_recipe(self, user_ids, recipe, sign=1):
+        """Добавляет ингредиенты рецепта в списки покупок пользователей."""
+        self.apply_amounts(user_ids, {
+            ingredient_id: sign * amount
+            for ingredient_id, amount in IngredientInRecipe.objects.filter(
+                recipe=recipe
+            ).values_list('ingredient_id', 'amount')
+        })
+
+    def remove_recipe(self, user_ids, recipe):
+        """Убирает ингредиенты рецепта из списков покупок пользователей."""
+        self.add_recipe(user_ids, recipe, sign=-1)
+
+    def calculate(self):
+        """
+        Вычисляет суммы ингредиентов всех списков покупок
+        по рецептам в них: {(id пользователя, id ингредиента): сумма}.
+        """
+        return {
+            (item['recipe__in_shopping_lists__user'], item['ingredient']):
+                item['total']
+            for item in IngredientInRecipe.objects.filter(
+                recipe__in_shopping_lists__isnull=False,
+            ).values(
+                'recipe__in_shopping_lists__user',
+                'ingredient',
+            ).annotate(total=models.Sum('amount')).order_by()
+        }
+
+
+class ShoppingListIngredient(models.Model):
+    """Модель суммарного количества ингредиента в списке покупок."""
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='shopping_list_ingredients',
+    )
+    ingredient = models.ForeignKey(
+        Ingredient,
+        on_delete=models.CASCADE,
+        verbose_name='Ингредиент',
+    )
+    total = models.PositiveIntegerField(
+        verbose_name='Суммарное количество',
+    )
+
+    objects = ShoppingListIngredientQuerySet.as_manager()
+
+    class Meta:
+        ordering = ('user', 'ingredient')
+        verbose_name = 'ингредиент в списке покупок'
+        verbose_name_plural = 'Ингредиенты в списке покупок'
+        constraints = (
+            models.UniqueConstraint(
+                fields=('user', 'ingredient'),
+                name='unique_shopping_list_ingredient',
+            ),
+        )
+
+    def __str__(self):
+        return (
+            f'Ингредиент {self.ingredient.name} в количестве {self.total} '
+            f'в списке покупок у {self.user.username}'
+        )
+
+
 class Favorite(models.Model):
     """Модель добавления рецепта в избранное."""
     user = models.ForeignKey(
         User,
         on_delete=models.CASCADE,
+        db_index=False,
     )
     recipe = models.ForeignKey(
         Recipe,
@@ -206,3 +428,8 @@ class Favorite(models.Model):
         ordering = ('recipe',)
         verbose_name = 'рецепт в избранном'
         verbose_name_plural = 'Рецепты в избранном'
+        constraints = (
+            models.UniqueConstraint(
+                fields=('user', 'recipe'), name='unique_favorite'
+            ),
+        )
@@ -0,0 +1,120 @@
+import re
+
+from django.conf import settings
+from django.db import connections
+from django.db.models.expressions import RawSQL
+
+
+SEARCH_TABLE = 'recipes_recipe_search'
+SEARCH_CHUNK_SIZE = 500
+SEARCH_WEIGHTS = (10.0, 5.0, 1.0)
+
+INGREDIENT_NAMES_SQL = (
+    '(SELECT {} FROM recipes_ingredientinrecipe item '
+    'JOIN recipes_ingredient ingredient '
+    'ON ingredient.id = item.ingredient_id '
+    'WHERE item.recipe_id = recipe.id)'
+)
+
+POSTGRESQL_UPDATE_SQL = (
+    'UPDATE recipes_recipe AS recipe SET search_vector = '
+    "setweight(to_tsvector(%(config)s::regconfig, recipe.name), 'A') || "
+    "setweight(to_tsvector(%(config)s::regconfig, coalesce({}, '')), 'B') || "
+    "setweight(to_tsvector(%(config)s::regconfig, recipe.text), 'C')"
+).format(INGREDIENT_NAMES_SQL.format("string_agg(ingredient.name, ' ')"))
+
+SQLITE_INSERT_SQL = (
+    f'INSERT INTO {SEARCH_TABLE} (rowid, name, ingredients, text) '
+    "SELECT recipe.id, recipe.name, coalesce({}, ''), recipe.text "
+    'FROM recipes_recipe recipe'
+).format(INGREDIENT_NAMES_SQL.format("group_concat(ingredient.name, ' ')"))
+
+
+def update_search_index(recipe_ids=None, using='default'):
+    """
+    Функция обновления поискового индекса рецептов recipe_ids
+    (по умолчанию всех). В PostgreSQL обновляется столбец
+    search_vector, в SQLite — таблица FTS5; удаленные рецепты
+    убираются из индекса.
+    """
+    connection = connections[using]
+    if recipe_ids is None:
+        chunks = (None,)
+    else:
+        recipe_ids = list(recipe_ids)
+        chunks = (
+            recipe_ids[start:start + SEARCH_CHUNK_SIZE]
+            for start in range(0, len(recipe_ids), SEARCH_CHUNK_SIZE)
+        )
+    with connection.cursor() as cursor:
+        for chunk in chunks:
+            if connection.vendor == 'postgresql':
+                update_postgresql(cursor, chunk)
+            elif connection.vendor == 'sqlite':
+                update_sqlite(cursor, chunk)
+
+
+def update_postgresql(cursor, recipe_ids):
+    params = {'config': settings.SEARCH_CONFIG, 'ids': recipe_ids}
+    if recipe_ids is None:
+        cursor.execute(POSTGRESQL_UPDATE_SQL, params)
+    else:
+        cursor.execute(
+            POSTGRESQL_UPDATE_SQL + ' WHERE recipe.id = ANY(%(ids)s)', params
+        )
+
+
+def update_sqlite(cursor, recipe_ids):
+    if recipe_ids is None:
+        cursor.execute(f'DELETE FROM {SEARCH_TABLE}')
+        cursor.execute(SQLITE_INSERT_SQL)
+        return
+    placeholders = ', '.join(['%s'] * len(recipe_ids))
+    cursor.execute(
+        f'DELETE FROM {SEARCH_TABLE} WHERE rowid IN ({placeholders})',
+        recipe_ids,
+    )
+    cursor.execute(
+        f'{SQLITE_INSERT_SQL} WHERE recipe.id IN ({placeholders})',
+        recipe_ids,
+    )
+
+
+def search_recipes(queryset, value):
+    """
+    Функция полнотекстового поиска рецептов по названию, ингредиентам
+    и описанию. Рецепты аннотируются релевантностью search_rank и
+    сортируются по ней; название весит больше ингредиентов,
+    ингредиенты — больше описания.
+    """
+    vendor = connections[queryset.db].vendor
+    if vendor == 'postgresql':
+        query = 'websearch_to_tsquery(%s::regconfig, %s)'
+        params = (settings.SEARCH_CONFIG, value)
+        matches = RawSQL(
+            f'SELECT id FROM recipes_recipe WHERE search_vector @@ {query}',
+            params,
+        )
+        rank = RawSQL(
+            f'ts_rank(recipes_recipe.search_vector, {query})', params
+        )
+    elif vendor == 'sqlite':
+        words = re.findall(r'\w+', value)
+        if not words:
+            return queryset.none()
+        query = ' '.join(f'"{word}"*' for word in words)
+        matches = RawSQL(
+            f'SELECT rowid FROM {SEARCH_TABLE} WHERE {SEARCH_TABLE} MATCH %s',
+            (query,),
+        )
+        rank = RawSQL(
+            f'(SELECT -bm25({SEARCH_TABLE}, %s, %s, %s) FROM {SEARCH_TABLE} '
+            f'WHERE {SEARCH_TABLE} MATCH %s '
+            'AND rowid = recipes_recipe.id)',
+            (*SEARCH_WEIGHTS, query),
+        )
+    else:
+        return queryset.filter(name__icontains=value)
+    return queryset.filter(id__in=matches).annotate(
+        search_rank=rank
+    ).order_by('-search_rank', '-pub_date', '-id')
@@ -0,0 +1,190 @@
+from functools import partial
+
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save, pre_delete
+from django.dispatch import receiver
+
+from recipes.cache import (
+    RECIPES_VERSION_KEY,
+    SHOPPING_LISTS_VERSION_KEY,
+    invalidate_cache_version,
+)
+from recipes.catalog import invalidate_catalog
+from recipes.counters import change_counters
+from recipes.links import add_link, delete_link
+from recipes.models import (
+    Favorite,
+    Ingredient,
+    IngredientInRecipe,
+    Recipe,
+    RecipesInShoppingList,
+    ShoppingListIngredient,
+    Tag,
+)
+from recipes.search import update_search_index
+from recipes.thumbnails import schedule_thumbnails
+from users.models import Subscription, User
+
+
+AUTHOR_FIELDS = frozenset(
+    ('email', 'username', 'first_name', 'last_name', 'avatar')
+)
+
+
+@receiver((post_save, post_delete), sender=Ingredient)
+@receiver((post_save, post_delete), sender=Tag)
+def catalog_changed(sender, **kwargs):
+    """
+    Сбрасывает справочники после фиксации транзакции, чтобы другие
+    процессы не загрузили под новой версией прежние записи.
+    """
+    transaction.on_commit(invalidate_catalog)
+
+
+@receiver((post_save, post_delete), sender=Ingredient)
+def shopping_list_ingredient_changed(sender, **kwargs):
+    """
+    Сбрасывает сохраненные выгрузки списков покупок после фиксации
+    транзакции: в них выводятся название и единица измерения.
+    """
+    transaction.on_commit(
+        partial(invalidate_cache_version, SHOPPING_LISTS_VERSION_KEY)
+    )
+
+
+@receiver((post_save, post_delete), sender=Recipe)
+def recipe_changed(sender, **kwargs):
+    """
+    Сбрасывает кеш ответов с рецептами после фиксации транзакции,
+    когда теги и ингредиенты рецепта уже сохранены.
+    """
+    transaction.on_commit(
+        partial(invalidate_cache_version, RECIPES_VERSION_KEY)
+    )
+
+
+@receiver((post_save, post_delete), sender=Recipe)
+def recipe_search_changed(sender, instance, using, **kwargs):
+    """
+    Обновляет поисковый индекс рецепта после фиксации транзакции,
+    когда ингредиенты рецепта уже сохранены.
+    """
+    transaction.on_commit(
+        partial(update_search_index, (instance.pk,), using), using=using
+    )
+
+
+def update_ingredient_recipes_index(recipe_ids, using):
+    """
+    Функция обновления поискового индекса рецептов ингредиента и сброса
+    кеша ответов со списками рецептов после фиксации транзакции.
+    """
+    transaction.on_commit(
+        partial(update_search_index, recipe_ids, using), using=using
+    )
+    transaction.on_commit(
+        partial(invalidate_cache_version, RECIPES_VERSION_KEY), using=using
+    )
+
+
+@receiver(post_save, sender=Ingredient)
+def ingredient_search_changed(sender, instance, created, using,
+                              update_fields=None, **kwargs):
+    """
+    Обновляет поисковый индекс рецептов с ингредиентом после фиксации
+    транзакции: в индекс входят названия ингредиентов.
+    """
+    if created or (update_fields and 'name' not in update_fields):
+        return
+    update_ingredient_recipes_index(
+        IngredientInRecipe.objects.using(using).filter(
+            ingredient=instance
+        ).values_list('recipe_id', flat=True).distinct(),
+        using,
+    )
+
+
+@receiver(pre_delete, sender=Ingredient)
+def ingredient_search_deleted(sender, instance, using, **kwargs):
+    """
+    Обновляет поисковый индекс рецептов удаляемого ингредиента; рецепты
+    запоминаются до удаления их ингредиентов.
+    """
+    update_ingredient_recipes_index(
+        list(IngredientInRecipe.objects.using(using).filter(
+            ingredient=instance
+        ).values_list('recipe_id', flat=True).distinct()),
+        using,
+    )
+
+
+@receiver(post_save, sender=Recipe)
+def recipe_link_created(sender, instance, created, **kwargs):
+    """Добавляет новый рецепт в кеш коротких ссылок."""
+    if created:
+        transaction.on_commit(partial(add_link, instance.pk))
+
+
+@receiver(post_delete, sender=Recipe)
+def recipe_link_deleted(sender, instance, **kwargs):
+    """Убирает удаленный рецепт из кеша коротких ссылок."""
+    transaction.on_commit(partial(delete_link, instance.pk))
+
+
+@receiver(post_save, sender=Recipe)
+def recipe_saved(sender, instance, **kwargs):
+    """Ставит в очередь создание миниатюр нового изображения рецепта."""
+    schedule_thumbnails(instance)
+
+
+@receiver(post_save, sender=User)
+def author_changed(sender, instance, created, update_fields=None, **kwargs):
+    """
+    Сбрасывает кеш ответов с рецептами при изменении полей профиля,
+    которые выводятся в рецептах, у пользователя с рецептами.
+    """
+    if created or (
+        update_fields and not AUTHOR_FIELDS.intersection(update_fields)
+    ):
+        return
+    if not Recipe.objects.filter(author=instance).exists():
+        return
+    transaction.on_commit(
+        partial(invalidate_cache_version, RECIPES_VERSION_KEY)
+    )
+
+
+@receiver(post_save, sender=RecipesInShoppingList)
+def recipe_added_to_shopping_list(sender, instance, created, **kwargs):
+    """Добавляет ингредиенты рецепта в суммы списка покупок."""
+    if created:
+        ShoppingListIngredient.objects.add_recipe(
+            (instance.user_id,), instance.recipe_id
+        )
+
+
+@receiver(pre_delete, sender=RecipesInShoppingList)
+def recipe_removed_from_shopping_list(sender, instance, **kwargs):
+    """Убирает ингредиенты рецепта из сумм списка покупок."""
+    ShoppingListIngredient.objects.remove_recipe(
+        (instance.user_id,), instance.recipe_id
+    )
+
+
+@receiver(post_save, sender=Favorite)
+@receiver(post_save, sender=RecipesInShoppingList)
+@receiver(post_save, sender=Recipe)
+@receiver(post_save, sender=Subscription)
+def counted_object_created(sender, instance, created, **kwargs):
+    """Увеличивает счетчики при добавлении объекта."""
+    if created:
+        change_counters(instance, 1)
+
+
+@receiver(post_delete, sender=Favorite)
+@receiver(post_delete, sender=RecipesInShoppingList)
+@receiver(post_delete, sender=Recipe)
+@receiver(post_delete, sender=Subscription)
+def counted_object_deleted(sender, instance, **kwargs):
+    """Уменьшает счетчики при удалении объекта."""
+    change_counters(instance, -1)
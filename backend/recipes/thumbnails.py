@@ -0,0 +1,135 @@
+from concurrent.futures import ThreadPoolExecutor
+import io
+import logging
+import os
+
+from PIL import Image, ImageOps
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.db import connection, transaction
+
+from recipes.cache import RECIPES_VERSION_KEY, invalidate_cache_version
+from recipes.models import Recipe
+
+
+THUMBNAIL_PATH = 'recipes/thumbnails/{size}/{name}.{extension}'
+
+logger = logging.getLogger(__name__)
+
+_executor = ThreadPoolExecutor(
+    max_workers=settings.THUMBNAIL_WORKERS or 1,
+    thread_name_prefix='thumbnails',
+)
+
+
+def get_thumbnail_name(recipe, size):
+    """
+    Функция получения пути миниатюры изображения рецепта.
+    Возвращает None, пока миниатюры текущего изображения не готовы.
+    """
+    thumbnails = recipe.thumbnails or {}
+    if not size or thumbnails.get('source') != recipe.image.name:
+        return None
+    return thumbnails.get(size)
+
+
+def has_thumbnails(recipe):
+    """Функция проверки готовности миниатюр изображения рецепта."""
+    return all(
+        get_thumbnail_name(recipe, size) for size in settings.THUMBNAIL_SIZES
+    )
+
+
+def make_thumbnails(recipe_id, name):
+    """
+    Функция создания миниатюр изображения рецепта всех размеров.
+    Результат сохраняется, только если изображение рецепта не менялось,
+    прежние миниатюры рецепта при этом удаляются.
+    """
+    storage = Recipe._meta.get_field('image').storage
+    with storage.open(name) as source:
+        # JPEG не поддерживает прозрачность и палитру: RGBA и P
+        # переводятся в RGB для любого формата миниатюр.
+        image = ImageOps.exif_transpose(Image.open(source)).convert('RGB')
+    image_format = settings.THUMBNAIL_FORMAT
+    thumbnails = {'source': name}
+    for size, width in settings.THUMBNAIL_SIZES.items():
+        thumbnail = image.copy()
+        thumbnail.thumbnail((width, width))
+        buffer = io.BytesIO()
+        thumbnail.save(
+            buffer, image_format, quality=settings.THUMBNAIL_QUALITY
+        )
+        thumbnails[size] = storage.save(
+            THUMBNAIL_PATH.format(
+                size=size,
+                name=os.path.splitext(os.path.basename(name))[0],
+                extension=settings.THUMBNAIL_EXTENSIONS[image_format],
+            ),
+            ContentFile(buffer.getvalue()),
+        )
+    if recipe_id is None:
+        return thumbnails
+    previous = Recipe.objects.filter(pk=recipe_id).values_list(
+        'thumbnails', flat=True
+    ).first()
+    if Recipe.objects.filter(pk=recipe_id, image=name).update(
+        thumbnails=thumbnails
+    ):
+        invalidate_cache_version(RECIPES_VERSION_KEY)
+        delete_thumbnails(recipe_id, previous, keep=thumbnails)
+    else:
+        delete_thumbnails(recipe_id, thumbnails)
+    return thumbnails
+
+
+def delete_thumbnails(recipe_id, thumbnails, keep=None):
+    """
+    Функция удаления миниатюр, замененных новыми. Миниатюры не
+    удаляются, если их изображение использует другой рецепт.
+    """
+    source = (thumbnails or {}).get('source')
+    if not source or Recipe.objects.filter(image=source).exclude(
+        pk=recipe_id
+    ).exists():
+        return
+    storage = Recipe._meta.get_field('image').storage
+    kept = set((keep or {}).values())
+    for size in settings.THUMBNAIL_SIZES:
+        name = thumbnails.get(size)
+        if name and name not in kept:
+            storage.delete(name)
+
+
+def run_make_thumbnails(recipe_id, name):
+    """Функция создания миниатюр с записью ошибок в журнал."""
+    try:
+        make_thumbnails(recipe_id, name)
+    except Exception:
+        logger.exception('Не удалось создать миниатюры %s', name)
+
+
+def run_make_thumbnails_in_background(recipe_id, name):
+    """Функция создания миниатюр в фоновом потоке."""
+    try:
+        run_make_thumbnails(recipe_id, name)
+    finally:
+        connection.close()
+
+
+def schedule_thumbnails(recipe):
+    """
+    Функция постановки создания миниатюр в фоновый пул потоков
+    после фиксации транзакции. SQLite не поддерживает параллельную
+    запись, поэтому с ним, как и при THUMBNAIL_WORKERS=0, миниатюры
+    создаются сразу после фиксации.
+    """
+    if not recipe.image or has_thumbnails(recipe):
+        return
+    recipe_id, name = recipe.pk, recipe.image.name
+    if settings.THUMBNAIL_WORKERS and connection.vendor != 'sqlite':
+        transaction.on_commit(lambda: _executor.submit(
+            run_make_thumbnails_in_background, recipe_id, name
+        ))
+    else:
+        transaction.on_commit(lambda: run_make_thumbnails(recipe_id, name))
@@ -22,6 +22,7 @@ class UserAdmin(admin.ModelAdmin):
         'avatar',
     )
     search_fields = ('email', 'username',)
+    readonly_fields = ('recipes_count', 'followers_count')
 
 
 @admin.register(Subscription)